@@ -462,7 +462,8 @@ class JitsiCaptureInjector {
                     participant_id: participantId,
                     image_data: imageData,
                     capture_mode: 'manual',
-                    timestamp: new Date().toISOString()
+                    timestamp: new Date().toISOString(),
+                    response_mode: 'urls'
                 })
             });
             
@@ -504,6 +505,8 @@ class JitsiCaptureInjector {
         // Auto-download files
         if (result.zip_file) {
             this.downloadFile(result.zip_file, result.zip_filename);
+        } else if (result.zip_download_url) {
+            this.downloadUrl(`${this.config.bridgeUrl}${result.zip_download_url}`);
         }
         
         // Update UI
@@ -526,6 +529,14 @@ class JitsiCaptureInjector {
         this.log(`📥 Downloaded: ${filename}`);
     }
     
+    downloadUrl(url) {
+        const link = document.createElement('a');
+        link.href = url;
+        link.click();
+        
+        this.log(`📥 Downloading: ${url}`);
+    }
+    
     addCaptureToHistory(captureResult) {
         const capturesList = document.getElementById('captures-list');
         if (!capturesList) return;
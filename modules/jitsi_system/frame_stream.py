@@ -0,0 +1,164 @@
+"""
+Frame Stream Manager
+Latest-frame slot per stream untuk live detection dari Jitsi: client mengirim
+frame JPEG biner dengan rate terbatas, server hanya memproses frame terbaru dan
+membuang frame yang sudah basi.
+"""
+import threading
+import time
+
+# Streaming settings
+STREAM_MAX_FPS = 10            # Frame di atas rate ini ditolak sebelum masuk slot
+STREAM_MAX_FRAME_SIZE = 2 * 1024 * 1024
+STREAM_IDLE_TIMEOUT = 30       # Detik tanpa frame sebelum worker stream berhenti
+
+
+class FrameStream:
+    """State satu stream: slot frame terbaru plus counter"""
+
+    def __init__(self, stream_id, session_id, participant_id, max_fps, reduce=1):
+        self.stream_id = stream_id
+        self.session_id = session_id
+        self.participant_id = participant_id
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.reduce = reduce
+        self.active = True
+
+        self.latest = None          # (sequence, data, received_at)
+        self.last_accepted_at = 0.0
+        self.sequence = 0
+        self.stats = {
+            'received': 0,
+            'rate_limited': 0,
+            'dropped_stale': 0,
+            'processed': 0
+        }
+
+    def to_dict(self):
+        return {
+            'stream_id': self.stream_id,
+            'session_id': self.session_id,
+            'participant_id': self.participant_id,
+            'max_fps': round(1.0 / self.min_interval, 2) if self.min_interval else None,
+            'reduce': self.reduce,
+            **self.stats
+        }
+
+
+class FrameStreamManager:
+    """
+    Kelola stream aktif. push_frame() dipanggil dari handler socket (cepat,
+    tanpa decode); worker per stream memanggil process(stream, data) untuk
+    frame terbaru lalu emit(stream, result, sequence, latency) hasilnya.
+    """
+
+    def __init__(self, process, emit, start_background_task, max_fps=STREAM_MAX_FPS,
+                 idle_timeout=STREAM_IDLE_TIMEOUT, fps_limit=None):
+        self.process = process
+        self.emit = emit
+        self.start_background_task = start_background_task
+        self.max_fps = max_fps
+        self.idle_timeout = idle_timeout
+        self.fps_limit = fps_limit    # callable() -> batas FPS dinamis (misalnya dari governor)
+        self._streams = {}
+        self._condition = threading.Condition()
+
+    def open(self, stream_id, session_id, participant_id, max_fps=None, reduce=1):
+        """Buka (atau buka ulang) stream dan jalankan worker-nya"""
+        fps = min(max_fps or self.max_fps, self.max_fps)
+        stream = FrameStream(stream_id, session_id, participant_id, fps, reduce)
+        with self._condition:
+            previous = self._streams.get(stream_id)
+            if previous:
+                previous.active = False
+            self._streams[stream_id] = stream
+            self._condition.notify_all()
+
+        self.start_background_task(self._run, stream)
+        return stream
+
+    def close(self, stream_id):
+        with self._condition:
+            stream = self._streams.pop(stream_id, None)
+            if stream:
+                stream.active = False
+            self._condition.notify_all()
+        return stream
+
+    def get(self, stream_id):
+        with self._condition:
+            return self._streams.get(stream_id)
+
+    def list_streams(self):
+        with self._condition:
+            return [stream.to_dict() for stream in self._streams.values()]
+
+    def count(self):
+        with self._condition:
+            return len(self._streams)
+
+    def push_frame(self, stream_id, data):
+        """
+        Simpan frame sebagai frame terbaru stream
+        Returns: 'accepted', 'rate_limited', 'too_large' atau 'no_stream'
+        """
+        if len(data) > STREAM_MAX_FRAME_SIZE:
+            return 'too_large'
+
+        now = time.time()
+        min_interval = 0.0
+        if self.fps_limit is not None:
+            fps = self.fps_limit()
+            min_interval = 1.0 / fps if fps else 0.0
+
+        with self._condition:
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                return 'no_stream'
+
+            stream.stats['received'] += 1
+            if now - stream.last_accepted_at < max(stream.min_interval, min_interval):
+                stream.stats['rate_limited'] += 1
+                return 'rate_limited'
+
+            # Frame yang belum sempat diproses digantikan frame baru
+            if stream.latest is not None:
+                stream.stats['dropped_stale'] += 1
+
+            stream.sequence += 1
+            stream.latest = (stream.sequence, data, now)
+            stream.last_accepted_at = now
+            self._condition.notify_all()
+            return 'accepted'
+
+    def _run(self, stream):
+        while True:
+            with self._condition:
+                deadline = time.time() + self.idle_timeout
+                while stream.active and stream.latest is None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                if not stream.active:
+                    return
+                if stream.latest is None:
+                    # Idle terlalu lama, tutup stream
+                    stream.active = False
+                    if self._streams.get(stream.stream_id) is stream:
+                        del self._streams[stream.stream_id]
+                    return
+
+                sequence, data, received_at = stream.latest
+                stream.latest = None
+
+            try:
+                result = self.process(stream, data)
+            except Exception as e:
+                result = {'error': str(e)}
+
+            with self._condition:
+                stream.stats['processed'] += 1
+
+            self.emit(stream, result, sequence, time.time() - received_at)
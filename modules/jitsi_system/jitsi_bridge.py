@@ -3,9 +3,11 @@ Jitsi Meet Bridge System
 Backend bridge untuk menghubungkan Jitsi Meet dengan Photo Detection System
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
 import base64
 import cv2
 import numpy as np
@@ -34,23 +36,85 @@ except ImportError:
             'ktp': {'x': 160, 'y': 350, 'w': 320, 'h': 180}
         }
 
+try:
+    from detection.main_detector import detect_face_and_ktp_regions
+except ImportError:
+    # Fallback jika detection engine tidak tersedia
+    def detect_face_and_ktp_regions(frame):
+        return {'face': None, 'ktp': None, 'face_detected': False,
+                'ktp_detected': False, 'both_detected': False}
+
+from frame_stream import FrameStreamManager
+from session_store import SessionStore, create_backend
+
+# Capture writer pool (tidak bergantung pada config kamera main app)
+from core.capture_writer import PendingWrites, encode_jpeg, get_capture_writer
+from core.zip_stream import stream_zip
+from core.retention import RetentionRoot, RetentionSweeper
+from core.storage_layout import capture_id_datetime, session_relpath
+from core.governor import get_governor
+from core.log import setup_logging
+from core.tracing import get_tracer, span, trace
+
+# Response mode process_capture: 'inline' (base64 di JSON) atau 'urls' (hanya download URL)
+RESPONSE_MODES = ('inline', 'urls')
+
+# Binary upload (/api/process_capture_binary)
+MAX_BINARY_UPLOAD_SIZE = 10 * 1024 * 1024
+BINARY_READ_CHUNK = 64 * 1024
+MAX_MULTIPART_FIELD_SIZE = 64 * 1024    # Field metadata multipart (bukan file)
+BINARY_IMAGE_MIMETYPES = ('image/jpeg', 'image/png', 'image/webp', 'application/octet-stream')
+BINARY_METADATA_HEADERS = ('X-Session-Id', 'X-Participant-Id', 'X-Capture-Mode',
+                           'X-Capture-Timestamp', 'X-Response-Mode', 'X-Reduce')
+# Decode JPEG langsung pada resolusi 1/N (libjpeg DCT scaling, lebih cepat dari resize)
+REDUCED_DECODE_FLAGS = {
+    '1': cv2.IMREAD_COLOR,
+    '2': cv2.IMREAD_REDUCED_COLOR_2,
+    '4': cv2.IMREAD_REDUCED_COLOR_4,
+    '8': cv2.IMREAD_REDUCED_COLOR_8
+}
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'jitsi_bridge_secret_key_2025'
 socketio = SocketIO(app, cors_allowed_origins="*", logger=True, engineio_logger=True)
 CORS(app)
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging (async via queue, level via LOG_LEVEL / LOG_MODULE_LEVELS)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Storage untuk active sessions
-active_sessions = {}
-capture_history = {}
+# Storage untuk active sessions dan capture history (terbatas, TTL + LRU)
+# JITSI_SESSION_STORE: 'memory' (default) atau 'sqlite:<path>' agar bertahan saat restart
+SESSION_STORE_BACKEND = os.environ.get('JITSI_SESSION_STORE', 'memory')
+session_store = SessionStore(create_backend(SESSION_STORE_BACKEND))
 
 # Create required directories
 CAPTURE_DIR = Path("static/jitsi_captures")
 CAPTURE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Retensi folder capture: dihapus bertahap oleh sweeper background
+CAPTURE_RETENTION_SECONDS = 24 * 60 * 60
+capture_retention = RetentionSweeper([
+    RetentionRoot('jitsi_captures', str(CAPTURE_DIR), CAPTURE_RETENTION_SECONDS, unit='directory')
+])
+capture_retention.start()
+
+# Write capture yang belum durable per capture_id; download hanya menunggu capture-nya sendiri
+capture_writes = PendingWrites(get_capture_writer())
+CAPTURE_DOWNLOAD_WAIT = 5.0     # Detik download menunggu write capture tersebut
+CAPTURE_RETRY_AFTER = 1         # Detik header Retry-After saat capture belum durable
+
+def capture_folder(capture_id):
+    """
+    Folder satu capture di layout YYYY/MM/DD/<shard>/<capture_id>, tanggal dari
+    timestamp di capture_id. Folder flat lama dipakai jika sudah ada.
+    """
+    legacy_folder = CAPTURE_DIR / capture_id
+    if legacy_folder.is_dir():
+        return legacy_folder
+    when = capture_id_datetime(capture_id) or datetime.now()
+    return CAPTURE_DIR / session_relpath(capture_id, when)
+
 @app.route('/')
 def index():
     """Main page dengan informasi bridge system"""
@@ -63,10 +127,13 @@ def index():
         <h3>Available Endpoints:</h3>
         <ul>
             <li><code>POST /api/process_capture</code> - Process capture dari Jitsi</li>
+            <li><code>POST /api/process_capture_binary</code> - Process capture dari upload JPEG/PNG biner</li>
             <li><code>POST /api/start_session</code> - Start capture session</li>
             <li><code>GET /api/session_status/&lt;session_id&gt;</code> - Check session status</li>
             <li><code>GET /api/download/&lt;filename&gt;</code> - Download captured files</li>
+            <li><code>GET /api/download_zip/&lt;capture_id&gt;</code> - Download ZIP satu capture (streaming)</li>
             <li><code>WebSocket /socket.io/</code> - Real-time communication</li>
+            <li><code>WebSocket /socket.io/ namespace /stream</code> - Live detection dari frame JPEG biner</li>
         </ul>
         <h3>Integration Guide:</h3>
         <p>Lihat <a href="/static/docs/JITSI_INTEGRATION_GUIDE.md">JITSI_INTEGRATION_GUIDE.md</a> untuk panduan lengkap.</p>
@@ -84,8 +151,11 @@ def process_capture():
         "participant_id": "user_456", 
         "image_data": "base64_encoded_image",
         "capture_mode": "auto|manual",
-        "timestamp": "2025-08-26T10:30:00Z"
+        "timestamp": "2025-08-26T10:30:00Z",
+        "response_mode": "inline|urls"  (opsional, default inline)
     }
+    response_mode 'urls' mengembalikan download URL saja tanpa base64 inline;
+    ZIP tidak dibuat saat capture tetapi di-stream on demand dari /api/download_zip
     """
     if request.method == 'OPTIONS':
         # Handle CORS preflight request
@@ -113,6 +183,13 @@ def process_capture():
         image_data = data['image_data']
         capture_mode = data.get('capture_mode', 'manual')
         timestamp = data.get('timestamp', datetime.now().isoformat())
+        response_mode = data.get('response_mode', request.args.get('response_mode', 'inline'))
+        
+        if response_mode not in RESPONSE_MODES:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid response_mode: {response_mode}'
+            }), 400
         
         # Decode base64 image
         try:
@@ -134,150 +211,323 @@ def process_capture():
                 'message': f'Invalid image data: {str(e)}'
             }), 400
         
-        # Process dengan detection engine
-        logger.info(f"Processing frame: {frame.shape}")
-        face_img, ktp_img = detect_face_and_ktp(frame)
-        
-        # Generate unique identifier
-        capture_id = f"{session_id}_{participant_id}_{int(datetime.now().timestamp())}"
-        
-        # Save capture results
-        results = save_capture_results(
-            capture_id, 
-            participant_id, 
-            face_img, 
-            ktp_img, 
-            timestamp,
-            capture_mode
+        response_data = process_decoded_frame(
+            session_id, participant_id, frame, capture_mode, timestamp, response_mode
         )
+        return jsonify(response_data)
         
-        # Store dalam history
-        capture_history[capture_id] = {
-            'session_id': session_id,
-            'participant_id': participant_id,
-            'timestamp': timestamp,
-            'mode': capture_mode,
-            'results': results,
-            'status': 'completed'
-        }
+    except Exception as e:
+        logger.error(f"Capture processing error: {e}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Processing failed: {str(e)}'
+        }), 500
+
+def process_decoded_frame(session_id, participant_id, frame, capture_mode, timestamp, response_mode):
+    """Jalankan detection, simpan hasil, catat history dan notify room; return response dict"""
+    # Process dengan detection engine
+    logger.info(f"Processing frame: {frame.shape}")
+    face_img, ktp_img = detect_face_and_ktp(frame)
+    
+    # Generate unique identifier
+    capture_id = f"{session_id}_{participant_id}_{int(datetime.now().timestamp())}"
+    
+    # Save capture results
+    results = save_capture_results(
+        capture_id, 
+        participant_id, 
+        face_img, 
+        ktp_img, 
+        timestamp,
+        capture_mode,
+        inline=response_mode == 'inline'
+    )
+    
+    # History dan notifikasi WebSocket tidak membawa base64 inline
+    results_without_inline = strip_inline_data(results)
+    
+    # Store dalam history
+    session_store.add_capture(capture_id, {
+        'session_id': session_id,
+        'participant_id': participant_id,
+        'timestamp': timestamp,
+        'mode': capture_mode,
+        'results': results_without_inline,
+        'status': 'completed'
+    })
+    
+    # Notify via WebSocket
+    socketio.emit('capture_completed', {
+        'session_id': session_id,
+        'participant_id': participant_id,
+        'capture_id': capture_id,
+        'results': results_without_inline
+    }, room=session_id)
+    
+    response_data = {
+        'status': 'success',
+        'capture_id': capture_id,
+        'session_id': session_id,
+        'participant_id': participant_id,
+        'timestamp': timestamp,
+        'mode': capture_mode,
+        'response_mode': response_mode,
+        **results
+    }
+    
+    logger.info(f"Capture processed successfully: {capture_id}")
+    return response_data
+
+@app.route('/api/process_capture_binary', methods=['POST', 'OPTIONS'])
+def process_capture_binary():
+    """
+    Endpoint capture dengan upload biner (tanpa base64)
+    Body: multipart/form-data (field 'image') atau raw image/jpeg / image/png
+    Metadata dari header atau query params (multipart juga boleh form fields):
+        X-Session-Id / session_id              (wajib)
+        X-Participant-Id / participant_id      (wajib)
+        X-Capture-Mode / capture_mode          (auto|manual, default manual)
+        X-Capture-Timestamp / timestamp
+        X-Response-Mode / response_mode        (inline|urls, default inline)
+        X-Reduce / reduce                      (1|2|4|8, decode pada resolusi 1/N)
+    """
+    if request.method == 'OPTIONS':
+        # Handle CORS preflight request
+        response = jsonify({'status': 'ok'})
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        response.headers.add('Access-Control-Allow-Headers', ', '.join(('Content-Type',) + BINARY_METADATA_HEADERS))
+        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        return response
+    
+    try:
+        if request.content_length is not None and request.content_length > MAX_BINARY_UPLOAD_SIZE:
+            return jsonify({'status': 'error', 'message': 'Image too large'}), 413
+        
+        # Multipart di-decode langsung dari stream (tanpa request.files / spool ke temp file);
+        # form fields ikut terbaca karena bisa berisi metadata
+        form = {}
+        buffer = None
+        if request.mimetype == 'multipart/form-data':
+            boundary = request.mimetype_params.get('boundary')
+            if not boundary:
+                return jsonify({'status': 'error', 'message': 'Missing multipart boundary'}), 400
+            buffer, form = read_multipart_image(request.stream, boundary.encode('latin-1'))
+            if buffer is None:
+                return jsonify({'status': 'error', 'message': "Missing file field: image"}), 400
+        elif request.mimetype not in BINARY_IMAGE_MIMETYPES:
+            return jsonify({
+                'status': 'error',
+                'message': f'Unsupported content type: {request.mimetype}'
+            }), 415
         
-        # Notify via WebSocket
-        socketio.emit('capture_completed', {
-            'session_id': session_id,
-            'participant_id': participant_id,
-            'capture_id': capture_id,
-            'results': results
-        }, room=session_id)
+        def metadata(name, header, default=None):
+            return request.headers.get(header) or request.args.get(name) or form.get(name) or default
         
-        response_data = {
-            'status': 'success',
-            'capture_id': capture_id,
-            'session_id': session_id,
-            'participant_id': participant_id,
-            'timestamp': timestamp,
-            'mode': capture_mode,
-            **results
-        }
+        session_id = metadata('session_id', 'X-Session-Id')
+        participant_id = metadata('participant_id', 'X-Participant-Id')
+        if not session_id or not participant_id:
+            return jsonify({
+                'status': 'error',
+                'message': 'Missing required metadata: session_id and participant_id'
+            }), 400
         
-        logger.info(f"Capture processed successfully: {capture_id}")
+        capture_mode = metadata('capture_mode', 'X-Capture-Mode', 'manual')
+        timestamp = metadata('timestamp', 'X-Capture-Timestamp', datetime.now().isoformat())
+        response_mode = metadata('response_mode', 'X-Response-Mode', 'inline')
+        reduce = metadata('reduce', 'X-Reduce', '1')
+        
+        if response_mode not in RESPONSE_MODES:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid response_mode: {response_mode}'
+            }), 400
+        if reduce not in REDUCED_DECODE_FLAGS:
+            return jsonify({
+                'status': 'error',
+                'message': f'Invalid reduce: {reduce} (allowed: {", ".join(REDUCED_DECODE_FLAGS)})'
+            }), 400
+        
+        # Body raw dibaca langsung dari stream ke buffer NumPy
+        if buffer is None:
+            buffer = read_stream_to_buffer(request.stream, request.content_length)
+        
+        frame = cv2.imdecode(buffer, REDUCED_DECODE_FLAGS[reduce]) if buffer.size else None
+        if frame is None:
+            logger.error("Binary image decoding error")
+            return jsonify({'status': 'error', 'message': 'Invalid image data'}), 400
+        
+        response_data = process_decoded_frame(
+            session_id, participant_id, frame, capture_mode, timestamp, response_mode
+        )
+        response_data['reduce'] = int(reduce)
         return jsonify(response_data)
         
+    except RequestEntityTooLarge:
+        return jsonify({'status': 'error', 'message': 'Image too large'}), 413
     except Exception as e:
-        logger.error(f"Capture processing error: {e}")
+        logger.error(f"Binary capture processing error: {e}")
         return jsonify({
             'status': 'error',
             'message': f'Processing failed: {str(e)}'
         }), 500
 
-def save_capture_results(capture_id, participant_id, face_img, ktp_img, timestamp, mode):
-    """Save capture results dan return download data"""
+def read_stream_to_buffer(stream, length=None):
+    """
+    Baca stream upload ke array uint8 tanpa salinan perantara.
+    Dengan Content-Length buffer dialokasikan sekali dan diisi via readinto.
+    Raise RequestEntityTooLarge jika melebihi MAX_BINARY_UPLOAD_SIZE.
+    """
+    if length:
+        if length > MAX_BINARY_UPLOAD_SIZE:
+            raise RequestEntityTooLarge()
+        buffer = np.empty(length, dtype=np.uint8)
+        view = memoryview(buffer)
+        received = 0
+        while received < length:
+            chunk = stream.read(min(BINARY_READ_CHUNK, length - received))
+            if not chunk:
+                break
+            view[received:received + len(chunk)] = chunk
+            received += len(chunk)
+        return buffer[:received]
+    
+    # Tanpa Content-Length (chunked): kumpulkan dengan batas ukuran
+    data = bytearray()
+    while True:
+        chunk = stream.read(BINARY_READ_CHUNK)
+        if not chunk:
+            break
+        data.extend(chunk)
+        if len(data) > MAX_BINARY_UPLOAD_SIZE:
+            raise RequestEntityTooLarge()
+    return np.frombuffer(data, dtype=np.uint8)
+
+def read_multipart_image(stream, boundary, field='image'):
+    """
+    Decode multipart/form-data langsung dari stream (werkzeug sansio decoder):
+    bytes part file `field` dikumpulkan ke memori dengan batas MAX_BINARY_UPLOAD_SIZE,
+    part file lain dibuang, form field (metadata, maks MAX_MULTIPART_FIELD_SIZE)
+    di-decode sebagai teks.
+    Returns: (array uint8 atau None jika field tidak ada, dict form fields)
+    """
+    # Batas ukuran dicek per part di sini; limit bawaan decoder berlaku untuk buffer internalnya
+    decoder = MultipartDecoder(boundary)
+    fields = {}
+    image = None
+    current = None      # (jenis part, nama, bytearray atau None jika dibuang)
+    
+    while True:
+        chunk = stream.read(BINARY_READ_CHUNK)
+        decoder.receive_data(chunk or None)     # None = akhir body
+        event = decoder.next_event()
+        while not isinstance(event, (NeedData, Epilogue)):
+            if isinstance(event, Field):
+                current = ('field', event.name, bytearray())
+            elif isinstance(event, File):
+                keep = event.name == field and image is None
+                current = ('file', event.name, bytearray() if keep else None)
+            elif isinstance(event, Data) and current is not None:
+                kind, name, data = current
+                if data is not None:
+                    data.extend(event.data)
+                    if len(data) > (MAX_BINARY_UPLOAD_SIZE if kind == 'file' else MAX_MULTIPART_FIELD_SIZE):
+                        raise RequestEntityTooLarge()
+                if not event.more_data:
+                    if kind == 'field':
+                        fields[name] = data.decode('utf-8', 'replace')
+                    elif data is not None:
+                        image = data
+                    current = None
+            event = decoder.next_event()
+        if isinstance(event, Epilogue) or not chunk:
+            break
+    
+    return (np.frombuffer(image, dtype=np.uint8) if image is not None else None), fields
+
+def strip_inline_data(results):
+    """Salinan results tanpa data base64 inline (face_image, ktp_image, zip_file)"""
+    return {k: v for k, v in results.items() if not k.endswith('_image') and k != 'zip_file'}
+
+def save_capture_results(capture_id, participant_id, face_img, ktp_img, timestamp, mode, inline=True):
+    """
+    Save capture results dan return download data
+    inline=False: tanpa base64 di response dan tanpa ZIP di disk,
+    ZIP di-stream on demand lewat /api/download_zip/<capture_id>
+    """
     results = {
         'face_detected': face_img is not None,
         'ktp_detected': ktp_img is not None,
         'files': []
     }
     
-    # Create session folder
-    session_folder = CAPTURE_DIR / capture_id
-    session_folder.mkdir(exist_ok=True)
+    # Session folder dibuat oleh capture writer saat file pertama ditulis
+    session_folder = capture_folder(capture_id)
+    capture_retention.track('jitsi_captures', str(session_folder))
+    file_timestamp = timestamp.replace(':', '-')
     
-    # Save face image
-    if face_img is not None:
-        face_filename = f"{participant_id}_face_{timestamp.replace(':', '-')}.jpg"
-        face_path = session_folder / face_filename
-        cv2.imwrite(str(face_path), face_img)
-        
-        # Convert ke base64 untuk immediate download
-        with open(face_path, 'rb') as f:
-            face_b64 = base64.b64encode(f.read()).decode()
-        
-        results['face_image'] = face_b64
-        results['face_filename'] = face_filename
-        results['face_download_url'] = f"/api/download/{capture_id}/{face_filename}"
+    # Encode sekali di memori: bytes yang sama dipakai untuk disk, base64 dan ZIP
+    encoded_files = []
+    for capture_type, image in (('face', face_img), ('ktp', ktp_img)):
+        if image is None:
+            continue
+        
+        filename = f"{participant_id}_{capture_type}_{file_timestamp}.jpg"
+        data = encode_jpeg(image)
+        capture_writes.submit(capture_id, str(session_folder / filename), data)
+        encoded_files.append((filename, data))
+        
+        if inline:
+            results[f'{capture_type}_image'] = base64.b64encode(data).decode()
+        results[f'{capture_type}_filename'] = filename
+        results[f'{capture_type}_download_url'] = f"/api/download/{capture_id}/{filename}"
         results['files'].append({
-            'type': 'face',
-            'filename': face_filename,
-            'size': face_path.stat().st_size,
-            'download_url': results['face_download_url']
+            'type': capture_type,
+            'filename': filename,
+            'size': len(data),
+            'download_url': results[f'{capture_type}_download_url']
         })
     
-    # Save KTP image
-    if ktp_img is not None:
-        ktp_filename = f"{participant_id}_ktp_{timestamp.replace(':', '-')}.jpg"
-        ktp_path = session_folder / ktp_filename
-        cv2.imwrite(str(ktp_path), ktp_img)
-        
-        # Convert ke base64 untuk immediate download
-        with open(ktp_path, 'rb') as f:
-            ktp_b64 = base64.b64encode(f.read()).decode()
-        
-        results['ktp_image'] = ktp_b64
-        results['ktp_filename'] = ktp_filename
-        results['ktp_download_url'] = f"/api/download/{capture_id}/{ktp_filename}"
+    # Mode URL: ZIP dibuat on demand saat di-download
+    if encoded_files and not inline:
+        results['zip_download_url'] = f"/api/download_zip/{capture_id}"
         results['files'].append({
-            'type': 'ktp',
-            'filename': ktp_filename,
-            'size': ktp_path.stat().st_size,
-            'download_url': results['ktp_download_url']
+            'type': 'zip',
+            'filename': f"{participant_id}_capture_{file_timestamp}.zip",
+            'download_url': results['zip_download_url']
         })
     
     # Create ZIP file jika ada file yang berhasil disimpan
-    if results['files']:
-        zip_filename = f"{participant_id}_capture_{timestamp.replace(':', '-')}.zip"
-        zip_path = session_folder / zip_filename
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_info in results['files']:
-                file_path = session_folder / file_info['filename']
-                zipf.write(file_path, file_info['filename'])
-        
-        # Convert ZIP ke base64
-        with open(zip_path, 'rb') as f:
-            zip_b64 = base64.b64encode(f.read()).decode()
-        
-        results['zip_file'] = zip_b64
+    if encoded_files and inline:
+        zip_filename = f"{participant_id}_capture_{file_timestamp}.zip"
+        
+        # JPEG sudah terkompresi, simpan apa adanya (ZIP_STORED)
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_STORED) as zipf:
+            for filename, data in encoded_files:
+                zipf.writestr(filename, data)
+        zip_data = zip_buffer.getvalue()
+        capture_writes.submit(capture_id, str(session_folder / zip_filename), zip_data)
+        
+        results['zip_file'] = base64.b64encode(zip_data).decode()
         results['zip_filename'] = zip_filename
         results['zip_download_url'] = f"/api/download/{capture_id}/{zip_filename}"
         results['files'].append({
             'type': 'zip',
             'filename': zip_filename,
-            'size': zip_path.stat().st_size,
+            'size': len(zip_data),
             'download_url': results['zip_download_url']
         })
     
     # Save metadata
-    metadata_path = session_folder / 'metadata.json'
     metadata = {
         'capture_id': capture_id,
         'participant_id': participant_id,
         'timestamp': timestamp,
         'mode': mode,
-        'results': {k: v for k, v in results.items() if not k.endswith('_image')},  # Exclude base64 data
+        'results': strip_inline_data(results),  # Exclude base64 data
         'coordinates': get_guide_coordinates()
     }
-    
-    with open(metadata_path, 'w') as f:
-        json.dump(metadata, f, indent=2)
+    capture_writes.submit(capture_id, str(session_folder / 'metadata.json'), json.dumps(metadata, indent=2).encode())
     
     return results
 
@@ -293,13 +543,13 @@ def start_session():
         if not session_id:
             return jsonify({'status': 'error', 'message': 'session_id required'}), 400
         
-        active_sessions[session_id] = {
+        session_store.put_session(session_id, {
             'participants': participants,
             'cs_user': cs_user,
             'status': 'active',
             'created_at': datetime.now().isoformat(),
             'captures': []
-        }
+        })
         
         logger.info(f"Started session: {session_id} with {len(participants)} participants")
         
@@ -316,15 +566,10 @@ def start_session():
 @app.route('/api/session_status/<session_id>')
 def session_status(session_id):
     """Get session status dan capture history"""
-    if session_id in active_sessions:
-        session_data = active_sessions[session_id].copy()
-        
-        # Add capture history untuk session ini
-        session_captures = [
-            capture for capture_id, capture in capture_history.items()
-            if capture['session_id'] == session_id
-        ]
-        session_data['capture_history'] = session_captures
+    session_data = session_store.get_session(session_id)
+    if session_data is not None:
+        # Add capture history untuk session ini (lewat indeks per session)
+        session_data['capture_history'] = session_store.captures_for_session(session_id)
         
         return jsonify({
             'status': 'success',
@@ -336,6 +581,12 @@ def session_status(session_id):
             'message': 'Session not found'
         }), 404
 
+def capture_not_ready():
+    """503 + Retry-After: file capture masih ditulis, jangan kirim file setengah jadi"""
+    response = jsonify({'error': 'Capture is still being written, retry shortly'})
+    response.headers['Retry-After'] = str(CAPTURE_RETRY_AFTER)
+    return response, 503
+
 @app.route('/api/download/<path:filepath>')
 def download_file(filepath):
     """Download captured files"""
@@ -344,7 +595,13 @@ def download_file(filepath):
         if '..' in filepath or filepath.startswith('/'):
             return jsonify({'error': 'Invalid filepath'}), 400
         
-        file_path = CAPTURE_DIR / filepath
+        # URL tetap <capture_id>/<filename>, lokasi folder di-resolve ke layout
+        capture_id, _, filename = filepath.partition('/')
+        
+        # URL dikembalikan sebelum file ditulis: tunggu write capture ini saja
+        if not capture_writes.wait(capture_id, CAPTURE_DOWNLOAD_WAIT):
+            return capture_not_ready()
+        file_path = capture_folder(capture_id) / filename if filename else CAPTURE_DIR / filepath
         
         if file_path.exists() and file_path.is_file():
             return send_file(str(file_path), as_attachment=True)
@@ -355,6 +612,33 @@ def download_file(filepath):
         logger.error(f"Download error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/download_zip/<capture_id>')
+def download_capture_zip(capture_id):
+    """Stream ZIP berisi semua gambar satu capture, dibuat on demand"""
+    if '..' in capture_id or '/' in capture_id:
+        return jsonify({'error': 'Invalid capture_id'}), 400
+    
+    # Pastikan file capture ini yang masih di antrian writer sudah tertulis;
+    # folder baru dibuat writer saat file pertama ditulis
+    if not capture_writes.wait(capture_id, CAPTURE_DOWNLOAD_WAIT):
+        return capture_not_ready()
+    
+    session_folder = capture_folder(capture_id)
+    if not session_folder.is_dir():
+        return jsonify({'error': 'Capture not found'}), 404
+    
+    image_files = sorted(session_folder.glob('*.jpg'))
+    if not image_files:
+        return jsonify({'error': 'No files found for this capture'}), 404
+    
+    participant_id = (session_store.get_capture(capture_id) or {}).get('participant_id', capture_id)
+    response = Response(
+        stream_zip((str(path), path.name) for path in image_files),
+        mimetype='application/zip'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename={participant_id}_capture_{capture_id}.zip'
+    return response
+
 # WebSocket Event Handlers
 @socketio.on('connect')
 def handle_connect():
@@ -389,8 +673,9 @@ def handle_join_session(data):
         }, room=session_id)
         
         # Send session info ke new participant
-        if session_id in active_sessions:
-            emit('session_info', active_sessions[session_id])
+        session_data = session_store.get_session(session_id)
+        if session_data is not None:
+            emit('session_info', session_data)
 
 @socketio.on('leave_session')
 def handle_leave_session(data):
@@ -438,53 +723,149 @@ def handle_overlay_update(data):
             'overlay_data': overlay_data
         }, room=session_id)
 
+# Live detection streaming (namespace /stream)
+# Client: emit('start_stream', {session_id, participant_id, max_fps?, reduce?}),
+# lalu emit('frame', <bytes JPEG>) berulang; server emit('detection_result', ...)
+# untuk frame terbaru saja, frame basi dibuang.
+STREAM_NAMESPACE = '/stream'
+
+def process_stream_frame(stream, data):
+    """Decode frame JPEG stream dan jalankan detection (tanpa crop/simpan)"""
+    with trace(f"stream-{stream.stream_id}-{stream.sequence}", stage='stream_frame'):
+        with span('jpeg_decode'):
+            buffer = np.frombuffer(data, dtype=np.uint8)
+            frame = cv2.imdecode(buffer, REDUCED_DECODE_FLAGS[str(stream.reduce)])
+        if frame is None:
+            return {'error': 'Invalid image data'}
+        
+        result = detect_face_and_ktp_regions(frame)
+    
+    # Koordinat dikembalikan dalam resolusi frame asli
+    if stream.reduce != 1:
+        for key in ('face', 'ktp'):
+            if result.get(key):
+                result[key]['bbox'] = [value * stream.reduce for value in result[key]['bbox']]
+    
+    height, width = frame.shape[:2]
+    result['frame_size'] = [width * stream.reduce, height * stream.reduce]
+    return result
+
+def emit_stream_result(stream, result, sequence, latency):
+    governor.report('queue_lag', latency)
+    socketio.emit('detection_result', {
+        'session_id': stream.session_id,
+        'participant_id': stream.participant_id,
+        'sequence': sequence,
+        'latency_ms': round(latency * 1000, 1),
+        'dropped_stale': stream.stats['dropped_stale'],
+        **result
+    }, room=stream.stream_id, namespace=STREAM_NAMESPACE)
+
+# Governor menurunkan FPS stream, scale template dan validator saat beban tinggi
+governor = get_governor()
+
+frame_streams = FrameStreamManager(
+    process_stream_frame,
+    emit_stream_result,
+    socketio.start_background_task,
+    fps_limit=lambda: governor.current_profile()['stream_fps']
+)
+governor.register_session_source(frame_streams.count)
+
+@socketio.on('start_stream', namespace=STREAM_NAMESPACE)
+def handle_start_stream(data):
+    """Mulai stream live detection untuk client ini"""
+    session_id = data.get('session_id')
+    participant_id = data.get('participant_id')
+    reduce = str(data.get('reduce', 1))
+    
+    if not session_id or not participant_id:
+        emit('stream_error', {'message': 'session_id and participant_id required'})
+        return
+    if reduce not in REDUCED_DECODE_FLAGS:
+        emit('stream_error', {'message': f'Invalid reduce: {reduce}'})
+        return
+    
+    stream = frame_streams.open(
+        request.sid,
+        session_id,
+        participant_id,
+        max_fps=data.get('max_fps'),
+        reduce=int(reduce)
+    )
+    logger.info(f"Stream started for {participant_id} in session {session_id}")
+    emit('stream_started', stream.to_dict())
+
+@socketio.on('frame', namespace=STREAM_NAMESPACE)
+def handle_stream_frame(data):
+    """Terima frame JPEG biner; hanya disimpan sebagai frame terbaru"""
+    if not isinstance(data, (bytes, bytearray)):
+        emit('stream_error', {'message': 'Frame must be binary JPEG data'})
+        return
+    
+    status = frame_streams.push_frame(request.sid, data)
+    if status == 'no_stream':
+        emit('stream_error', {'message': 'Stream not started'})
+    elif status == 'too_large':
+        emit('stream_error', {'message': 'Frame too large'})
+
+@socketio.on('stop_stream', namespace=STREAM_NAMESPACE)
+def handle_stop_stream(data=None):
+    stream = frame_streams.close(request.sid)
+    if stream:
+        emit('stream_stopped', stream.to_dict())
+
+@socketio.on('disconnect', namespace=STREAM_NAMESPACE)
+def handle_stream_disconnect():
+    frame_streams.close(request.sid)
+
+@app.route('/api/streams')
+def list_streams():
+    """Stream live detection yang aktif beserta counter frame"""
+    return jsonify({'status': 'success', 'streams': frame_streams.list_streams()})
+
+@app.route('/metrics')
+def metrics():
+    """Latency per stage pipeline deteksi dalam format Prometheus"""
+    return get_tracer().render_prometheus(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 @app.route('/api/health')
 def health_check():
     """Health check endpoint"""
+    store_stats = session_store.get_stats()
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'active_sessions': len(active_sessions),
-        'total_captures': len(capture_history),
+        'active_sessions': store_stats['sessions'],
+        'total_captures': store_stats['captures'],
+        'session_store': store_stats,
+        'retention': capture_retention.get_stats(),
+        'governor': governor.get_stats(),
         'version': '1.0.0'
     })
 
 @app.route('/api/cleanup', methods=['POST'])
 def cleanup_old_files():
-    """Cleanup old capture files (admin endpoint)"""
+    """
+    Cleanup old capture files (admin endpoint)
+    Penghapusan folder berjalan di sweeper background; endpoint ini hanya
+    memicu sweep dan membersihkan history di memori
+    """
     try:
         # Clean files older than 24 hours
-        cutoff_time = datetime.now().timestamp() - (24 * 60 * 60)
-        cleaned_count = 0
-        
-        for capture_dir in CAPTURE_DIR.iterdir():
-            if capture_dir.is_dir():
-                try:
-                    # Parse timestamp dari directory name
-                    dir_timestamp = capture_dir.stat().st_ctime
-                    if dir_timestamp < cutoff_time:
-                        # Remove directory dan contents
-                        import shutil
-                        shutil.rmtree(capture_dir)
-                        cleaned_count += 1
-                except Exception as e:
-                    logger.warning(f"Failed to clean {capture_dir}: {e}")
+        cutoff_time = datetime.now().timestamp() - CAPTURE_RETENTION_SECONDS
+        capture_retention.trigger()
         
         # Clean memory storage
-        old_captures = [
-            capture_id for capture_id, capture in capture_history.items()
-            if datetime.fromisoformat(capture['timestamp']).timestamp() < cutoff_time
-        ]
-        
-        for capture_id in old_captures:
-            del capture_history[capture_id]
+        cleaned_entries = session_store.remove_captures_older_than(cutoff_time)
         
+        retention_stats = capture_retention.get_stats()['jitsi_captures']
         return jsonify({
-            'status': 'success',
-            'cleaned_directories': cleaned_count,
-            'cleaned_memory_entries': len(old_captures),
-            'message': f'Cleaned {cleaned_count} old capture directories'
-        })
+            'status': 'accepted',
+            'cleaned_memory_entries': cleaned_entries,
+            'retention': retention_stats,
+            'message': f"Cleanup scheduled, {retention_stats['backlog']} capture directories pending"
+        }), 202
         
     except Exception as e:
         logger.error(f"Cleanup error: {e}")
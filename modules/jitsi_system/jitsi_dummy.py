@@ -18,6 +18,25 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'dummy_jitsi_secret'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+# Dedup retake: capture disimpan sebagai hardlink ke blob content-addressed (opsional)
+CAPTURE_DEDUP_ENABLED = False
+blob_store = None
+if CAPTURE_DEDUP_ENABLED:
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'main_detection'))
+    from core.blob_store import BlobStore
+    blob_store = BlobStore(os.path.join(app.static_folder, 'capture_blobs'))
+
+def save_capture_image(path, image, group):
+    """Tulis file capture; lewat blob store (dedup per nasabah dan jenis) jika aktif"""
+    if blob_store is None:
+        cv2.imwrite(path, image)
+        return
+    success, buffer = cv2.imencode('.jpg', image)
+    if not success:
+        raise ValueError("Failed to encode image")
+    blob_store.store(buffer.tobytes(), path, image=image, group=group)
+
 # Storage untuk participants
 participants = {}
 rooms = {}
@@ -284,7 +303,7 @@ def process_manual_ktp_capture(cs_id, nasabah_id, mode, image_data=None):
         cv2.putText(full_img, 'Mode: Manual (app.py logic)', (10, h-10), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
         
         full_path = os.path.join(capture_dir, full_file)
-        cv2.imwrite(full_path, full_img)
+        save_capture_image(full_path, full_img, f"{nasabah_id}:full")
         
         # Crop face area from actual frame (same as app.py)
         x1_face = max(0, min(face_x, w))
@@ -305,7 +324,7 @@ def process_manual_ktp_capture(cs_id, nasabah_id, mode, image_data=None):
             print("Face crop failed, using fallback")
         
         face_path = os.path.join(capture_dir, face_file)
-        cv2.imwrite(face_path, face_crop)
+        save_capture_image(face_path, face_crop, f"{nasabah_id}:face")
         
         # Crop KTP area from actual frame (same as app.py)
         x1_ktp = max(0, min(ktp_x, w))
@@ -326,7 +345,7 @@ def process_manual_ktp_capture(cs_id, nasabah_id, mode, image_data=None):
             print("KTP crop failed, using fallback")
         
         ktp_path = os.path.join(capture_dir, ktp_file)
-        cv2.imwrite(ktp_path, ktp_crop)
+        save_capture_image(ktp_path, ktp_crop, f"{nasabah_id}:ktp")
         
         capture_files = [
             f"Face: {face_file}",
@@ -402,7 +421,7 @@ def process_ktp_capture(frame, cs_id, nasabah_id):
             if face_crop.size > 0:
                 face_resized = cv2.resize(face_crop, (300, 300))
                 face_path = f'static/captures/cs_{cs_id}_nasabah_{nasabah_id}_face_{timestamp}.jpg'
-                cv2.imwrite(face_path, face_resized)
+                save_capture_image(face_path, face_resized, f"{nasabah_id}:face")
                 saved_files.append(f"Face: {face_path}")
         
         # KTP crop
@@ -413,12 +432,12 @@ def process_ktp_capture(frame, cs_id, nasabah_id):
             if ktp_crop.size > 0:
                 ktp_resized = cv2.resize(ktp_crop, (480, 300))
                 ktp_path = f'static/captures/cs_{cs_id}_nasabah_{nasabah_id}_ktp_{timestamp}.jpg'
-                cv2.imwrite(ktp_path, ktp_resized)
+                save_capture_image(ktp_path, ktp_resized, f"{nasabah_id}:ktp")
                 saved_files.append(f"KTP: {ktp_path}")
         
         # Save full image for reference
         full_path = f'static/captures/cs_{cs_id}_nasabah_{nasabah_id}_full_{timestamp}.jpg'
-        cv2.imwrite(full_path, frame)
+        save_capture_image(full_path, frame, f"{nasabah_id}:full")
         saved_files.append(f"Full: {full_path}")
         
         return {
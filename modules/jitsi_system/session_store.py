@@ -0,0 +1,266 @@
+"""
+Session Store
+Penyimpanan session dan capture history Jitsi bridge yang terbatas:
+- indeks capture per session (status lookup O(capture dalam session))
+- eviction TTL dan LRU untuk session maupun capture
+- backend SQLite opsional agar history bertahan saat restart; tanpa backend
+  store hanya hidup di memori proses
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Store limits
+SESSION_STORE_MAX_SESSIONS = 1000
+SESSION_STORE_MAX_CAPTURES = 10000
+SESSION_STORE_SESSION_TTL = 24 * 60 * 60   # Detik sejak session terakhir diakses
+SESSION_STORE_CAPTURE_TTL = 24 * 60 * 60   # Detik sejak capture disimpan
+
+
+class SQLiteBackend:
+    """Backend SQLite lokal, data session/capture disimpan sebagai JSON"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        touched_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS captures (
+        capture_id TEXT PRIMARY KEY,
+        session_id TEXT NOT NULL,
+        data TEXT NOT NULL,
+        stored_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_captures_session ON captures(session_id);
+    """
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(self.SCHEMA)
+
+    def save_session(self, session_id, data, touched_at):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)',
+                               (session_id, json.dumps(data), touched_at))
+
+    def save_capture(self, capture_id, session_id, data, stored_at):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO captures VALUES (?, ?, ?, ?)',
+                               (capture_id, session_id, json.dumps(data), stored_at))
+
+    def delete_sessions(self, session_ids):
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM sessions WHERE session_id = ?',
+                                   [(session_id,) for session_id in session_ids])
+
+    def delete_captures(self, capture_ids):
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM captures WHERE capture_id = ?',
+                                   [(capture_id,) for capture_id in capture_ids])
+
+    def load(self):
+        """Returns: (sessions, captures) terurut dari yang paling lama"""
+        with self._lock:
+            sessions = [(session_id, json.loads(data), touched_at) for session_id, data, touched_at in
+                        self._conn.execute('SELECT * FROM sessions ORDER BY touched_at')]
+            captures = [(capture_id, session_id, json.loads(data), stored_at)
+                        for capture_id, session_id, data, stored_at in
+                        self._conn.execute('SELECT * FROM captures ORDER BY stored_at')]
+        return sessions, captures
+
+
+def create_backend(spec):
+    """
+    Buat backend dari string konfigurasi:
+    'memory' (tanpa backend, in-process saja) atau 'sqlite:<path>'
+    """
+    if not spec or spec == 'memory':
+        return None
+    if spec.startswith('sqlite:'):
+        return SQLiteBackend(spec[len('sqlite:'):])
+    raise ValueError(f"Unknown session store backend: {spec}")
+
+
+class SessionStore:
+    """
+    Session dan capture history dengan indeks per session.
+    OrderedDict dijaga terurut dari yang paling lama diakses/disimpan, sehingga
+    eviction TTL dan LRU cukup mengambil dari depan.
+    """
+
+    def __init__(self, backend=None, max_sessions=SESSION_STORE_MAX_SESSIONS,
+                 max_captures=SESSION_STORE_MAX_CAPTURES, session_ttl=SESSION_STORE_SESSION_TTL,
+                 capture_ttl=SESSION_STORE_CAPTURE_TTL):
+        self.backend = backend
+        self.max_sessions = max_sessions
+        self.max_captures = max_captures
+        self.session_ttl = session_ttl
+        self.capture_ttl = capture_ttl
+
+        self._lock = threading.RLock()
+        self._sessions = OrderedDict()      # session_id -> (data, touched_at)
+        self._captures = OrderedDict()      # capture_id -> (session_id, data, stored_at)
+        self._session_index = {}            # session_id -> {capture_id: None} (urutan insert)
+        self._evicted = {'sessions_ttl': 0, 'sessions_lru': 0, 'captures_ttl': 0, 'captures_lru': 0}
+
+        self._load()
+
+    def _load(self):
+        if self.backend is None:
+            return
+        sessions, captures = self.backend.load()
+        with self._lock:
+            for session_id, data, touched_at in sessions:
+                self._sessions[session_id] = (data, touched_at)
+            for capture_id, session_id, data, stored_at in captures:
+                self._captures[capture_id] = (session_id, data, stored_at)
+                self._session_index.setdefault(session_id, {})[capture_id] = None
+            self._evict()
+
+    # Sessions
+
+    def put_session(self, session_id, data):
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = (dict(data), now)
+            self._sessions.move_to_end(session_id)
+            if self.backend:
+                self.backend.save_session(session_id, data, now)
+            self._evict()
+
+    def get_session(self, session_id):
+        """Ambil copy data session (menandai session sebagai baru diakses) atau None"""
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            data, touched_at = entry
+            if now - touched_at > self.session_ttl:
+                self._remove_sessions([session_id], 'sessions_ttl')
+                return None
+            self._sessions[session_id] = (data, now)
+            self._sessions.move_to_end(session_id)
+            return dict(data)
+
+    def has_session(self, session_id):
+        return self.get_session(session_id) is not None
+
+    # Captures
+
+    def add_capture(self, capture_id, capture):
+        """Simpan capture; session_id diambil dari capture['session_id']"""
+        session_id = capture['session_id']
+        now = time.time()
+        with self._lock:
+            self._captures[capture_id] = (session_id, dict(capture), now)
+            self._captures.move_to_end(capture_id)
+            self._session_index.setdefault(session_id, {})[capture_id] = None
+            if self.backend:
+                self.backend.save_capture(capture_id, session_id, capture, now)
+            self._evict()
+
+    def get_capture(self, capture_id):
+        with self._lock:
+            entry = self._captures.get(capture_id)
+            return dict(entry[1]) if entry else None
+
+    def captures_for_session(self, session_id):
+        """Capture satu session dalam urutan disimpan, O(capture dalam session)"""
+        with self._lock:
+            capture_ids = self._session_index.get(session_id, {})
+            return [dict(self._captures[capture_id][1]) for capture_id in capture_ids]
+
+    def remove_captures_older_than(self, cutoff_timestamp):
+        """Hapus capture yang disimpan sebelum cutoff, return jumlah yang dihapus"""
+        with self._lock:
+            expired = []
+            for capture_id, (_, _, stored_at) in self._captures.items():
+                if stored_at >= cutoff_timestamp:
+                    break
+                expired.append(capture_id)
+            self._remove_captures(expired)
+            return len(expired)
+
+    # Eviction
+
+    def _evict(self):
+        now = time.time()
+
+        expired = []
+        for session_id, (_, touched_at) in self._sessions.items():
+            if now - touched_at <= self.session_ttl:
+                break
+            expired.append(session_id)
+        self._remove_sessions(expired, 'sessions_ttl')
+
+        overflow = len(self._sessions) - self.max_sessions
+        if overflow > 0:
+            self._remove_sessions(list(self._sessions)[:overflow], 'sessions_lru')
+
+        expired = []
+        for capture_id, (_, _, stored_at) in self._captures.items():
+            if now - stored_at <= self.capture_ttl:
+                break
+            expired.append(capture_id)
+        self._remove_captures(expired, 'captures_ttl')
+
+        overflow = len(self._captures) - self.max_captures
+        if overflow > 0:
+            self._remove_captures(list(self._captures)[:overflow], 'captures_lru')
+
+    def _remove_sessions(self, session_ids, reason=None):
+        if not session_ids:
+            return
+        capture_ids = []
+        for session_id in session_ids:
+            self._sessions.pop(session_id, None)
+            capture_ids.extend(self._session_index.get(session_id, {}))
+        if self.backend:
+            self.backend.delete_sessions(session_ids)
+        # Capture ikut dihapus bersama session-nya
+        self._remove_captures(capture_ids)
+        if reason:
+            self._evicted[reason] += len(session_ids)
+
+    def _remove_captures(self, capture_ids, reason=None):
+        if not capture_ids:
+            return
+        for capture_id in capture_ids:
+            entry = self._captures.pop(capture_id, None)
+            if entry is None:
+                continue
+            index = self._session_index.get(entry[0])
+            if index is not None:
+                index.pop(capture_id, None)
+                if not index:
+                    del self._session_index[entry[0]]
+        if self.backend:
+            self.backend.delete_captures(capture_ids)
+        if reason:
+            self._evicted[reason] += len(capture_ids)
+
+    def get_stats(self):
+        """Ukuran store dan jumlah eviction"""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'captures': len(self._captures),
+                'indexed_sessions': len(self._session_index),
+                'max_sessions': self.max_sessions,
+                'max_captures': self.max_captures,
+                'backend': type(self.backend).__name__ if self.backend else 'memory',
+                'evicted': dict(self._evicted)
+            }
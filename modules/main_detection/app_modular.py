@@ -3,9 +3,11 @@ Photo Detection System - Main Application
 Modular Flask application for KTP and face detection
 """
 from flask import Flask
+from core.log import setup_logging
 
 # Import konfigurasi dan inisialisasi
 from core.config import load_ktp_template
+from core.capture_store import start_retention_sweeper
 
 # Import routes
 from routes.main_routes import init_main_routes
@@ -15,6 +17,9 @@ def create_app():
     """Application factory"""
     app = Flask(__name__)
     
+    # Logging async: level via LOG_LEVEL / LOG_MODULE_LEVELS (detail deteksi di DEBUG)
+    setup_logging()
+    
     # Load KTP template saat startup
     load_ktp_template()
     
@@ -22,6 +27,9 @@ def create_app():
     init_main_routes(app)
     init_capture_routes(app)
     
+    # Hapus capture lama secara bertahap di background
+    start_retention_sweeper()
+    
     return app
 
 # Create application instance
@@ -0,0 +1,242 @@
+"""
+Content-addressed capture blob store (opsional)
+Bytes JPEG disimpan sekali per hash sha256 di <root>/<ab>/<sha256>.jpg, lalu
+file capture dengan nama biasa dibuat sebagai hardlink ke blob tersebut.
+Retake yang hampir identik (dHash dalam jarak Hamming kecil, jenis capture
+sama, dalam beberapa detik) memakai blob sebelumnya tanpa menulis ulang.
+
+Karena file capture adalah hardlink, katalog, URL, ZIP dan retensi tetap
+bekerja dengan path biasa; blob dengan link count 1 berarti tidak direferensikan
+lagi dan dihapus oleh GC:
+    python -m core.blob_store gc <blob root> [grace_seconds]
+"""
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+import cv2
+
+# Dedup settings
+NEAR_DUPLICATE_WINDOW = 10      # Detik retake dianggap kandidat near-duplicate
+NEAR_DUPLICATE_MAX_DISTANCE = 4  # Jarak Hamming dHash 64-bit maksimal
+NEAR_DUPLICATE_HISTORY = 32     # Blob terbaru yang diingat per jenis capture
+BLOB_GC_GRACE = 3600            # Detik sebelum blob tanpa referensi boleh dihapus
+
+
+def dhash(image, hash_size=8):
+    """Difference hash 64-bit: gradien horizontal gambar grayscale 9x8"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    resized = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (resized[:, 1:] > resized[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class BlobStore:
+    """
+    store() memilih blob (near-duplicate, exact, atau baru), menulis blob baru
+    lewat writer (CaptureWriter) bila ada, lalu membuat hardlink target setelah
+    blob durable. on_durable(target_path, error) dipanggil setelahnya.
+    """
+
+    def __init__(self, root, writer=None, window=NEAR_DUPLICATE_WINDOW,
+                 max_distance=NEAR_DUPLICATE_MAX_DISTANCE):
+        self.root = root
+        self.writer = writer
+        self.window = window
+        self.max_distance = max_distance
+
+        self._lock = threading.Lock()
+        self._recent = {}       # group -> deque((stored_at, hash, blob_path, size))
+        self._pending = {}      # blob_path -> [callback(error)] menunggu blob durable
+        self._stats = {
+            'new_blobs': 0,
+            'exact_duplicates': 0,
+            'near_duplicates': 0,
+            'bytes_written': 0,
+            'bytes_saved': 0,
+            'gc_removed': 0,
+            'gc_bytes_reclaimed': 0
+        }
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.jpg")
+
+    def store(self, data, target_path, on_durable=None, image=None, group=None):
+        """
+        Simpan bytes JPEG sebagai target_path lewat blob store
+        image + group: aktifkan deteksi near-duplicate untuk jenis capture tersebut
+        Returns: dict status ('new', 'exact', 'near'), blob, size (ukuran blob yang dipakai)
+        """
+        now = time.time()
+        image_hash = dhash(image) if image is not None and group else None
+
+        with self._lock:
+            blob = None
+            size = len(data)
+            status = 'new'
+
+            if image_hash is not None:
+                for stored_at, other_hash, other_blob, other_size in reversed(self._recent.get(group, ())):
+                    if now - stored_at > self.window:
+                        break
+                    if hamming_distance(image_hash, other_hash) <= self.max_distance:
+                        blob, size, status = other_blob, other_size, 'near'
+                        break
+
+            if blob is None:
+                blob = self.blob_path(hashlib.sha256(data).hexdigest())
+                if blob in self._pending or os.path.exists(blob):
+                    status = 'exact'
+
+            if image_hash is not None:
+                recent = self._recent.setdefault(group, deque(maxlen=NEAR_DUPLICATE_HISTORY))
+                recent.append((now, image_hash, blob, size))
+
+            if status == 'new':
+                self._stats['new_blobs'] += 1
+                self._stats['bytes_written'] += size
+            else:
+                self._stats['exact_duplicates' if status == 'exact' else 'near_duplicates'] += 1
+                self._stats['bytes_saved'] += len(data)
+
+            def finish(error):
+                if error is None:
+                    try:
+                        _link(blob, target_path)
+                    except OSError as e:
+                        error = e
+                if on_durable:
+                    on_durable(target_path, error)
+
+            link_error = None
+            run_now = False
+            if status == 'new':
+                self._pending[blob] = [finish]
+            elif blob in self._pending:
+                self._pending[blob].append(finish)
+            else:
+                # Blob sudah di disk: link di dalam lock agar tidak balapan dengan gc()
+                run_now = True
+                try:
+                    _link(blob, target_path)
+                except OSError as e:
+                    link_error = e
+
+        if run_now:
+            if on_durable:
+                on_durable(target_path, link_error)
+        elif status == 'new':
+            if self.writer is not None:
+                try:
+                    self.writer.submit(blob, data, self._blob_durable)
+                except Exception as e:
+                    # Antrian writer penuh: blob tidak pernah ditulis. Kembalikan stats;
+                    # pemanggil ini menerima exception (bukan on_durable), waiter lain
+                    # (exact duplicate) dan entry near-duplicate dibatalkan lewat _blob_durable
+                    with self._lock:
+                        self._stats['new_blobs'] -= 1
+                        self._stats['bytes_written'] -= size
+                        waiters = self._pending.get(blob, [])
+                        if finish in waiters:
+                            waiters.remove(finish)
+                    self._blob_durable(blob, e)
+                    raise
+            else:
+                self._write_blob(blob, data)
+
+        return {'status': status, 'blob': blob, 'size': size}
+
+    def _write_blob(self, blob, data):
+        error = None
+        try:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            temp_path = f"{blob}.tmp"
+            with open(temp_path, 'wb') as handle:
+                handle.write(data)
+            os.replace(temp_path, blob)
+        except OSError as e:
+            error = e
+        self._blob_durable(blob, error)
+
+    def _blob_durable(self, blob, error):
+        with self._lock:
+            callbacks = self._pending.pop(blob, [])
+            if error is not None:
+                # Blob gagal ditulis: jangan dipakai sebagai near-duplicate
+                for recent in self._recent.values():
+                    for item in [item for item in recent if item[2] == blob]:
+                        recent.remove(item)
+        for callback in callbacks:
+            callback(error)
+
+    def gc(self, grace=BLOB_GC_GRACE):
+        """
+        Hapus blob yang tidak lagi direferensikan (link count 1) dan lebih
+        lama dari grace detik. Returns: (removed, bytes_reclaimed)
+        """
+        cutoff = time.time() - grace
+        removed = 0
+        reclaimed = 0
+
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.endswith('.jpg'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                with self._lock:
+                    if path in self._pending:
+                        continue
+                    try:
+                        stat = os.stat(path)
+                        if stat.st_nlink > 1 or stat.st_mtime >= cutoff:
+                            continue
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    for recent in self._recent.values():
+                        for item in [item for item in recent if item[2] == path]:
+                            recent.remove(item)
+                removed += 1
+                reclaimed += stat.st_size
+
+        with self._lock:
+            self._stats['gc_removed'] += removed
+            self._stats['gc_bytes_reclaimed'] += reclaimed
+        return removed, reclaimed
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending_blobs'] = len(self._pending)
+        return stats
+
+
+def _link(blob, target_path):
+    """Hardlink target ke blob; copy jika filesystem tidak mendukung hardlink"""
+    os.makedirs(os.path.dirname(target_path) or '.', exist_ok=True)
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    try:
+        os.link(blob, target_path)
+    except OSError:
+        shutil.copyfile(blob, target_path)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] != 'gc':
+        print("Usage: python -m core.blob_store gc <blob root> [grace_seconds]")
+        sys.exit(1)
+
+    grace = float(sys.argv[3]) if len(sys.argv) > 3 else BLOB_GC_GRACE
+    removed, reclaimed = BlobStore(sys.argv[2]).gc(grace)
+    print(f"✅ Removed {removed} unreferenced blobs, {reclaimed} bytes reclaimed")
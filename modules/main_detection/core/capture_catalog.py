@@ -0,0 +1,223 @@
+"""
+Capture catalog - indeks SQLite untuk file hasil capture
+Menggantikan os.listdir + parsing filename pada setiap request list/download
+
+Rebuild indeks dari file yang sudah ada (jalankan dari modules/main_detection):
+    python -m core.capture_catalog rebuild
+"""
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from core.config import CAPTURE_DIR, CAPTURE_CATALOG_PATH
+
+logger = logging.getLogger(__name__)
+
+# Pola nama file: main app dan Jitsi dummy
+CAPTURE_FILENAME_PATTERNS = [
+    re.compile(r'^(?P<session_id>CS_\d{8}_\d{6})_(?P<user_id>USER_\d{8}_\d{6})_'
+               r'(?P<type>ktp_face|face|ktp|full)_(?P<timestamp>\d{8}_\d{6})\.jpg$'),
+    re.compile(r'^(?P<session_id>cs_.+?)_(?P<user_id>nasabah_.+?)_'
+               r'(?P<type>ktp_face|face|ktp|full)_(?P<timestamp>\d{8}_\d{6})\.jpg$'),
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    filename TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    user_id TEXT,
+    type TEXT,
+    timestamp TEXT,
+    size INTEGER,
+    created_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_captures_session ON captures(session_id);
+CREATE INDEX IF NOT EXISTS idx_captures_user ON captures(user_id);
+CREATE INDEX IF NOT EXISTS idx_captures_type ON captures(type);
+CREATE INDEX IF NOT EXISTS idx_captures_timestamp ON captures(timestamp);
+"""
+
+COLUMNS = ['filename', 'path', 'session_id', 'user_id', 'type', 'timestamp', 'size', 'created_at']
+
+
+def parse_capture_filename(filename):
+    """
+    Parse metadata dari nama file capture
+    Returns: dict (session_id, user_id, type, timestamp) atau None jika format tidak dikenal
+    """
+    for pattern in CAPTURE_FILENAME_PATTERNS:
+        match = pattern.match(filename)
+        if match:
+            return match.groupdict()
+    return None
+
+
+class CaptureCatalog:
+    """
+    Katalog capture berbasis SQLite dengan indeks session_id, user_id, type, timestamp.
+    Satu koneksi dipakai bersama antar thread, dilindungi lock.
+    """
+
+    def __init__(self, db_path, capture_dir):
+        self.db_path = db_path
+        self.capture_dir = capture_dir
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def record(self, entries):
+        """
+        Catat beberapa file capture dalam satu transaksi
+        entries: list of dict dengan key sesuai COLUMNS (filename dan path wajib)
+        """
+        with self._lock, self._conn:
+            self._insert(entries)
+
+    def _insert(self, entries):
+        rows = []
+        for entry in entries:
+            row = dict(entry)
+            row.setdefault('created_at', time.time())
+            rows.append(tuple(row.get(column) for column in COLUMNS))
+
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO captures ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+            rows
+        )
+
+    def remove(self, filenames):
+        """Hapus entry katalog untuk filename yang diberikan"""
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM captures WHERE filename = ?',
+                                   [(filename,) for filename in filenames])
+
+    def get(self, filename):
+        """Ambil satu entry berdasarkan filename"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM captures WHERE filename = ?',
+                                     (filename,)).fetchone()
+        return dict(row) if row else None
+
+    def list_captures(self, session_id=None, user_id=None, capture_type=None,
+                      since=None, until=None, limit=100, offset=0):
+        """
+        List capture dengan filter dan pagination (terbaru dulu)
+        Returns: (entries, total)
+        """
+        conditions = []
+        params = []
+        for column, value in (('session_id', session_id), ('user_id', user_id), ('type', capture_type)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if since:
+            conditions.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            conditions.append('timestamp <= ?')
+            params.append(until)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with self._lock:
+            total = self._conn.execute(f'SELECT COUNT(*) FROM captures {where}', params).fetchone()[0]
+            rows = self._conn.execute(
+                f'SELECT * FROM captures {where} ORDER BY timestamp DESC, filename LIMIT ? OFFSET ?',
+                params + [limit, offset]
+            ).fetchall()
+
+        return [dict(row) for row in rows], total
+
+    def files_for_session(self, session_id):
+        """
+        Semua file untuk satu session. Jika session_id tidak ada di indeks,
+        fallback ke pencocokan prefix filename (perilaku lama /download).
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM captures WHERE session_id = ? ORDER BY filename',
+                                      (session_id,)).fetchall()
+            if not rows:
+                # Range query pada primary key = prefix match yang tetap memakai indeks
+                rows = self._conn.execute(
+                    'SELECT * FROM captures WHERE filename >= ? AND filename < ? ORDER BY filename',
+                    (session_id, session_id + '\uffff')
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM captures').fetchone()[0]
+
+    def rebuild(self):
+        """
+        Re-index semua file .jpg di capture_dir
+        Returns: (indexed, skipped)
+        """
+        entries = []
+        skipped = 0
+
+        if os.path.exists(self.capture_dir):
+            for dirpath, _, filenames in os.walk(self.capture_dir):
+                for filename in filenames:
+                    if not filename.endswith('.jpg'):
+                        continue
+                    info = parse_capture_filename(filename)
+                    if info is None:
+                        skipped += 1
+                        continue
+                    file_path = os.path.join(dirpath, filename)
+                    stat = os.stat(file_path)
+                    entries.append({
+                        'filename': filename,
+                        'path': os.path.relpath(file_path, self.capture_dir),
+                        'size': stat.st_size,
+                        'created_at': stat.st_mtime,
+                        **info
+                    })
+
+        # Hapus dan isi ulang dalam satu transaksi
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM captures')
+            self._insert(entries)
+
+        return len(entries), skipped
+
+
+# Global catalog instance
+capture_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_capture_catalog():
+    """Get (atau buat) global capture catalog, otomatis rebuild saat database baru dibuat"""
+    global capture_catalog
+    with _catalog_lock:
+        if capture_catalog is None:
+            is_new = not os.path.exists(CAPTURE_CATALOG_PATH)
+            capture_catalog = CaptureCatalog(CAPTURE_CATALOG_PATH, CAPTURE_DIR)
+            if is_new:
+                indexed, skipped = capture_catalog.rebuild()
+                logger.info("📇 Capture catalog created: %s files indexed, %s skipped", indexed, skipped)
+        return capture_catalog
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'rebuild':
+        print("Usage: python -m core.capture_catalog rebuild")
+        sys.exit(1)
+
+    indexed, skipped = CaptureCatalog(CAPTURE_CATALOG_PATH, CAPTURE_DIR).rebuild()
+    print(f"✅ Rebuilt capture catalog {CAPTURE_CATALOG_PATH}: {indexed} files indexed, {skipped} skipped")
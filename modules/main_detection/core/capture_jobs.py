@@ -0,0 +1,166 @@
+"""
+Asynchronous auto-capture jobs
+Job subscribe ke shared detection worker dan selesai begitu wajah + KTP
+terdeteksi stabil selama beberapa frame berturut-turut
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from core.config import CAPTURE_STABLE_FRAMES, CAPTURE_JOB_TIMEOUT
+from core.capture_store import save_capture
+from core.detection_worker import get_detection_worker
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureJob:
+    """State satu job auto capture"""
+
+    def __init__(self, job_id, mode, stable_frames, timeout):
+        self.job_id = job_id
+        self.mode = mode
+        self.stable_frames = stable_frames
+        self.timeout = timeout
+        self.status = 'pending'
+        self.created_at = time.time()
+        self.completed_at = None
+        self.result = None
+        self.message = None
+        self.stable_count = 0
+        self._done = threading.Event()
+        self._timer = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Tunggu job selesai, return True jika sudah selesai"""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        data = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'mode': self.mode,
+            'stable_count': self.stable_count,
+            'stable_frames': self.stable_frames,
+            'created_at': self.created_at,
+            'completed_at': self.completed_at
+        }
+        if self.message:
+            data['message'] = self.message
+        if self.result:
+            data.update(self.result)
+        return data
+
+
+class CaptureJobManager:
+    """
+    Mengelola capture job: start, tracking status dan timeout.
+    Job finished disimpan terbatas (max_jobs) untuk long-poll client.
+    """
+
+    def __init__(self, worker, stable_frames=CAPTURE_STABLE_FRAMES,
+                 timeout=CAPTURE_JOB_TIMEOUT, max_jobs=100):
+        self.worker = worker
+        self.stable_frames = stable_frames
+        self.timeout = timeout
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start_job(self, mode='auto'):
+        """Buat job baru dan subscribe ke detection worker"""
+        job = CaptureJob(uuid.uuid4().hex[:12], mode, self.stable_frames, self.timeout)
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune_finished()
+
+        def on_result(result):
+            self._on_result(job, on_result, result)
+
+        job._timer = threading.Timer(self.timeout, self._on_timeout, args=(job, on_result))
+        job._timer.daemon = True
+        job._timer.start()
+
+        self.worker.subscribe(on_result)
+        logger.info("🎬 Capture job %s started (stable frames: %s)", job.job_id, job.stable_frames)
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _on_result(self, job, callback, result):
+        if job.done:
+            return
+
+        if result['both_detected']:
+            job.stable_count += 1
+        else:
+            job.stable_count = 0
+
+        if job.stable_count < job.stable_frames:
+            return
+
+        self.worker.unsubscribe(callback)
+        job._timer.cancel()
+        logger.info("✅ Capture job %s: kedua objek stabil, melakukan capture...", job.job_id)
+        # Encode + simpan di thread sendiri agar subscriber lain tidak tertahan
+        threading.Thread(target=self._save, args=(job, result),
+                         name=f'capture-job-{job.job_id}', daemon=True).start()
+
+    def _save(self, job, result):
+        try:
+            saved = save_capture(result['face_img'], result['ktp_img'],
+                                 result['ktp_face_img'], result['frame'])
+            saved.update({
+                'face_detected': result['face_detected'],
+                'ktp_detected': result['ktp_detected'],
+                'ktp_face_detected': result['ktp_face_img'] is not None
+            })
+            self._finish(job, 'completed', result=saved)
+        except Exception as e:
+            self._finish(job, 'error', message=f'Error saving capture: {str(e)}')
+
+    def _on_timeout(self, job, callback):
+        self.worker.unsubscribe(callback)
+        self._finish(job, 'timeout',
+                     message=f'Timeout: Tidak dapat mendeteksi wajah dan KTP dalam {self.timeout} detik')
+
+    def _finish(self, job, status, result=None, message=None):
+        with self._lock:
+            if job.done:
+                return
+            job.status = status
+            job.result = result
+            job.message = message
+            job.completed_at = time.time()
+            job._done.set()
+        if job._timer is not None:
+            job._timer.cancel()
+
+    def _prune_finished(self):
+        while len(self._jobs) > self.max_jobs:
+            oldest_id = next((job_id for job_id, job in self._jobs.items() if job.done), None)
+            if oldest_id is None:
+                break
+            del self._jobs[oldest_id]
+
+
+# Global job manager instance
+capture_job_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_capture_job_manager():
+    """Get (atau buat) global capture job manager"""
+    global capture_job_manager
+    with _manager_lock:
+        if capture_job_manager is None:
+            capture_job_manager = CaptureJobManager(get_detection_worker())
+        return capture_job_manager
@@ -0,0 +1,206 @@
+"""
+Capture storage module
+Menyimpan hasil capture (wajah, KTP, foto di KTP, full frame) ke folder captured_ktp
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from core.config import CAPTURE_DIR, CAPTURE_RETENTION_DAYS, CAPTURE_DEDUP_ENABLED, CAPTURE_BLOB_DIR
+from core.blob_store import BlobStore
+from core.capture_catalog import get_capture_catalog
+from core.capture_writer import encode_jpeg, get_capture_writer
+from core.retention import RetentionRoot, RetentionSweeper
+from core.storage_layout import capture_relpath
+
+RETENTION_ROOT = 'captured_ktp'
+CAPTURE_VISIBLE_TIMEOUT = 5.0   # Detik route menunggu capture yang masih di antrian writer
+
+_pending_lock = threading.Lock()
+_pending_batches = {}           # session_id -> set _CatalogBatch yang belum tercatat di katalog
+
+
+class _CatalogBatch:
+    """
+    Kumpulkan entry katalog satu capture dan catat dalam satu transaksi
+    setelah semua file selesai ditulis writer pool. done di-set setelah
+    katalog ditulis sehingga route bisa menunggu capture yang baru disimpan
+    """
+
+    def __init__(self, session_id, entries_by_path, stat_sizes=False):
+        self.session_id = session_id
+        self.entries_by_path = entries_by_path
+        self.stat_sizes = stat_sizes
+        self.remaining = len(entries_by_path)
+        self.durable = []
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        with _pending_lock:
+            _pending_batches.setdefault(session_id, set()).add(self)
+
+    def on_durable(self, path, error):
+        if error is None and self.stat_sizes:
+            # Near-duplicate memakai blob lama, ukuran diambil dari file akhir
+            try:
+                self.entries_by_path[path]['size'] = os.path.getsize(path)
+            except OSError:
+                pass
+
+        with self._lock:
+            if error is None:
+                self.durable.append(self.entries_by_path[path])
+            self.remaining -= 1
+            done = self.remaining == 0
+        if error is None:
+            get_retention_sweeper().track(RETENTION_ROOT, path, size=self.entries_by_path[path]['size'])
+        if done:
+            self._complete()
+
+    def abandon(self, count):
+        """count file gagal diantrikan: file yang sudah diantrikan tetap dicatat saat durable"""
+        with self._lock:
+            self.remaining -= count
+            done = self.remaining == 0
+        if done:
+            self._complete()
+
+    def _complete(self):
+        try:
+            if self.durable:
+                get_capture_catalog().record(self.durable)
+        finally:
+            with _pending_lock:
+                batches = _pending_batches.get(self.session_id, set())
+                batches.discard(self)
+                if not batches:
+                    _pending_batches.pop(self.session_id, None)
+            self.done.set()
+
+
+def wait_for_captures(session_id=None, timeout=CAPTURE_VISIBLE_TIMEOUT):
+    """
+    Tunggu capture yang masih di antrian writer sampai tercatat di katalog
+    session_id None = semua capture yang sedang pending
+    Returns: True jika tidak ada lagi yang pending
+    """
+    with _pending_lock:
+        if session_id is None:
+            batches = [batch for session in _pending_batches.values() for batch in session]
+        else:
+            batches = list(_pending_batches.get(session_id, ()))
+
+    deadline = time.time() + timeout
+    for batch in batches:
+        if not batch.done.wait(max(deadline - time.time(), 0)):
+            return False
+    return True
+
+
+def save_capture(face_img, ktp_img, ktp_face_img, frame):
+    """
+    Encode hasil capture di thread pemanggil lalu antrikan ke capture writer.
+    Returns segera setelah bytes JPEG ada di memori: dict dengan session_id,
+    timestamp dan daftar file yang disimpan
+    """
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    session_id = f"CS_{timestamp[:8]}_{timestamp[9:]}"
+    user_id = f"USER_{timestamp}"
+
+    images = [
+        ('face', face_img),
+        ('ktp', ktp_img),
+        ('ktp_face', ktp_face_img),
+        ('full', frame)  # Full frame untuk referensi
+    ]
+
+    encoded = {}
+    source_images = {}
+    entries_by_path = {}
+    for capture_type, image in images:
+        if image is None:
+            continue
+        filename = f"{session_id}_{user_id}_{capture_type}_{timestamp}.jpg"
+        # Disimpan di layout YYYY/MM/DD/<shard>/<session_id>/, path relatif dicatat di katalog
+        relpath = capture_relpath(session_id, filename, now)
+        file_path = os.path.join(CAPTURE_DIR, relpath)
+        encoded[file_path] = encode_jpeg(image)
+        source_images[file_path] = (capture_type, image)
+        entries_by_path[file_path] = {
+            'filename': filename,
+            'path': relpath,
+            'session_id': session_id,
+            'user_id': user_id,
+            'type': capture_type,
+            'timestamp': timestamp,
+            'size': len(encoded[file_path])
+        }
+
+    batch = _CatalogBatch(session_id, entries_by_path, stat_sizes=CAPTURE_DEDUP_ENABLED)
+    submitted = 0
+    try:
+        if CAPTURE_DEDUP_ENABLED:
+            blob_store = get_blob_store()
+            for file_path, data in encoded.items():
+                capture_type, image = source_images[file_path]
+                blob_store.store(data, file_path, batch.on_durable, image=image, group=capture_type)
+                submitted += 1
+        else:
+            writer = get_capture_writer()
+            for file_path, data in encoded.items():
+                writer.submit(file_path, data, batch.on_durable)
+                submitted += 1
+    except Exception:
+        # Antrian penuh di tengah capture: file yang sudah diantrikan tetap masuk katalog
+        batch.abandon(len(encoded) - submitted)
+        raise
+    if not encoded:
+        batch.abandon(0)
+
+    return {
+        'session_id': session_id,
+        'user_id': user_id,
+        'timestamp': timestamp,
+        'captured_files': [entry['filename'] for entry in entries_by_path.values()]
+    }
+
+
+# Global blob store instance
+blob_store = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Get (atau buat) blob store dedup, blob ditulis lewat capture writer"""
+    global blob_store
+    with _blob_store_lock:
+        if blob_store is None:
+            blob_store = BlobStore(CAPTURE_BLOB_DIR, writer=get_capture_writer())
+        return blob_store
+
+
+def _remove_from_catalog(paths):
+    get_capture_catalog().remove([os.path.basename(path) for path in paths])
+
+
+# Global retention sweeper instance
+retention_sweeper = None
+_retention_lock = threading.Lock()
+
+
+def get_retention_sweeper():
+    """Get (atau buat) sweeper retensi untuk CAPTURE_DIR; entry katalog ikut dihapus"""
+    global retention_sweeper
+    with _retention_lock:
+        if retention_sweeper is None:
+            retention_sweeper = RetentionSweeper([
+                RetentionRoot(RETENTION_ROOT, CAPTURE_DIR, CAPTURE_RETENTION_DAYS * 24 * 3600,
+                              unit='file', extensions=('.jpg',), on_delete=_remove_from_catalog)
+            ], tasks=[lambda: get_blob_store().gc()] if CAPTURE_DEDUP_ENABLED else None)
+        return retention_sweeper
+
+
+def start_retention_sweeper():
+    """Jalankan sweeper retensi kecuali CAPTURE_RETENTION_DAYS = 0"""
+    if CAPTURE_RETENTION_DAYS > 0:
+        get_retention_sweeper().start()
@@ -0,0 +1,259 @@
+"""
+Asynchronous capture persistence
+Bounded writer pool: bytes JPEG yang sudah di-encode diantrikan lalu ditulis
+ke disk oleh worker threads, dengan fsync per batch dan backpressure saat
+antrian penuh. PendingWrites melacak write yang belum durable per capture
+sehingga download cukup menunggu capture-nya sendiri. Modul ini tidak bergantung
+pada core.config sehingga bisa dipakai juga oleh Jitsi bridge.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import cv2
+from core.tracing import span, traced
+
+logger = logging.getLogger(__name__)
+
+# Writer pool settings
+WRITER_THREADS = 2
+WRITER_MAX_QUEUE = 64        # Maksimal file yang menunggu ditulis
+WRITER_BATCH_SIZE = 8        # Maksimal file per batch fsync
+WRITER_SUBMIT_TIMEOUT = 5.0  # Detik submit() menunggu saat antrian penuh
+JPEG_QUALITY = 95
+
+
+@traced('jpeg_encode')
+def encode_jpeg(image, quality=JPEG_QUALITY):
+    """Encode image BGR ke bytes JPEG (sekali, dipakai untuk disk dan response)"""
+    success, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not success:
+        raise ValueError("Failed to encode image")
+    return buffer.tobytes()
+
+
+class WriteRequest:
+    """Satu file yang menunggu ditulis"""
+
+    def __init__(self, path, data, on_durable=None):
+        self.path = path
+        self.data = data
+        self.on_durable = on_durable
+        self.submitted_at = time.time()
+
+
+class CaptureWriter:
+    """
+    Writer pool dengan antrian terbatas.
+    - submit() memblok maksimal submit_timeout detik saat antrian penuh (backpressure),
+      lalu raise queue.Full
+    - worker mengambil hingga batch_size request, menulis semuanya, lalu fsync
+      file + direktori sekali per batch sebelum rename ke path final
+    - on_durable(path, error) dipanggil setelah file aman di disk (error=None)
+      atau gagal ditulis
+    """
+
+    def __init__(self, num_threads=WRITER_THREADS, max_queue=WRITER_MAX_QUEUE,
+                 batch_size=WRITER_BATCH_SIZE, submit_timeout=WRITER_SUBMIT_TIMEOUT, fsync=True):
+        self.batch_size = batch_size
+        self.submit_timeout = submit_timeout
+        self.fsync = fsync
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'written': 0,
+            'bytes_written': 0,
+            'batches': 0,
+            'errors': 0,
+            'rejected': 0,
+            'max_queue_depth': 0
+        }
+
+        self._threads = []
+        for index in range(num_threads):
+            thread = threading.Thread(target=self._run, name=f'capture-writer-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, path, data, on_durable=None):
+        """Antrikan satu file untuk ditulis"""
+        try:
+            self._queue.put(WriteRequest(path, data, on_durable), timeout=self.submit_timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats['rejected'] += 1
+            raise
+
+        with self._stats_lock:
+            self._stats['submitted'] += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._queue.qsize())
+
+    def flush(self, timeout=None):
+        """Tunggu sampai semua file di antrian selesai ditulis, return True jika kosong"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def get_stats(self):
+        """Metric writer pool, termasuk kedalaman antrian saat ini"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_capacity'] = self.max_queue
+        return stats
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                with span('disk_write'):
+                    self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch):
+        # Tahap 1: tulis semua file ke path sementara
+        pending = []
+        for request in batch:
+            temp_path = f"{request.path}.tmp"
+            handle = None
+            try:
+                os.makedirs(os.path.dirname(request.path) or '.', exist_ok=True)
+                handle = open(temp_path, 'wb')
+                handle.write(request.data)
+                pending.append((request, temp_path, handle))
+            except OSError as e:
+                # Jangan bocorkan handle atau sisakan .tmp yang setengah tertulis
+                if handle is not None:
+                    handle.close()
+                    _remove_quietly(temp_path)
+                self._finish(request, e)
+
+        # Tahap 2: satu putaran fsync untuk seluruh batch, lalu rename atomik
+        directories = set()
+        completed = []
+        for request, temp_path, handle in pending:
+            try:
+                handle.flush()
+                if self.fsync:
+                    os.fsync(handle.fileno())
+                handle.close()
+                os.replace(temp_path, request.path)
+                directories.add(os.path.dirname(request.path) or '.')
+                completed.append(request)
+            except OSError as e:
+                handle.close()
+                _remove_quietly(temp_path)
+                self._finish(request, e)
+
+        if self.fsync:
+            for directory in directories:
+                _fsync_directory(directory)
+
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['written'] += len(completed)
+            self._stats['bytes_written'] += sum(len(request.data) for request in completed)
+
+        for request in completed:
+            self._finish(request, None)
+
+    def _finish(self, request, error):
+        if error is not None:
+            logger.error("❌ Capture write failed for %s: %s", request.path, error)
+            with self._stats_lock:
+                self._stats['errors'] += 1
+
+        if request.on_durable:
+            try:
+                request.on_durable(request.path, error)
+            except Exception as e:
+                logger.warning("⚠️ Durability callback error for %s: %s", request.path, e)
+
+
+class PendingWrites:
+    """
+    Jumlah write yang belum durable per key (misalnya capture_id)
+    - submit() meneruskan ke writer dan menghitung key sampai on_durable dipanggil
+    - wait(key) hanya menunggu write milik key tersebut, bukan seluruh antrian writer
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._condition = threading.Condition()
+        self._pending = {}
+
+    def submit(self, key, path, data):
+        with self._condition:
+            self._pending[key] = self._pending.get(key, 0) + 1
+        try:
+            self.writer.submit(path, data, lambda _path, _error: self._done(key))
+        except Exception:
+            self._done(key)
+            raise
+
+    def wait(self, key, timeout=None):
+        """Returns True jika semua write key sudah durable (atau gagal) sebelum timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: key not in self._pending, timeout)
+
+    def _done(self, key):
+        with self._condition:
+            remaining = self._pending.get(key, 0) - 1
+            if remaining > 0:
+                self._pending[key] = remaining
+            else:
+                self._pending.pop(key, None)
+                self._condition.notify_all()
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _fsync_directory(directory):
+    """fsync entry direktori agar rename ikut persisten (tidak didukung di Windows)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# Global writer instance
+capture_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_capture_writer():
+    """Get (atau buat) global capture writer, antrian di-flush saat proses exit"""
+    global capture_writer
+    with _writer_lock:
+        if capture_writer is None:
+            capture_writer = CaptureWriter()
+            atexit.register(capture_writer.flush, 10)
+        return capture_writer
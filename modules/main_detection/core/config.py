@@ -2,8 +2,12 @@
 Configuration module for photo detection application
 """
 import cv2
+import logging
 import mediapipe as mp
 import os
+from core.frame_source import open_frame_source
+
+logger = logging.getLogger(__name__)
 
 # Global configurations
 CAMERA_WIDTH, CAMERA_HEIGHT = 640, 480
@@ -23,8 +27,11 @@ KTP_TEMPLATE_BACKUP = os.path.join(ASSETS_DIR, "ktp muka.png")
 mp_face_detection = mp.solutions.face_detection
 face_detection = mp_face_detection.FaceDetection(model_selection=1, min_detection_confidence=0.5)
 
-# Video capture
-cap = cv2.VideoCapture(0)
+# Video capture (frame source): device:0 | video:<path> | images:<folder> | synthetic[:seed] | stream:<url>
+# FRAME_SOURCE_PACE: 'realtime' (sesuai FPS sumber) atau 'fast' (secepat mungkin, untuk stress test)
+FRAME_SOURCE = os.environ.get('FRAME_SOURCE', 'device:0')
+FRAME_SOURCE_PACE = os.environ.get('FRAME_SOURCE_PACE', 'realtime')
+cap = open_frame_source(FRAME_SOURCE, FRAME_SOURCE_PACE)
 cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
 # Paths
@@ -36,6 +43,18 @@ guide_path = 'static/ktp_muka.png'
 capture_mode = 'auto'
 countdown_status = {'active': False, 'remaining': 0}
 
+# Capture storage
+CAPTURE_DIR = 'static/captured_ktp'
+CAPTURE_CATALOG_PATH = 'static/capture_catalog.db'
+CAPTURE_RETENTION_DAYS = 30    # Capture lebih lama dari ini dihapus sweeper background (0 = nonaktif)
+CAPTURE_DEDUP_ENABLED = False  # Simpan capture sebagai hardlink ke blob content-addressed (dedup retake)
+CAPTURE_BLOB_DIR = 'static/capture_blobs'
+
+# Auto capture jobs
+CAPTURE_STABLE_FRAMES = 3      # Jumlah frame berturut-turut dengan wajah + KTP sebelum capture
+CAPTURE_JOB_TIMEOUT = 30       # Detik sebelum job auto capture dianggap timeout
+DETECTION_WORKER_IDLE_TIMEOUT = 10  # Worker berhenti jika tidak ada konsumen selama N detik
+
 def load_ktp_template():
     """Load template KTP untuk matching"""
     global KTP_TEMPLATE
@@ -53,23 +72,23 @@ def load_ktp_template():
         "../../assets/ktp muka.png"
     ]
     
-    print(f"🔍 Looking for template in assets directory: {ASSETS_DIR}")
+    logger.info("🔍 Looking for template in assets directory: %s", ASSETS_DIR)
     
     for template_path in template_paths:
         try:
-            print(f"   Trying: {template_path}")
+            logger.debug("   Trying: %s", template_path)
             if os.path.exists(template_path):
                 template = cv2.imread(template_path)
                 if template is not None:
                     # Resize template ke ukuran standar untuk matching
                     KTP_TEMPLATE = cv2.resize(template, (200, 125))  # Rasio KTP ~1.6:1
-                    print(f"✅ KTP Template loaded from: {template_path}")
+                    logger.info("✅ KTP Template loaded from: %s", template_path)
                     return True
         except Exception as e:
-            print(f"⚠️ Failed to load template from {template_path}: {e}")
+            logger.warning("⚠️ Failed to load template from %s: %s", template_path, e)
             continue
     
-    print("❌ No KTP template found. Using fallback detection method.")
+    logger.warning("❌ No KTP template found. Using fallback detection method.")
     return False
 
 def get_ktp_template():
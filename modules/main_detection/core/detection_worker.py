@@ -0,0 +1,145 @@
+"""
+Shared detection worker
+Satu thread background membaca kamera dan menjalankan detect_face_and_ktp,
+hasil terbaru dibagikan ke semua konsumen (capture jobs, status endpoint)
+"""
+import logging
+import threading
+import time
+from core.config import cap, DETECTION_WORKER_IDLE_TIMEOUT
+from core.tracing import span, trace
+from detection.main_detector import detect_face_and_ktp
+
+logger = logging.getLogger(__name__)
+
+
+class DetectionWorker:
+    """
+    Background worker yang mem-publish hasil deteksi per frame.
+    Konsumen bisa menunggu hasil baru (wait_for_result) atau subscribe callback.
+    Worker otomatis berhenti jika tidak ada konsumen selama idle_timeout detik.
+    """
+
+    def __init__(self, capture, idle_timeout=DETECTION_WORKER_IDLE_TIMEOUT):
+        self.capture = capture
+        self.idle_timeout = idle_timeout
+        self._condition = threading.Condition()
+        self._latest = None
+        self._sequence = 0
+        self._subscribers = []
+        self._thread = None
+        self._running = False
+        self._last_demand = time.time()
+
+    def ensure_running(self):
+        """Start worker thread jika belum berjalan dan catat permintaan terbaru"""
+        with self._condition:
+            self._last_demand = time.time()
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='detection-worker', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Hentikan worker thread"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def subscribe(self, callback):
+        """Daftarkan callback(result) yang dipanggil untuk setiap hasil deteksi baru"""
+        with self._condition:
+            self._subscribers.append(callback)
+        self.ensure_running()
+        return callback
+
+    def unsubscribe(self, callback):
+        """Hapus callback yang sudah didaftarkan"""
+        with self._condition:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def get_latest(self):
+        """Hasil deteksi terbaru (atau None jika belum ada frame yang diproses)"""
+        self.ensure_running()
+        with self._condition:
+            return self._latest
+
+    def wait_for_result(self, after_sequence=0, timeout=None):
+        """
+        Tunggu hasil dengan sequence > after_sequence
+        Returns: result dict atau None jika timeout
+        """
+        self.ensure_running()
+        deadline = None if timeout is None else time.time() + timeout
+
+        with self._condition:
+            while self._latest is None or self._latest['sequence'] <= after_sequence:
+                if not self._running:
+                    return None
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            return self._latest
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    break
+                if not self._subscribers and time.time() - self._last_demand > self.idle_timeout:
+                    self._running = False
+                    break
+
+            with trace(f"worker-{self._sequence + 1}"):
+                with span('camera_read'):
+                    success, frame = self.capture.read()
+                if success:
+                    face_img, ktp_img, ktp_face_img = detect_face_and_ktp(frame)
+
+            if not success:
+                time.sleep(0.05)
+                continue
+
+            face_detected = face_img is not None and len(face_img) > 0
+            ktp_detected = ktp_img is not None
+
+            result = {
+                'timestamp': time.time(),
+                'frame': frame,
+                'face_img': face_img,
+                'ktp_img': ktp_img,
+                'ktp_face_img': ktp_face_img,
+                'face_detected': face_detected,
+                'ktp_detected': ktp_detected,
+                'both_detected': face_detected and ktp_detected
+            }
+
+            with self._condition:
+                self._sequence += 1
+                result['sequence'] = self._sequence
+                self._latest = result
+                subscribers = list(self._subscribers)
+                self._condition.notify_all()
+
+            for callback in subscribers:
+                try:
+                    callback(result)
+                except Exception as e:
+                    logger.warning("⚠️ Detection subscriber error: %s", e)
+
+
+# Global detection worker instance
+detection_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_detection_worker():
+    """Get (atau buat) global detection worker"""
+    global detection_worker
+    with _worker_lock:
+        if detection_worker is None:
+            detection_worker = DetectionWorker(cap)
+        return detection_worker
@@ -0,0 +1,306 @@
+"""
+Frame sources
+Abstraksi sumber frame dengan interface yang sama seperti cv2.VideoCapture
+(read, isOpened, set, get, release) sehingga app dan bridge bisa berjalan
+tanpa webcam:
+
+    device:0              kamera lokal (default)
+    video:<path>          file video, diulang dari awal saat habis
+    images:<folder>       folder gambar (urut nama), diulang; images:<folder>?cache=<n>
+                          menyimpan maksimal n frame hasil decode (LRU, default tanpa cache)
+    synthetic[:seed]      scene KTP sintetis dari tools/generate_ktp_scenes.py
+    stream:<url>          network stream (rtsp://, http:// MJPEG), reconnect otomatis
+
+Pacing: 'realtime' menahan read() sesuai FPS sumber (seperti kamera asli),
+'fast' mengembalikan frame secepat mungkin (benchmark/stress test).
+Modul ini tidak bergantung pada core.config.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+import cv2
+
+logger = logging.getLogger(__name__)
+
+PACE_MODES = ('realtime', 'fast')
+DEFAULT_SOURCE_FPS = 30
+STREAM_RECONNECT_DELAY = 2.0    # Detik sebelum mencoba membuka ulang network stream
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+TOOLS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))), 'tools')
+
+
+class Pacer:
+    """Tahan pemanggil sampai jadwal frame berikutnya (mode realtime)"""
+
+    def __init__(self, fps, pace='realtime'):
+        if pace not in PACE_MODES:
+            raise ValueError(f"Unknown pace mode: {pace}")
+        self.interval = 1.0 / fps if pace == 'realtime' and fps else 0.0
+        self._next_due = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self._next_due > now:
+            time.sleep(self._next_due - now)
+            now = self._next_due
+        # Jika pemanggil terlambat, jadwal mulai lagi dari sekarang (tidak mengejar)
+        self._next_due = now + self.interval
+
+
+class FrameSource:
+    """Base class: subclass cukup mengimplementasikan _read_frame()"""
+
+    def __init__(self, fps=DEFAULT_SOURCE_FPS, pace='realtime'):
+        self.fps = fps
+        self.pace = pace
+        self._pacer = Pacer(fps, pace)
+        self._lock = threading.Lock()
+        self._opened = True
+        self.frames_read = 0
+
+    def read(self):
+        """Returns: (success, frame) seperti cv2.VideoCapture.read()"""
+        with self._lock:
+            if not self._opened:
+                return False, None
+            self._pacer.wait()
+            success, frame = self._read_frame()
+            if success:
+                self.frames_read += 1
+            return success, frame
+
+    def _read_frame(self):
+        raise NotImplementedError
+
+    def isOpened(self):
+        return self._opened
+
+    def set(self, prop, value):
+        # Properti kamera (buffer size, resolusi) tidak berlaku untuk sumber non-device
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 0)
+        return 0.0
+
+    def release(self):
+        self._opened = False
+
+    def describe(self):
+        return {'type': type(self).__name__, 'fps': self.fps, 'pace': self.pace,
+                'frames_read': self.frames_read}
+
+
+class DeviceSource(FrameSource):
+    """Kamera lokal; kamera sudah memberi pacing sendiri sehingga Pacer tidak dipakai"""
+
+    def __init__(self, index=0):
+        super().__init__(fps=None, pace='fast')
+        self.index = index
+        self.capture = cv2.VideoCapture(index)
+
+    def _read_frame(self):
+        return self.capture.read()
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def set(self, prop, value):
+        return self.capture.set(prop, value)
+
+    def get(self, prop):
+        return self.capture.get(prop)
+
+    def release(self):
+        super().release()
+        self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """File video yang diputar berulang (loop) atau sekali jalan"""
+
+    def __init__(self, path, pace='realtime', fps=None, loop=True):
+        self.path = path
+        self.loop = loop
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise FileNotFoundError(f"Cannot open video: {path}")
+        super().__init__(fps or self.capture.get(cv2.CAP_PROP_FPS) or DEFAULT_SOURCE_FPS, pace)
+
+    def _read_frame(self):
+        success, frame = self.capture.read()
+        if not success and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.capture.read()
+        return success, frame
+
+    def release(self):
+        super().release()
+        self.capture.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """
+    Folder gambar dibaca berurutan; file yang tidak bisa di-decode dilewati.
+    cache: jumlah maksimal frame hasil decode yang disimpan (LRU, 0 = tanpa cache).
+    Replay hanya bebas dari disk jika cache >= jumlah gambar di folder.
+    """
+
+    def __init__(self, path, pace='realtime', fps=DEFAULT_SOURCE_FPS, loop=True, cache=0):
+        super().__init__(fps, pace)
+        self.paths = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                      if name.lower().endswith(IMAGE_EXTENSIONS)]
+        if not self.paths:
+            raise FileNotFoundError(f"No images found in {path}")
+        self.loop = loop
+        self.cache_size = cache
+        self.cache = OrderedDict()
+        self._index = 0
+
+    def _read_frame(self):
+        while self.paths:
+            if self._index >= len(self.paths):
+                if not self.loop:
+                    return False, None
+                self._index = 0
+
+            path = self.paths[self._index]
+            frame = self.cache.get(path)
+            if frame is not None:
+                self.cache.move_to_end(path)
+            else:
+                frame = cv2.imread(path)
+                if frame is None:
+                    # Satu file rusak tidak boleh menghentikan stream: buang dari daftar
+                    logger.warning("⚠️ Skipping unreadable image %s", path)
+                    del self.paths[self._index]
+                    continue
+                if self.cache_size:
+                    self.cache[path] = frame
+                    if len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+            self._index += 1
+            return True, frame.copy()
+        return False, None
+
+
+class GeneratorSource(FrameSource):
+    """
+    Frame dari iterable di memori. factory() dipanggil ulang saat iterable habis
+    (loop), misalnya lambda: (frame for _, frame, _ in generator.stream(500))
+    """
+
+    def __init__(self, factory, pace='realtime', fps=DEFAULT_SOURCE_FPS, loop=True):
+        super().__init__(fps, pace)
+        self.factory = factory
+        self.loop = loop
+        self._iterator = iter(factory())
+
+    def _read_frame(self):
+        try:
+            return True, next(self._iterator)
+        except StopIteration:
+            if not self.loop:
+                return False, None
+            self._iterator = iter(self.factory())
+            try:
+                return True, next(self._iterator)
+            except StopIteration:
+                return False, None
+
+
+class NetworkStreamSource(FrameSource):
+    """
+    RTSP/HTTP stream via cv2.VideoCapture dengan reconnect saat stream putus.
+    Reconnect (jeda + buka ulang) berjalan di thread terpisah sehingga read()
+    tidak menahan lock; selama reconnect read() langsung mengembalikan False.
+    """
+
+    def __init__(self, url, pace='fast', fps=None, reconnect_delay=STREAM_RECONNECT_DELAY):
+        # Stream live sudah ber-pacing dari sumbernya; 'realtime' hanya membatasi ke fps
+        super().__init__(fps, pace if fps else 'fast')
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self.reconnects = 0
+        self._reconnecting = False
+        self.capture = cv2.VideoCapture(url)
+
+    def _read_frame(self):
+        capture = self.capture
+        if capture is None:
+            return False, None
+
+        success, frame = capture.read()
+        if success:
+            return success, frame
+
+        # Stream putus: buka ulang di background (pemanggil mendapat False untuk frame ini)
+        self.capture = None
+        capture.release()
+        if not self._reconnecting:
+            self._reconnecting = True
+            threading.Thread(target=self._reconnect, name='frame-source-reconnect', daemon=True).start()
+        return False, None
+
+    def _reconnect(self):
+        time.sleep(self.reconnect_delay)
+        capture = cv2.VideoCapture(self.url)
+        if not self._opened:
+            capture.release()
+            return
+        self.reconnects += 1
+        # Flag dilepas sebelum capture dipasang agar kegagalan berikutnya menjadwalkan reconnect baru
+        self._reconnecting = False
+        self.capture = capture
+
+    def release(self):
+        super().release()
+        capture, self.capture = self.capture, None
+        if capture is not None:
+            capture.release()
+
+    def describe(self):
+        return {**super().describe(), 'url': self.url, 'reconnects': self.reconnects}
+
+
+def synthetic_source(seed=0, pace='realtime', fps=DEFAULT_SOURCE_FPS, count=None):
+    """Scene KTP sintetis (tools/generate_ktp_scenes.py) sebagai frame source"""
+    if TOOLS_DIR not in sys.path:
+        sys.path.append(TOOLS_DIR)
+    from generate_ktp_scenes import SceneGenerator
+
+    generator = SceneGenerator(seed=seed)
+    return GeneratorSource(lambda: (frame for _, frame, _ in generator.stream(count)), pace, fps)
+
+
+def open_frame_source(spec='device:0', pace='realtime', fps=None):
+    """
+    Buat frame source dari string konfigurasi (lihat docstring modul).
+    URL rtsp://, http(s):// tanpa prefix dianggap network stream.
+    """
+    if pace not in PACE_MODES:
+        raise ValueError(f"Unknown pace mode: {pace}")
+
+    kind, _, argument = spec.partition(':')
+    if kind in ('rtsp', 'rtmp', 'http', 'https'):
+        return NetworkStreamSource(spec, pace, fps)
+    if kind == 'device':
+        return DeviceSource(int(argument or 0))
+    if kind == 'video':
+        return VideoFileSource(argument, pace, fps)
+    if kind == 'images':
+        path, _, query = argument.partition('?')
+        options = dict(item.partition('=')[::2] for item in query.split('&') if item)
+        return ImageDirectorySource(path, pace, fps or DEFAULT_SOURCE_FPS, cache=int(options.get('cache') or 0))
+    if kind == 'synthetic':
+        return synthetic_source(int(argument or 0), pace, fps or DEFAULT_SOURCE_FPS)
+    if kind == 'stream':
+        return NetworkStreamSource(argument, pace, fps)
+    raise ValueError(f"Unknown frame source: {spec}")
@@ -0,0 +1,246 @@
+"""
+Adaptive performance governor
+Memilih profil deteksi (performance_mode, set scale template, validator tekstur,
+FPS stream) dari sinyal beban nyata:
+- queue lag frame (detik frame menunggu sebelum hasilnya keluar)
+- utilisasi CPU (load average / jumlah core)
+- jumlah session/stream yang berjalan bersamaan
+- latency per stage terhadap budget (diambil otomatis dari core.tracing)
+
+Setiap sinyal dinormalisasi menjadi pressure = nilai / batas. Profil turun satu
+level saat pressure >= DEGRADE_PRESSURE dan naik lagi saat pressure <=
+RECOVER_PRESSURE, masing-masing setelah jeda minimum (hysteresis) agar tidak
+berganti-ganti setiap frame. Sinyal push yang berhenti dilaporkan (semua viewer
+disconnect, stream selesai) meluruh ke 0 dan akhirnya dibuang sehingga profil
+bisa naik kembali. Modul ini tidak bergantung pada core.config.
+"""
+import logging
+import os
+import threading
+import time
+from core.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# Profil dari kualitas penuh ke paling ringan
+GOVERNOR_PROFILES = (
+    {
+        'name': 'full',
+        'performance_mode': 'adaptive',
+        'scales': (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2),
+        'validators': ('lbp', 'glcm', 'prnu', 'fourier'),
+        'stream_fps': 30
+    },
+    {
+        'name': 'reduced',
+        'performance_mode': 'fast',
+        'scales': (0.4, 0.6, 0.8, 1.0),
+        'validators': ('lbp', 'glcm'),
+        'stream_fps': 15
+    },
+    {
+        'name': 'minimal',
+        'performance_mode': 'fast',
+        'scales': (0.5, 0.8),
+        'validators': (),
+        'stream_fps': 5
+    }
+)
+
+# Batas sinyal (pressure 1.0 = tepat di batas)
+GOVERNOR_QUEUE_LAG_LIMIT = 0.5      # Detik
+GOVERNOR_CPU_LIMIT = 0.85           # Load average per core
+GOVERNOR_MAX_SESSIONS = 8           # Session/stream bersamaan
+GOVERNOR_STAGE_BUDGETS = {          # Detik per stage (EWMA)
+    'frame_total': 0.2,
+    'stream_frame': 0.2,
+    'template_detection': 0.15
+}
+
+# Hysteresis
+DEGRADE_PRESSURE = 1.0
+RECOVER_PRESSURE = 0.6
+DEGRADE_DWELL = 5           # Detik minimum di satu level sebelum turun lagi
+RECOVER_DWELL = 15          # Detik minimum sebelum naik level
+EVALUATE_INTERVAL = 1.0     # Detik antar evaluasi sinyal
+SIGNAL_EWMA_ALPHA = 0.2
+SIGNAL_DECAY_GRACE = 2.0    # Detik tanpa sample sebelum nilai sinyal mulai meluruh
+SIGNAL_HALF_LIFE = 5.0      # Detik, waktu paruh peluruhan setelah grace
+SIGNAL_STALE_AFTER = 60.0   # Detik tanpa sample sebelum sinyal dibuang
+
+
+def cpu_utilization():
+    """Load average 1 menit per core (0 jika platform tidak mendukung)"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+class PerformanceGovernor:
+    """
+    current_profile() dipanggil di hot path (murah: evaluasi paling sering
+    sekali per EVALUATE_INTERVAL). Sinyal masuk lewat report() (push),
+    register_session_source() (pull saat evaluasi) atau listener tracer (stage budget).
+    """
+
+    def __init__(self, profiles=GOVERNOR_PROFILES, queue_lag_limit=GOVERNOR_QUEUE_LAG_LIMIT,
+                 cpu_limit=GOVERNOR_CPU_LIMIT, max_sessions=GOVERNOR_MAX_SESSIONS,
+                 stage_budgets=None, cpu_source=cpu_utilization, tracer=None, clock=time.time):
+        self.profiles = profiles
+        self.limits = {
+            'queue_lag': queue_lag_limit,
+            'cpu': cpu_limit,
+            'sessions': max_sessions
+        }
+        self.stage_budgets = dict(GOVERNOR_STAGE_BUDGETS if stage_budgets is None else stage_budgets)
+
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._signals = {}              # nama sinyal -> (EWMA nilai, waktu sample terakhir)
+        self._session_sources = []
+        self._cpu_source = cpu_source
+        self._level = 0
+        self._changed_at = clock()
+        self._evaluated_at = 0.0
+        self._pressure = {}
+        self._transitions = 0
+        self._pinned = False
+
+        (tracer or get_tracer()).add_listener(self._on_stage)
+
+    def register_session_source(self, callback):
+        """callback() -> jumlah session/stream aktif; semua sumber dijumlahkan"""
+        with self._lock:
+            self._session_sources.append(callback)
+
+    def report(self, signal, value):
+        """Laporkan sample sinyal push, misalnya report('queue_lag', 0.12)"""
+        now = self._clock()
+        with self._lock:
+            previous = self._signal_value(signal, now)
+            ewma = value if previous is None else previous + SIGNAL_EWMA_ALPHA * (value - previous)
+            self._signals[signal] = (ewma, now)
+
+    def _signal_value(self, signal, now):
+        """
+        Nilai EWMA sinyal setelah peluruhan umur sample (lock harus dipegang);
+        None jika belum pernah dilaporkan atau sudah lebih dari SIGNAL_STALE_AFTER
+        """
+        entry = self._signals.get(signal)
+        if entry is None:
+            return None
+        value, updated_at = entry
+        age = now - updated_at
+        if age >= SIGNAL_STALE_AFTER:
+            del self._signals[signal]
+            return None
+        if age > SIGNAL_DECAY_GRACE:
+            value *= 0.5 ** ((age - SIGNAL_DECAY_GRACE) / SIGNAL_HALF_LIFE)
+        return value
+
+    def _on_stage(self, stage, seconds):
+        if stage in self.stage_budgets:
+            self.report(f"stage:{stage}", seconds)
+
+    def pin(self, level=0):
+        """
+        Kunci profil di level tertentu (misalnya untuk benchmark yang harus
+        reproducible); pin(None) mengembalikan pemilihan otomatis
+        """
+        with self._lock:
+            self._pinned = level is not None
+            if level is not None:
+                self._level = level
+            self._changed_at = self._clock()
+
+    def current_profile(self):
+        """Profil aktif (dict dengan level); evaluasi ulang jika interval sudah lewat"""
+        now = self._clock()
+        if not self._pinned and now - self._evaluated_at >= EVALUATE_INTERVAL:
+            self.evaluate(now)
+        profile = self.profiles[self._level]
+        return {'level': self._level, **profile}
+
+    def evaluate(self, now=None):
+        now = now or self._clock()
+        pressure = self._collect_pressure(now)
+
+        with self._lock:
+            self._evaluated_at = now
+            self._pressure = pressure
+            peak = max(pressure.values(), default=0.0)
+            dwell = now - self._changed_at
+
+            level = self._level
+            if peak >= DEGRADE_PRESSURE and level < len(self.profiles) - 1 and dwell >= DEGRADE_DWELL:
+                level += 1
+            elif peak <= RECOVER_PRESSURE and level > 0 and dwell >= RECOVER_DWELL:
+                level -= 1
+
+            if level != self._level:
+                logger.info("⚙️ Governor: %s -> %s (pressure %.2f)",
+                            self.profiles[self._level]['name'], self.profiles[level]['name'], peak)
+                self._level = level
+                self._changed_at = now
+                self._transitions += 1
+        return level
+
+    def _collect_pressure(self, now):
+        with self._lock:
+            signals = {name: self._signal_value(name, now) for name in list(self._signals)}
+            signals = {name: value for name, value in signals.items() if value is not None}
+            session_sources = list(self._session_sources)
+
+        pressure = {}
+        if 'queue_lag' in signals:
+            pressure['queue_lag'] = signals['queue_lag'] / self.limits['queue_lag']
+
+        if self._cpu_source is not None:
+            pressure['cpu'] = self._cpu_source() / self.limits['cpu']
+
+        if session_sources:
+            sessions = 0
+            for source in session_sources:
+                try:
+                    sessions += source()
+                except Exception:
+                    continue
+            pressure['sessions'] = sessions / self.limits['sessions']
+
+        for stage, budget in self.stage_budgets.items():
+            value = signals.get(f"stage:{stage}")
+            if value is not None:
+                pressure[f"stage:{stage}"] = value / budget
+
+        return {name: round(value, 3) for name, value in pressure.items()}
+
+    def get_stats(self):
+        now = self._clock()
+        with self._lock:
+            signals = {name: self._signal_value(name, now) for name in list(self._signals)}
+            return {
+                'profile': self.profiles[self._level]['name'],
+                'level': self._level,
+                'pressure': dict(self._pressure),
+                'signals': {name: round(value, 4) for name, value in signals.items() if value is not None},
+                'limits': dict(self.limits),
+                'stage_budgets': dict(self.stage_budgets),
+                'pinned': self._pinned,
+                'since': self._changed_at,
+                'transitions': self._transitions
+            }
+
+
+# Global governor instance
+governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """Get (atau buat) global performance governor"""
+    global governor
+    with _governor_lock:
+        if governor is None:
+            governor = PerformanceGovernor()
+        return governor
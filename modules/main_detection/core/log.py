@@ -0,0 +1,146 @@
+"""
+Logging setup
+Log dari thread deteksi hanya dimasukkan ke queue (QueueHandler); penulisan ke
+stdout dilakukan thread QueueListener di background sehingga hot path tidak
+pernah menunggu pipe stdout.
+
+- level global lewat LOG_LEVEL (default INFO), per modul lewat LOG_MODULE_LEVELS:
+      LOG_MODULE_LEVELS="detection.ktp_detector_fast=DEBUG,core.retention=WARNING"
+- pesan dengan template yang sama dibatasi LOG_RATE_LIMIT per LOG_RATE_WINDOW
+  detik; jumlah pesan yang ditahan ditampilkan saat template itu lolos lagi
+- detail per contour/kandidat/scale/validator dicatat di DEBUG, jadi pada level
+  default biayanya hanya satu pengecekan isEnabledFor
+
+Di modul: logger = logging.getLogger(__name__); logger.debug("... %.3f", score)
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+LOG_QUEUE_SIZE = 10000      # Record di atas ini dibuang (dihitung) daripada memblok
+LOG_RATE_LIMIT = 20         # Maksimal record per template pesan per window
+LOG_RATE_WINDOW = 10.0      # Detik
+
+_listener = None
+_queue_handler = None
+_setup_lock = threading.Lock()
+
+
+class RateLimitFilter(logging.Filter):
+    """Batasi record dengan (logger, template pesan) yang sama per window waktu"""
+
+    def __init__(self, limit=LOG_RATE_LIMIT, window=LOG_RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._buckets = {}      # key -> [window_start, count, suppressed]
+
+    def filter(self, record):
+        # Berlaku juga untuk ERROR: error per frame tidak boleh membanjiri output
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or now - bucket[0] >= self.window:
+                suppressed = bucket[2] if bucket else 0
+                self._buckets[key] = [now, 1, 0]
+                if len(self._buckets) > 4096:
+                    self._expire(now)
+                if suppressed:
+                    record.msg = f"{record.msg} (+{suppressed} similar suppressed)"
+                return True
+            if bucket[1] < self.limit:
+                bucket[1] += 1
+                return True
+            bucket[2] += 1
+            return False
+
+    def _expire(self, now):
+        for key in [key for key, bucket in self._buckets.items() if now - bucket[0] >= self.window]:
+            del self._buckets[key]
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler yang membuang record saat queue penuh alih-alih memblok caller"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_module_levels(spec):
+    """'detection=DEBUG,core.retention=WARNING' -> {'detection': 'DEBUG', ...}"""
+    levels = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        name, level = item.split('=', 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level=None, module_levels=None, stream=None):
+    """
+    Pasang QueueHandler di root logger dan jalankan QueueListener (idempotent;
+    panggilan berikutnya hanya memperbarui level)
+    """
+    global _listener, _queue_handler
+
+    level = (level or os.environ.get('LOG_LEVEL', 'INFO')).upper()
+    if module_levels is None:
+        module_levels = parse_module_levels(os.environ.get('LOG_MODULE_LEVELS'))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    with _setup_lock:
+        if _listener is not None:
+            return _queue_handler
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        _queue_handler = DroppingQueueHandler(log_queue)
+        _queue_handler.addFilter(RateLimitFilter())
+
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _queue_handler
+
+
+def shutdown_logging():
+    """Flush record yang tersisa di queue dan hentikan listener"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logging_stats():
+    return {
+        'level': logging.getLevelName(logging.getLogger().level),
+        'dropped': _queue_handler.dropped if _queue_handler else 0,
+        'queue_depth': _queue_handler.queue.qsize() if _queue_handler else 0
+    }
@@ -0,0 +1,268 @@
+"""
+Capture retention engine
+Sweeper background yang menghapus capture lama secara bertahap:
+- indeks capture terurut waktu (heap) per storage root, dibangun sekali dari
+  scan lalu diperbarui lewat track() saat file baru ditulis
+- penghapusan dalam batch kecil dengan jeda antar batch (rate limit)
+- metric bytes yang dibebaskan dan backlog capture yang sudah kedaluwarsa
+Modul ini tidak bergantung pada core.config sehingga bisa dipakai juga oleh
+Jitsi bridge.
+"""
+import heapq
+import logging
+import os
+import shutil
+import threading
+import time
+from core.storage_layout import prune_empty_parents
+
+logger = logging.getLogger(__name__)
+
+# Sweeper settings
+RETENTION_SWEEP_INTERVAL = 300       # Detik antar putaran sweep
+RETENTION_RESCAN_INTERVAL = 6 * 3600  # Detik antar scan ulang penuh (file yang ditambah di luar track())
+RETENTION_BATCH_SIZE = 50            # Maksimal item dihapus per batch
+RETENTION_BATCH_PAUSE = 0.5          # Detik jeda antar batch
+
+
+class RetentionRoot:
+    """
+    Satu storage root dengan kebijakan retensi
+    unit: 'file' (hapus per file) atau 'directory' (hapus folder capture, yaitu
+          direktori terdalam yang berisi file, di level mana pun)
+    on_delete(paths): dipanggil setelah satu batch dihapus, misalnya untuk update katalog
+    """
+
+    def __init__(self, name, path, max_age, unit='file', extensions=None, on_delete=None):
+        if unit not in ('file', 'directory'):
+            raise ValueError(f"Unknown retention unit: {unit}")
+        self.name = name
+        self.path = path
+        self.max_age = max_age
+        self.unit = unit
+        self.extensions = extensions
+        self.on_delete = on_delete
+
+        self.heap = []          # (created_at, path, size)
+        self.indexed = set()
+        self.indexed_bytes = 0  # Total size item di heap, diperbarui saat push/pop
+        self.stats = {
+            'deleted': 0,
+            'bytes_reclaimed': 0,
+            'errors': 0,
+            'last_sweep_at': None,
+            'last_scan_at': None
+        }
+
+    def matches(self, path):
+        return self.extensions is None or path.lower().endswith(self.extensions)
+
+
+class RetentionSweeper:
+    """Scheduler retensi untuk beberapa storage root dalam satu thread background"""
+
+    def __init__(self, roots, interval=RETENTION_SWEEP_INTERVAL, rescan_interval=RETENTION_RESCAN_INTERVAL,
+                 batch_size=RETENTION_BATCH_SIZE, batch_pause=RETENTION_BATCH_PAUSE, tasks=None):
+        self.roots = {root.name: root for root in roots}
+        self.tasks = list(tasks or [])  # Callable tambahan tiap putaran, misalnya GC blob
+        self.interval = interval
+        self.rescan_interval = rescan_interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._last_rescan = 0.0
+
+    def start(self):
+        """Jalankan thread sweeper (idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='retention-sweeper', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    def trigger(self):
+        """Minta sweep segera tanpa menunggu interval (tidak memblok)"""
+        self._wakeup.set()
+
+    def track(self, root_name, path, created_at=None, size=None):
+        """Tambahkan item baru ke indeks tanpa menunggu scan ulang"""
+        root = self.roots[root_name]
+        if root.unit == 'file' and not root.matches(path):
+            return
+        if created_at is None:
+            created_at = time.time()
+        if size is None:
+            size = _path_size(path)
+
+        with self._lock:
+            if path in root.indexed:
+                return
+            root.indexed.add(path)
+            root.indexed_bytes += size
+            heapq.heappush(root.heap, (created_at, path, size))
+
+    def get_stats(self):
+        """
+        Metric per root: ukuran indeks, backlog kedaluwarsa, bytes dibebaskan
+        Murah untuk scrape /metrics: ukuran indeks dari counter, backlog hanya
+        menelusuri item heap yang sudah kedaluwarsa (normalnya kecil karena terus di-sweep)
+        """
+        now = time.time()
+        stats = {}
+        with self._lock:
+            for root in self.roots.values():
+                cutoff = now - root.max_age
+                stats[root.name] = {
+                    'path': root.path,
+                    'max_age': root.max_age,
+                    'indexed': len(root.heap),
+                    'indexed_bytes': root.indexed_bytes,
+                    'backlog': _count_expired(root.heap, cutoff),
+                    **root.stats
+                }
+        return stats
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if time.time() - self._last_rescan >= self.rescan_interval:
+                for root in self.roots.values():
+                    self._scan(root)
+                self._last_rescan = time.time()
+
+            for root in self.roots.values():
+                self._sweep(root)
+
+            for task in self.tasks:
+                try:
+                    task()
+                except Exception as e:
+                    logger.warning("⚠️ Retention task error: %s", e)
+
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def _scan(self, root):
+        """Bangun ulang indeks root dari filesystem"""
+        entries = []
+        try:
+            if root.unit == 'file':
+                for dirpath, _, filenames in os.walk(root.path):
+                    for filename in filenames:
+                        path = os.path.join(dirpath, filename)
+                        if not root.matches(path):
+                            continue
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime, path, stat.st_size))
+            else:
+                # Folder lama flat (root/capture_id) maupun layout (root/YYYY/MM/DD/ab/capture_id)
+                for dirpath, dirnames, filenames in os.walk(root.path):
+                    if dirpath == root.path or not filenames:
+                        continue
+                    dirnames.clear()
+                    try:
+                        created_at = os.stat(dirpath).st_mtime
+                    except OSError:
+                        continue
+                    entries.append((created_at, dirpath, _path_size(dirpath)))
+        except FileNotFoundError:
+            pass
+
+        heapq.heapify(entries)
+        with self._lock:
+            root.heap = entries
+            root.indexed = {path for _, path, _ in entries}
+            root.indexed_bytes = sum(size for _, _, size in entries)
+            root.stats['last_scan_at'] = time.time()
+
+    def _sweep(self, root):
+        """Hapus item kedaluwarsa per batch dengan jeda antar batch"""
+        while not self._stopped.is_set():
+            cutoff = time.time() - root.max_age
+            batch = []
+            with self._lock:
+                while root.heap and root.heap[0][0] < cutoff and len(batch) < self.batch_size:
+                    item = heapq.heappop(root.heap)
+                    root.indexed.discard(item[1])
+                    root.indexed_bytes -= item[2]
+                    batch.append(item)
+
+            if not batch:
+                break
+
+            deleted = []
+            reclaimed = 0
+            errors = 0
+            for _, path, size in batch:
+                try:
+                    if root.unit == 'directory':
+                        # Isi folder bisa bertambah setelah di-track, ukur saat dihapus
+                        size = _path_size(path)
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                    prune_empty_parents(path, root.path)
+                    deleted.append(path)
+                    reclaimed += size
+                except FileNotFoundError:
+                    deleted.append(path)
+                except OSError as e:
+                    logger.warning("⚠️ Retention failed to delete %s: %s", path, e)
+                    errors += 1
+
+            if deleted and root.on_delete:
+                try:
+                    root.on_delete(deleted)
+                except Exception as e:
+                    logger.warning("⚠️ Retention callback error for %s: %s", root.name, e)
+
+            with self._lock:
+                root.stats['deleted'] += len(deleted)
+                root.stats['bytes_reclaimed'] += reclaimed
+                root.stats['errors'] += errors
+
+            if len(batch) == self.batch_size:
+                self._stopped.wait(self.batch_pause)
+
+        with self._lock:
+            root.stats['last_sweep_at'] = time.time()
+
+
+def _count_expired(heap, cutoff):
+    """Jumlah item heap dengan created_at < cutoff; subtree yang root-nya belum kedaluwarsa dilewati"""
+    count = 0
+    stack = [0] if heap else []
+    while stack:
+        index = stack.pop()
+        if heap[index][0] >= cutoff:
+            continue
+        count += 1
+        stack.extend(child for child in (2 * index + 1, 2 * index + 2) if child < len(heap))
+    return count
+
+
+def _path_size(path):
+    """Ukuran file, atau total ukuran isi direktori"""
+    try:
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+        total = 0
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
+    except OSError:
+        return 0
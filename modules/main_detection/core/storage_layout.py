@@ -0,0 +1,165 @@
+"""
+Capture storage layout
+Partisi folder capture berdasarkan tanggal dan hash session:
+    YYYY/MM/DD/<2 hex sha1(session_id)>/<session_id>/<filename>
+sehingga tidak ada satu direktori yang berisi ratusan ribu file.
+
+Migrasi folder flat lama (jalankan dari modules/main_detection):
+    python -m core.storage_layout migrate [--dry-run]
+    python -m core.storage_layout migrate-jitsi <path jitsi_captures> [--dry-run]
+"""
+import hashlib
+import os
+import re
+import shutil
+import sys
+from datetime import datetime
+
+SHARD_HEX_DIGITS = 2
+LAYOUT_DIR_PATTERN = re.compile(r'^\d{4}$')
+CAPTURE_ID_TIMESTAMP_PATTERN = re.compile(r'_(\d{9,11})$')
+
+
+def session_shard(session_id):
+    """Shard 2 hex digit (256 bucket) yang stabil untuk satu session"""
+    return hashlib.sha1(session_id.encode('utf-8')).hexdigest()[:SHARD_HEX_DIGITS]
+
+
+def session_relpath(session_id, when):
+    """Path relatif folder session: YYYY/MM/DD/ab/session_id"""
+    return os.path.join(when.strftime('%Y'), when.strftime('%m'), when.strftime('%d'),
+                        session_shard(session_id), session_id)
+
+
+def capture_relpath(session_id, filename, when):
+    """Path relatif satu file capture di dalam layout"""
+    return os.path.join(session_relpath(session_id, when), filename)
+
+
+def parse_capture_timestamp(timestamp):
+    """Timestamp capture main app ('YYYYmmdd_HHMMSS') ke datetime, None jika tidak valid"""
+    try:
+        return datetime.strptime(timestamp, '%Y%m%d_%H%M%S')
+    except (TypeError, ValueError):
+        return None
+
+
+def capture_id_datetime(capture_id):
+    """Waktu dari capture_id bridge ('<session>_<participant>_<unix ts>'), None jika tidak ada"""
+    match = CAPTURE_ID_TIMESTAMP_PATTERN.search(capture_id)
+    if not match:
+        return None
+    return datetime.fromtimestamp(int(match.group(1)))
+
+
+def is_layout_entry(name):
+    """True jika nama entry level pertama adalah folder tahun layout baru"""
+    return bool(LAYOUT_DIR_PATTERN.match(name))
+
+
+def prune_empty_parents(path, root):
+    """Hapus direktori kosong dari parent path ke atas sampai (tidak termasuk) root"""
+    root = os.path.abspath(root)
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory.startswith(root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+
+def migrate_flat_files(capture_dir, catalog, dry_run=False):
+    """
+    Pindahkan file .jpg di level teratas capture_dir ke layout tanggal/shard
+    dan perbarui kolom path di katalog.
+    Returns: (moved, skipped)
+    """
+    from core.capture_catalog import parse_capture_filename
+
+    moved = 0
+    skipped = 0
+    entries = []
+
+    with os.scandir(capture_dir) as iterator:
+        names = [entry.name for entry in iterator if entry.is_file() and entry.name.endswith('.jpg')]
+
+    for filename in names:
+        info = parse_capture_filename(filename)
+        source = os.path.join(capture_dir, filename)
+        when = parse_capture_timestamp(info['timestamp']) if info else None
+        if when is None:
+            skipped += 1
+            continue
+
+        relpath = capture_relpath(info['session_id'], filename, when)
+        if not dry_run:
+            target = os.path.join(capture_dir, relpath)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(source, target)
+            stat = os.stat(target)
+            entries.append({
+                'filename': filename,
+                'path': relpath,
+                'size': stat.st_size,
+                'created_at': stat.st_mtime,
+                **info
+            })
+        moved += 1
+
+        # Catat per batch agar migrasi yang terputus tetap konsisten
+        if len(entries) >= 500:
+            catalog.record(entries)
+            entries = []
+
+    if entries:
+        catalog.record(entries)
+
+    return moved, skipped
+
+
+def migrate_flat_directories(capture_root, dry_run=False):
+    """
+    Pindahkan folder per capture_id di level teratas jitsi_captures ke layout
+    tanggal/shard. Tanggal diambil dari unix timestamp di akhir capture_id,
+    atau mtime folder jika tidak ada.
+    Returns: (moved, skipped)
+    """
+    moved = 0
+    skipped = 0
+
+    with os.scandir(capture_root) as iterator:
+        directories = [entry for entry in iterator
+                       if entry.is_dir(follow_symlinks=False) and not is_layout_entry(entry.name)]
+
+    for entry in directories:
+        when = capture_id_datetime(entry.name) or datetime.fromtimestamp(entry.stat().st_mtime)
+        target = os.path.join(capture_root, session_relpath(entry.name, when))
+        if os.path.exists(target):
+            skipped += 1
+            continue
+        if not dry_run:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(entry.path, target)
+        moved += 1
+
+    return moved, skipped
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if arg != '--dry-run']
+    dry_run = '--dry-run' in sys.argv
+
+    if args[:1] == ['migrate'] and len(args) == 1:
+        from core.config import CAPTURE_DIR
+        from core.capture_catalog import get_capture_catalog
+
+        moved, skipped = migrate_flat_files(CAPTURE_DIR, get_capture_catalog(), dry_run)
+        print(f"✅ {'Would move' if dry_run else 'Moved'} {moved} files into date/shard layout, {skipped} skipped")
+    elif args[:1] == ['migrate-jitsi'] and len(args) == 2:
+        moved, skipped = migrate_flat_directories(args[1], dry_run)
+        print(f"✅ {'Would move' if dry_run else 'Moved'} {moved} capture folders into date/shard layout, {skipped} skipped")
+    else:
+        print("Usage: python -m core.storage_layout migrate [--dry-run]")
+        print("       python -m core.storage_layout migrate-jitsi <jitsi_captures path> [--dry-run]")
+        sys.exit(1)
@@ -0,0 +1,262 @@
+"""
+Detection pipeline tracing
+Span per stage (camera read, color candidates, template match per scale,
+validator, MediaPipe, overlay, JPEG encode, disk write) dicatat ke histogram
+berukuran tetap dan diekspor dalam format teks Prometheus lewat /metrics.
+
+    with trace(f"frame-{sequence}"):
+        with span('camera_read'):
+            success, frame = cap.read()
+
+    @traced('validator', name='lbp')
+    def analyze_lbp_texture(gray_image): ...
+
+Modul ini hanya memakai stdlib dan tidak bergantung pada core.config.
+"""
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Batas bucket histogram dalam detik (frame budget 30 fps = 0.033)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RECENT_TRACES = 50          # Trace terakhir yang disimpan untuk inspeksi
+METRIC_NAME = 'detection_stage_duration_seconds'
+
+_current_trace = contextvars.ContextVar('detection_trace', default=None)
+
+
+class Histogram:
+    """Histogram kumulatif dengan bucket tetap: memori konstan berapa pun jumlah observasi"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # +1 untuk bucket +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q):
+        """Estimasi quantile dengan interpolasi linear di dalam bucket"""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if total == 0:
+            return 0.0
+
+        target = q * total
+        cumulative = 0
+        lower = 0.0
+        for index, count in enumerate(counts):
+            upper = min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+            if cumulative + count >= target and count > 0:
+                return lower + (upper - lower) * (target - cumulative) / count
+            cumulative += count
+            lower = upper
+        return self.max
+
+    def snapshot(self):
+        with self._lock:
+            count = self.count
+            total = self.sum
+            maximum = self.max
+        return {
+            'count': count,
+            'avg_ms': round(total / count * 1000, 3) if count else 0.0,
+            'p50_ms': round(self.quantile(0.5) * 1000, 3),
+            'p95_ms': round(self.quantile(0.95) * 1000, 3),
+            'p99_ms': round(self.quantile(0.99) * 1000, 3),
+            'max_ms': round(maximum * 1000, 3)
+        }
+
+    def cumulative_counts(self):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+            count = self.count
+        cumulative = []
+        running = 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class Tracer:
+    """Kumpulan histogram per (stage, labels) plus trace terakhir per frame/request"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, recent_traces=RECENT_TRACES):
+        self.buckets = buckets
+        self._histograms = {}
+        self._gauges = {}
+        self._listeners = []
+        self._recent = deque(maxlen=recent_traces)
+        self._lock = threading.Lock()
+
+    def histogram(self, stage, labels=None):
+        key = (stage, tuple(sorted((labels or {}).items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def add_listener(self, callback):
+        """callback(stage, seconds) dipanggil untuk setiap durasi yang dicatat"""
+        with self._lock:
+            self._listeners = self._listeners + [callback]
+
+    def _notify(self, stage, seconds):
+        for callback in self._listeners:
+            try:
+                callback(stage, seconds)
+            except Exception:
+                pass
+
+    def observe(self, stage, seconds, **labels):
+        self.histogram(stage, labels).observe(seconds)
+        spans = _current_trace.get()
+        if spans is not None:
+            spans.append((stage, labels, seconds))
+        self._notify(stage, seconds)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def traced(self, stage, **labels):
+        """Decorator: satu span per pemanggilan fungsi"""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(stage, **labels):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def trace(self, trace_id, stage='frame_total'):
+        """
+        Kelompokkan span satu frame/request di bawah trace_id. Total durasi
+        dicatat sebagai stage `stage`; rincian disimpan di recent_traces().
+        """
+        spans = []
+        token = _current_trace.set(spans)
+        start = time.perf_counter()
+        try:
+            yield trace_id
+        finally:
+            duration = time.perf_counter() - start
+            _current_trace.reset(token)
+            self.histogram(stage).observe(duration)
+            self._notify(stage, duration)
+            self._recent.append({
+                'trace_id': trace_id,
+                'started_at': time.time() - duration,
+                'total_ms': round(duration * 1000, 3),
+                'spans': [{'stage': name, **labels, 'ms': round(seconds * 1000, 3)}
+                          for name, labels, seconds in spans]
+            })
+
+    def register_gauge(self, name, help_text, callback):
+        """Gauge yang nilainya diambil saat /metrics di-scrape"""
+        with self._lock:
+            self._gauges[name] = (help_text, callback)
+
+    def recent_traces(self):
+        return list(self._recent)
+
+    def reset(self):
+        """Hapus semua histogram dan trace (gauge dan listener tetap terdaftar)"""
+        with self._lock:
+            self._histograms = {}
+            self._recent.clear()
+
+    def get_stats(self):
+        """Ringkasan per stage (count, avg, p50/p95/p99, max dalam ms)"""
+        with self._lock:
+            items = list(self._histograms.items())
+        stats = {}
+        for (stage, labels), histogram in sorted(items):
+            name = stage + ''.join(f"[{key}={value}]" for key, value in labels)
+            stats[name] = histogram.snapshot()
+        return stats
+
+    def render_prometheus(self):
+        """Ekspor histogram dan gauge dalam Prometheus text exposition format"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            gauges = sorted(self._gauges.items())
+
+        lines = [
+            f"# HELP {METRIC_NAME} Duration of detection pipeline stages",
+            f"# TYPE {METRIC_NAME} histogram"
+        ]
+        for (stage, labels), histogram in items:
+            base_labels = [('stage', stage)] + list(labels)
+            cumulative, total, count = histogram.cumulative_counts()
+            bounds = [_format_bound(bound) for bound in histogram.buckets] + ['+Inf']
+            for bound, value in zip(bounds, cumulative):
+                lines.append(f"{METRIC_NAME}_bucket{_format_labels(base_labels + [('le', bound)])} {value}")
+            lines.append(f"{METRIC_NAME}_sum{_format_labels(base_labels)} {total:.6f}")
+            lines.append(f"{METRIC_NAME}_count{_format_labels(base_labels)} {count}")
+
+        for name, (help_text, callback) in gauges:
+            try:
+                value = float(callback())
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_bound(bound):
+    return f"{bound:g}"
+
+
+def _format_labels(labels):
+    escaped = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+# Global tracer instance
+tracer = Tracer()
+
+
+def get_tracer():
+    return tracer
+
+
+def span(stage, **labels):
+    return tracer.span(stage, **labels)
+
+
+def traced(stage, **labels):
+    return tracer.traced(stage, **labels)
+
+
+def trace(trace_id, stage='frame_total'):
+    return tracer.trace(trace_id, stage)
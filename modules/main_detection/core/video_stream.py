@@ -1,80 +1,127 @@
 """
 Video streaming module with real-time detection overlay
 """
+import itertools
+import logging
+import threading
+import time
 import cv2
 import numpy as np
 from core.config import cap, capture_mode, get_ktp_template, CAMERA_WIDTH, CAMERA_HEIGHT
+from core.governor import get_governor
+from core.tracing import span, trace
 from detection.ktp_detector_template_based import detect_ktp_template_based
 
+logger = logging.getLogger(__name__)
+
+# Jumlah client /video_feed yang sedang aktif (sinyal beban untuk governor)
+_active_streams = 0
+_active_streams_lock = threading.Lock()
+
+def active_stream_count():
+    return _active_streams
+
+def _track_active_streams(delta):
+    global _active_streams
+    with _active_streams_lock:
+        _active_streams += delta
+
 def gen_frames():
-    """Generator untuk video streaming dengan overlay deteksi"""
-    global capture_mode
-    
-    while True:
+    """Generator untuk video streaming dengan overlay deteksi, FPS mengikuti profil governor"""
+    governor = get_governor()
+    _track_active_streams(1)
+    try:
+        next_due = time.time()
+        for frame_number in itertools.count(1):
+            # Queue lag: seberapa jauh stream tertinggal dari jadwal frame
+            now = time.time()
+            governor.report('queue_lag', max(0.0, now - next_due))
+            if next_due > now:
+                time.sleep(next_due - now)
+            next_due = max(next_due, now) + 1.0 / governor.current_profile()['stream_fps']
+            
+            with trace(f"stream-{frame_number}"):
+                chunk = render_stream_frame()
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        _track_active_streams(-1)
+
+def render_stream_frame():
+    """Baca satu frame, jalankan deteksi dan overlay, return chunk multipart (None jika kamera gagal)"""
+    with span('camera_read'):
         success, frame = cap.read()
-        if not success:
-            break
-        
-        # Real-time KTP detection overlay untuk visual feedback
+    if not success:
+        return None
+    
+    # Real-time KTP detection overlay untuk visual feedback
+    ktp_detected = False
+    confidence_score = 0
+    detection_location = None
+    
+    # Template-based detection untuk visual overlay (simplified untuk real-time)
+    try:
+        ktp_detections = detect_ktp_template_based(frame, performance_mode='fast')  # Force fast mode for streaming
+        if ktp_detections:
+            # Ambil deteksi terbaik untuk overlay
+            best_detection = ktp_detections[0]
+            bbox = best_detection['bbox']
+            x, y, w, h = bbox
+            detection_location = (x, y, w, h)
+            confidence_score = best_detection.get('combined_confidence', best_detection['confidence'])
+            ktp_detected = True
+    except Exception as e:
+        logger.warning("⚠️ Real-time detection error: %s", e)
+        # Fallback ke deteksi sederhana jika error
         ktp_detected = False
-        confidence_score = 0
-        detection_location = None
-        
-        # Template-based detection untuk visual overlay (simplified untuk real-time)
-        try:
-            ktp_detections = detect_ktp_template_based(frame, performance_mode='fast')  # Force fast mode for streaming
-            if ktp_detections:
-                # Ambil deteksi terbaik untuk overlay
-                best_detection = ktp_detections[0]
-                bbox = best_detection['bbox']
-                x, y, w, h = bbox
-                detection_location = (x, y, w, h)
-                confidence_score = best_detection.get('combined_confidence', best_detection['confidence'])
-                ktp_detected = True
-        except Exception as e:
-            print(f"⚠️ Real-time detection error: {str(e)}")
-            # Fallback ke deteksi sederhana jika error
-            ktp_detected = False
+    
+    with span('overlay_draw'):
+        frame = draw_detection_overlay(frame, capture_mode, ktp_detected, detection_location, confidence_score)
+    
+    with span('jpeg_encode'):
+        ret, buffer = cv2.imencode('.jpg', frame)
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+
+def draw_detection_overlay(frame, mode, ktp_detected, detection_location, confidence_score):
+    """Gambar kotak deteksi KTP, garis panduan (mode manual) dan status bar"""
+    # Gambar kotak deteksi KTP jika ada
+    if ktp_detected and detection_location:
+        x, y, w, h = detection_location
         
-        # Gambar kotak deteksi KTP jika ada
-        if ktp_detected and detection_location:
-            x, y, w, h = detection_location
-            
-            # Warna kotak berdasarkan confidence
-            if confidence_score > 0.7:
-                color = (0, 255, 0)  # Hijau untuk confidence tinggi
-                label = "KTP DETECTED"
-            elif confidence_score > 0.5:
-                color = (0, 255, 255)  # Kuning untuk confidence sedang
-                label = "KTP FOUND"
-            else:
-                color = (0, 165, 255)  # Orange untuk confidence rendah
-                label = "KTP MAYBE"
-            
-            # Gambar kotak deteksi
-            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
-            
-            # Background untuk text
-            text_bg_y = max(y - 35, 0)
-            cv2.rectangle(frame, (x, text_bg_y), (x + 250, y), color, -1)
-            
-            # Text dengan persentase similarity
-            similarity_percent = int(confidence_score * 100)
-            text = f"{label} - {similarity_percent}%"
-            cv2.putText(frame, text, (x + 5, y - 10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+        # Warna kotak berdasarkan confidence
+        if confidence_score > 0.7:
+            color = (0, 255, 0)  # Hijau untuk confidence tinggi
+            label = "KTP DETECTED"
+        elif confidence_score > 0.5:
+            color = (0, 255, 255)  # Kuning untuk confidence sedang
+            label = "KTP FOUND"
+        else:
+            color = (0, 165, 255)  # Orange untuk confidence rendah
+            label = "KTP MAYBE"
         
-        # Jika mode manual, gambar garis panduan dinamis
-        if capture_mode == 'manual':
-            frame = draw_manual_guides(frame)
+        # Gambar kotak deteksi
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
         
-        # STATUS BAR - Informasi Template Matching
-        frame = draw_status_bar(frame, confidence_score)
+        # Background untuk text
+        text_bg_y = max(y - 35, 0)
+        cv2.rectangle(frame, (x, text_bg_y), (x + 250, y), color, -1)
         
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+        # Text dengan persentase similarity
+        similarity_percent = int(confidence_score * 100)
+        text = f"{label} - {similarity_percent}%"
+        cv2.putText(frame, text, (x + 5, y - 10), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+    
+    # Jika mode manual, gambar garis panduan dinamis
+    if mode == 'manual':
+        frame = draw_manual_guides(frame)
+    
+    # STATUS BAR - Informasi Template Matching
+    frame = draw_status_bar(frame, confidence_score)
+    
+    return frame
 
 def draw_manual_guides(frame):
     """Gambar garis panduan untuk mode manual"""
@@ -0,0 +1,75 @@
+"""
+Streaming ZIP writer
+Menghasilkan arsip ZIP per chunk tanpa membangun seluruh arsip di memori
+"""
+import os
+import zipfile
+
+# Format yang sudah terkompresi disimpan apa adanya (ZIP_STORED)
+STORED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.zip')
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink:
+    """
+    File-like write-only tanpa seek(), menampung output ZipFile sampai di-drain.
+    Karena tidak seekable, zipfile menulis data descriptor setelah tiap entry
+    sehingga header tidak perlu ditulis ulang.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries, chunk_size=CHUNK_SIZE):
+    """
+    Generator chunk bytes arsip ZIP
+    entries: iterable (file_path, arcname). File yang tidak ada dilewati.
+    Memori per download hanya sebesar chunk_size, berapa pun ukuran session.
+    """
+    sink = _ChunkSink()
+
+    with zipfile.ZipFile(sink, 'w') as zip_file:
+        for file_path, arcname in entries:
+            if not os.path.isfile(file_path):
+                continue
+
+            zip_info = zipfile.ZipInfo.from_file(file_path, arcname)
+            if os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS:
+                zip_info.compress_type = zipfile.ZIP_STORED
+            else:
+                zip_info.compress_type = zipfile.ZIP_DEFLATED
+
+            with open(file_path, 'rb') as source, zip_file.open(zip_info, 'w') as target:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+
+            data = sink.drain()
+            if data:
+                yield data
+
+    # Central directory ditulis saat ZipFile ditutup
+    yield sink.drain()
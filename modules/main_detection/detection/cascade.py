@@ -0,0 +1,153 @@
+"""
+Cascade Evaluator
+Jalankan check verifikasi berurutan dari yang paling murah per daya pembeda
+(cost / power) dan berhenti begitu hasil akhirnya sudah pasti:
+
+- early reject (selalu aktif): semua check tersisa diberi nilai maksimum dan
+  hasilnya tetap gagal -> kandidat ditolak tanpa menjalankan sisa check
+- early accept (opt-in): semua check tersisa diberi nilai minimum dan hasilnya
+  tetap lolos -> berhenti. Skor akhir kemudian memakai nilai minimum untuk check
+  yang tidak dijalankan (batas bawah), sehingga skor bisa lebih rendah dari
+  evaluasi penuh; karena itu default-nya mati
+
+can_pass(values) harus monoton: menaikkan nilai satu check tidak boleh membuat
+kandidat yang lolos menjadi gagal. Dengan syarat itu early reject tidak pernah
+mengubah keputusan lolos/gagal dibanding menjalankan semua check.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CASCADE_EARLY_ACCEPT = False    # Default verifier; ubah lewat configure_cascade()
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+class CascadeStage:
+    """
+    Satu check: run() -> nilai numerik di [min_value, max_value]
+    cost: perkiraan waktu relatif (ms); power: perkiraan fraksi kandidat palsu
+    yang gagal di check ini. Urutan = cost / power (murah dan tajam lebih dulu)
+    """
+
+    def __init__(self, name, run, max_value=1.0, min_value=0.0, cost=1.0, power=0.5):
+        self.name = name
+        self.run = run
+        self.max_value = max_value
+        self.min_value = min_value
+        self.cost = cost
+        self.power = power
+
+    @property
+    def priority(self):
+        return self.cost / max(self.power, 0.01)
+
+
+class CascadeResult:
+    def __init__(self, passed, values, stages_run, stages_skipped, decided_early, elapsed):
+        self.passed = passed
+        self.values = values                    # Hanya check yang dijalankan
+        self.stages_run = stages_run
+        self.stages_skipped = stages_skipped
+        self.decided_early = decided_early      # 'reject', 'accept' atau None
+        self.elapsed = elapsed
+
+    def to_dict(self):
+        return {
+            'passed': self.passed,
+            'stages_run': list(self.stages_run),
+            'stages_skipped': list(self.stages_skipped),
+            'decided_early': self.decided_early,
+            'elapsed_ms': round(self.elapsed * 1000, 2)
+        }
+
+
+class Cascade:
+    def __init__(self, name, stages, early_accept=None, ordered=True):
+        self.name = name
+        self.stages = sorted(stages, key=lambda stage: stage.priority) if ordered else list(stages)
+        self.early_accept = CASCADE_EARLY_ACCEPT if early_accept is None else early_accept
+
+    def bounded_values(self, values, bound='min'):
+        """values + nilai min/max untuk check yang belum dijalankan"""
+        filled = {stage.name: getattr(stage, f"{bound}_value") for stage in self.stages}
+        filled.update(values)
+        return filled
+
+    def evaluate(self, can_pass):
+        started = time.perf_counter()
+        values = {}
+        stages_run = []
+        decided_early = None
+        passed = None
+
+        # Bisa saja sudah pasti gagal sebelum check apa pun (misalnya ukuran di luar batas)
+        if not can_pass(self.bounded_values(values, 'max')):
+            passed, decided_early = False, 'reject'
+
+        for index, stage in enumerate(self.stages):
+            if passed is not None:
+                break
+            values[stage.name] = stage.run()
+            stages_run.append(stage.name)
+            if index == len(self.stages) - 1:
+                break
+
+            if not can_pass(self.bounded_values(values, 'max')):
+                passed, decided_early = False, 'reject'
+            elif self.early_accept and can_pass(self.bounded_values(values, 'min')):
+                passed, decided_early = True, 'accept'
+
+        if passed is None:
+            passed = bool(can_pass(values))
+
+        skipped = [stage.name for stage in self.stages if stage.name not in values]
+        result = CascadeResult(passed, values, stages_run, skipped, decided_early,
+                               time.perf_counter() - started)
+        _record(self.name, result)
+        return result
+
+
+def _record(name, result):
+    with _stats_lock:
+        stats = _stats.setdefault(name, {
+            'evaluations': 0, 'passed': 0, 'early_rejects': 0, 'early_accepts': 0,
+            'stages_run': 0, 'stages_total': 0, 'stage_runs': {}
+        })
+        stats['evaluations'] += 1
+        stats['passed'] += int(result.passed)
+        stats['early_rejects'] += int(result.decided_early == 'reject')
+        stats['early_accepts'] += int(result.decided_early == 'accept')
+        stats['stages_run'] += len(result.stages_run)
+        stats['stages_total'] += len(result.stages_run) + len(result.stages_skipped)
+        for stage in result.stages_run:
+            stats['stage_runs'][stage] = stats['stage_runs'].get(stage, 0) + 1
+
+
+def get_cascade_stats():
+    """Per cascade: jumlah evaluasi, early exit, dan fraksi check yang benar-benar dijalankan"""
+    with _stats_lock:
+        return {
+            name: {
+                **{key: value for key, value in stats.items() if key != 'stage_runs'},
+                'stage_runs': dict(stats['stage_runs']),
+                'run_fraction': round(stats['stages_run'] / stats['stages_total'], 3) if stats['stages_total'] else 0.0
+            }
+            for name, stats in _stats.items()
+        }
+
+
+def reset_cascade_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def configure_cascade(early_accept=None):
+    """Aktifkan/matikan early accept untuk semua verifier"""
+    global CASCADE_EARLY_ACCEPT
+    if early_accept is not None:
+        CASCADE_EARLY_ACCEPT = early_accept
+        logger.info("🔧 Cascade early accept: %s", 'on' if early_accept else 'off')
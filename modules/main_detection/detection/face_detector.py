@@ -4,17 +4,19 @@ Face Detection Module using MediaPipe
 import cv2
 import numpy as np
 from core.config import face_detection
+from core.tracing import span
 
-def detect_face(frame):
+def locate_face(frame):
     """
-    Deteksi wajah menggunakan MediaPipe
-    Returns: face image atau None
+    Lokasi wajah terbesar menggunakan MediaPipe
+    Returns: ((x, y, w, h), score) dalam piksel atau None
     """
     h, w, _ = frame.shape
     
     # Deteksi wajah menggunakan MediaPipe
-    results = face_detection.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-    face_img = None
+    with span('mediapipe_face'):
+        results = face_detection.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    best = None
     largest_face_area = 0
     
     if results.detections:
@@ -27,11 +29,25 @@ def detect_face(frame):
                 y1 = max(0, int(bboxC.ymin * h))
                 x2 = min(w, int((bboxC.xmin + bboxC.width) * w))
                 y2 = min(h, int((bboxC.ymin + bboxC.height) * h))
-                crop = frame[y1:y2, x1:x2]
-                if crop.size > 0:
-                    face_img = cv2.resize(crop, (300, 300))
+                score = float(detection.score[0]) if detection.score else 0.0
+                best = ((x1, y1, x2 - x1, y2 - y1), score)
+    
+    return best
+
+def detect_face(frame):
+    """
+    Deteksi wajah menggunakan MediaPipe
+    Returns: face image atau None
+    """
+    located = locate_face(frame)
+    if located is None:
+        return None
     
-    return face_img
+    (x, y, w, h), _ = located
+    crop = frame[y:y+h, x:x+w]
+    if crop.size > 0:
+        return cv2.resize(crop, (300, 300))
+    return None
 
 def detect_ktp_face(ktp_img):
     """
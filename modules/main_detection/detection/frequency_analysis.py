@@ -0,0 +1,149 @@
+"""
+Frequency Analysis Engine
+Spektrum magnitude dan energi per pita radial untuk analyzer PRNU, Fourier dan
+watermark tanpa membangun ulang mask np.ogrid di setiap panggilan.
+
+- FFT memakai rfft2 (input real): spektrum penuh simetris Hermitian sehingga
+  setengah spektrum cukup; kolom yang punya pasangan cermin diberi bobot 2,
+  jadi jumlah energi per pita identik dengan fft2 + fftshift + mask penuh
+- jarak radial dan bobot pita di-cache per shape (LRU, array read-only)
+- scipy.fft menyimpan plan FFT per ukuran; input di-resize ke ukuran kanonik
+  (canonical_resize) agar plan dan mask hampir selalu cache hit
+
+Pita dinyatakan sebagai low_sq < r^2 <= high_sq (r dalam satuan bin frekuensi,
+sama dengan jarak dari pusat spektrum yang sudah di-fftshift). Karena r^2
+selalu bilangan bulat, batas strict r^2 < R^2 ditulis high_sq = R^2 - 1.
+"""
+import functools
+import cv2
+import numpy as np
+from scipy import fft as scipy_fft
+
+FREQUENCY_TARGET_SIZE = 128         # Sisi terpanjang setelah resize (analisis Fourier)
+FREQUENCY_CANONICAL_SHAPE = (80, 128)   # (h, w), rasio KTP 85.6 x 54 mm
+CANONICAL_SNAP_TOLERANCE = 0.08     # Snap ke shape kanonik jika selisih per sisi <= 8%
+LAYOUT_CACHE_SIZE = 64              # Jumlah shape yang mask-nya disimpan
+BAND_CACHE_SIZE = 256
+UNBOUNDED = -1                      # low_sq untuk pita yang mencakup DC
+
+
+@functools.lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def spectrum_layout(shape):
+    """
+    Returns: (radius_sq, column_weights) untuk setengah spektrum rfft2 dengan
+    shape input (h, w). radius_sq berukuran (h, w//2 + 1)
+    """
+    h, w = shape
+    # fftfreq * n = frekuensi integer dengan konvensi yang sama seperti fftshift
+    fy = np.fft.fftfreq(h, 1.0 / h)
+    fx = np.arange(w // 2 + 1, dtype=np.float64)
+    radius_sq = fy[:, None] ** 2 + fx[None, :] ** 2
+
+    # Kolom 0 (dan kolom Nyquist untuk w genap) tidak punya pasangan cermin
+    column_weights = np.full(w // 2 + 1, 2.0)
+    column_weights[0] = 1.0
+    if w % 2 == 0:
+        column_weights[-1] = 1.0
+
+    radius_sq.setflags(write=False)
+    column_weights.setflags(write=False)
+    return radius_sq, column_weights
+
+
+@functools.lru_cache(maxsize=BAND_CACHE_SIZE)
+def band_weights(shape, low_sq=UNBOUNDED, high_sq=None):
+    """Bobot pita low_sq < r^2 <= high_sq (high_sq None = tanpa batas atas) pada setengah spektrum"""
+    radius_sq, column_weights = spectrum_layout(shape)
+    selected = radius_sq > low_sq
+    if high_sq is not None:
+        selected &= radius_sq <= high_sq
+    weights = selected * column_weights
+    weights.setflags(write=False)
+    return weights
+
+
+def magnitude_spectrum(image):
+    """|rfft2(image)|; image dikonversi ke float32 (buffer sementara boleh ditimpa FFT)"""
+    data = np.asarray(image, dtype=np.float32)
+    return np.abs(scipy_fft.rfft2(data, overwrite_x=data is not image))
+
+
+def band_sum(values, shape, low_sq=UNBOUNDED, high_sq=None):
+    """Jumlah values (setengah spektrum) pada pita, setara np.sum(full_spectrum * mask)"""
+    weights = band_weights(shape, low_sq, high_sq)
+    return float(np.dot(values.ravel(), weights.ravel()))
+
+
+def band_count(shape, low_sq=UNBOUNDED, high_sq=None):
+    """Jumlah bin spektrum penuh di dalam pita (setara np.sum(mask))"""
+    return float(band_weights(shape, low_sq, high_sq).sum())
+
+
+def total_sum(values, shape):
+    """Jumlah values pada spektrum penuh"""
+    return float(values.sum(axis=0) @ spectrum_layout(shape)[1])
+
+
+def canonical_resize(gray_image, target_size=FREQUENCY_TARGET_SIZE):
+    """
+    Resize dengan aspect ratio tetap (sisi terpanjang target_size). Jika hasilnya
+    dekat dengan FREQUENCY_CANONICAL_SHAPE, pakai shape kanonik itu agar mask
+    dan plan FFT dipakai ulang antar kandidat
+    """
+    h, w = gray_image.shape[:2]
+    scale = min(target_size / w, target_size / h)
+    new_w, new_h = int(w * scale), int(h * scale)
+
+    canonical_h, canonical_w = FREQUENCY_CANONICAL_SHAPE
+    if (abs(new_h - canonical_h) <= canonical_h * CANONICAL_SNAP_TOLERANCE and
+            abs(new_w - canonical_w) <= canonical_w * CANONICAL_SNAP_TOLERANCE):
+        new_w, new_h = canonical_w, canonical_h
+
+    if new_w != w or new_h != h:
+        gray_image = cv2.resize(gray_image, (new_w, new_h))
+    return gray_image
+
+
+def radial_band_energies(image):
+    """
+    Energi log-spektrum di pita rendah (r <= min/8), menengah (<= min/4) dan
+    tinggi, plus varians masing-masing pita rendah/menengah dihitung seperti
+    np.var(log_spectrum * mask) pada spektrum penuh
+
+    Returns: dict low, mid, high, low_variance, mid_variance
+    """
+    shape = image.shape[:2]
+    h, w = shape
+    log_spectrum = np.log(magnitude_spectrum(image) + 1)
+    squared = log_spectrum * log_spectrum
+    size = h * w
+
+    low_sq = (min(h, w) // 8) ** 2
+    mid_sq = (min(h, w) // 4) ** 2
+
+    low = band_sum(log_spectrum, shape, UNBOUNDED, low_sq)
+    mid = band_sum(log_spectrum, shape, low_sq, mid_sq)
+    high = band_sum(log_spectrum, shape, mid_sq)
+
+    def masked_variance(total, low_bound, high_bound):
+        # var(x * mask) atas seluruh h*w elemen (nol di luar pita ikut dihitung)
+        if band_count(shape, low_bound, high_bound) == 0:
+            return 0.0
+        mean = total / size
+        return band_sum(squared, shape, low_bound, high_bound) / size - mean * mean
+
+    return {
+        'low': low,
+        'mid': mid,
+        'high': high,
+        'low_variance': masked_variance(low, UNBOUNDED, low_sq),
+        'mid_variance': masked_variance(mid, low_sq, mid_sq)
+    }
+
+
+def high_frequency_ratio(image, radius_divisor=4):
+    """Rasio energi magnitude di luar r > min(h, w) // radius_divisor terhadap total"""
+    shape = image.shape[:2]
+    magnitude = magnitude_spectrum(image)
+    high = band_sum(magnitude, shape, (min(shape) // radius_divisor) ** 2)
+    return high / (total_sum(magnitude, shape) + 1e-7)
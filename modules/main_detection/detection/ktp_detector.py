@@ -2,10 +2,78 @@
 KTP Detection Module - 2-Layer Detection System
 """
 import cv2
+import logging
 import numpy as np
 import os
 from core.config import get_ktp_template
+from core.tracing import traced
+from . import frequency_analysis
+from .cascade import Cascade, CascadeStage
 
+logger = logging.getLogger(__name__)
+
+
+class CandidateFeatures:
+    """
+    Cache preprocessing per crop kandidat (gray, HSV, Canny per threshold, CLAHE)
+    yang dipakai bersama oleh 7 pattern check. Dihitung saat pertama diminta
+    sehingga check yang tidak membutuhkan suatu fitur tidak membayar biayanya.
+    """
+
+    def __init__(self, crop):
+        self.crop = crop
+        self._gray = None
+        self._hsv = None
+        self._enhanced = None
+        self._edges = {}
+
+    @property
+    def gray(self):
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.crop, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def hsv(self):
+        if self._hsv is None:
+            self._hsv = cv2.cvtColor(self.crop, cv2.COLOR_BGR2HSV)
+        return self._hsv
+
+    @property
+    def enhanced(self):
+        """High-pass + CLAHE dari gray (preprocessing analisis watermark)"""
+        if self._enhanced is None:
+            blur = cv2.GaussianBlur(self.gray, (7, 7), 0)
+            high_pass = cv2.addWeighted(self.gray, 1.5, blur, -0.5, 0)
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            self._enhanced = clahe.apply(high_pass)
+        return self._enhanced
+
+    def edges(self, low, high, source='gray'):
+        """Canny pada seluruh crop ('gray' atau 'enhanced'), di-cache per threshold"""
+        key = (source, low, high)
+        if key not in self._edges:
+            self._edges[key] = cv2.Canny(getattr(self, source), low, high)
+        return self._edges[key]
+
+
+# Template KTP yang sudah di-preprocess (gray + blur + equalize); dihitung ulang
+# hanya jika object template berganti (reload)
+_prepared_template = (None, None)
+
+
+def get_prepared_template(template):
+    global _prepared_template
+    cached_template, prepared = _prepared_template
+    if cached_template is not template:
+        prepared = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+        prepared = cv2.GaussianBlur(prepared, (3, 3), 0)
+        prepared = cv2.equalizeHist(prepared)
+        _prepared_template = (template, prepared)
+    return prepared
+
+
+@traced('color_candidates')
 def detect_ktp_candidates_by_color_and_shape(frame):
     """
     Layer 1: Deteksi kandidat KTP berdasarkan warna biru dan bentuk persegi panjang
@@ -41,21 +109,21 @@ def detect_ktp_candidates_by_color_and_shape(frame):
                 # Threshold blue ratio yang lebih longgar
                 if blue_ratio >= 0.15:  # Minimal 15% area biru (lebih realistis)
                     candidates.append((x, y, w2, h2, area, blue_ratio))
-                    print(f"🔍 KTP Candidate found: {w2}x{h2}, aspect={aspect:.2f}, blue_ratio={blue_ratio:.2f}")
+                    logger.debug("🔍 KTP Candidate found: %sx%s, aspect=%.2f, blue_ratio=%.2f", w2, h2, aspect, blue_ratio)
                 else:
-                    print(f"🔸 Rejected candidate: blue_ratio={blue_ratio:.2f} < 0.15")
+                    logger.debug("🔸 Rejected candidate: blue_ratio=%.2f < 0.15", blue_ratio)
             else:
-                print(f"🔸 Rejected candidate: aspect={aspect:.2f} not in range [1.2, 2.8]")
+                logger.debug("🔸 Rejected candidate: aspect=%.2f not in range [1.2, 2.8]", aspect)
         else:
-            print(f"🔸 Rejected candidate: area={area} < {0.008 * h * w:.0f}")
+            logger.debug("🔸 Rejected candidate: area=%s < %.0f", area, 0.008 * h * w)
     
-    print(f"🔍 Layer 1: Found {len(candidates)} candidates total")
+    logger.debug("🔍 Layer 1: Found %s candidates total", len(candidates))
     
     # Fallback: jika tidak ada kandidat biru, coba deteksi persegi panjang umum
     if len(candidates) == 0:
-        print("🔄 No blue candidates found, trying fallback detection...")
+        logger.debug("🔄 No blue candidates found, trying fallback detection...")
         candidates = detect_rectangular_candidates_fallback(frame)
-        print(f"🔄 Fallback found {len(candidates)} rectangular candidates")
+        logger.debug("🔄 Fallback found %s rectangular candidates", len(candidates))
     
     return candidates
 
@@ -105,11 +173,50 @@ def detect_rectangular_candidates_fallback(frame):
                         # Fake blue_ratio untuk konsistensi dengan format kandidat
                         fake_blue_ratio = 0.1  # Tandai sebagai fallback
                         candidates.append((x, y, w2, h2, area, fake_blue_ratio))
-                        print(f"🔄 Fallback candidate: {w2}x{h2}, aspect={aspect:.2f}, fill={fill_ratio:.2f}")
+                        logger.debug("🔄 Fallback candidate: %sx%s, aspect=%.2f, fill=%.2f", w2, h2, aspect, fill_ratio)
     
     return candidates
 
 
+def pattern_verification_decision(pattern_confidence, template_confidence, blue_ratio):
+    """
+    Aturan lolos Layer 2 (monoton terhadap pattern dan template confidence)
+    Returns: (passed, reason, final_confidence, critical_patterns_passed)
+    """
+    # Combined scoring dengan emphasis pada pattern recognition
+    final_confidence = (pattern_confidence * 0.7) + (template_confidence * 0.3)
+    
+    # Threshold yang lebih realistis dan fleksibel
+    min_pattern_score = 0.35  # 2.5/7 patterns (lebih realistis untuk webcam)
+    min_combined_score = 0.40  # More achievable combined score
+    
+    # Additional anti-fraud validation dengan logika yang lebih smart
+    critical_patterns_passed = 0
+    
+    # Critical check 1: Blue header OR good template match OR fallback candidate
+    if pattern_confidence >= 0.30 or template_confidence >= 0.45 or blue_ratio <= 0.15:  # Include fallback
+        critical_patterns_passed += 1
+        
+    # Critical check 2: Combined score meets minimum OR strong pattern match
+    if final_confidence >= 0.35 or pattern_confidence >= 0.40:  # Lower thresholds
+        critical_patterns_passed += 1
+    
+    # Simplified validation logic - either strong pattern OR good combined score
+    if pattern_confidence >= min_pattern_score and final_confidence >= min_combined_score:
+        reason = "strong pattern + combined score"
+    elif template_confidence >= 0.50 and critical_patterns_passed >= 1:
+        reason = "strong template matching"
+    elif final_confidence >= 0.45 and critical_patterns_passed >= 2:
+        reason = "good overall score"
+    elif blue_ratio <= 0.15 and pattern_confidence >= 0.25:  # Fallback candidates
+        reason = "fallback detection with reasonable pattern"
+    else:
+        reason = None
+    
+    return reason is not None, reason, final_confidence, critical_patterns_passed
+
+
+@traced('verify_candidate')
 def verify_ktp_candidate_by_template(frame, candidate_region):
     """
     Layer 2: Verifikasi kandidat KTP dengan Pattern Matching untuk fitur KTP asli
@@ -118,216 +225,127 @@ def verify_ktp_candidate_by_template(frame, candidate_region):
         ktp_template = get_ktp_template()
         
         if ktp_template is None:
-            print(f"   ❌ KTP_TEMPLATE is None! Template not loaded properly.")
+            logger.debug("   ❌ KTP_TEMPLATE is None! Template not loaded properly.")
             return 0.0, None
         
         x, y, w, h, area, blue_ratio = candidate_region
         
         # Validate coordinates
         if x < 0 or y < 0 or w <= 0 or h <= 0:
-            print(f"   ❌ Invalid candidate region: ({x},{y}) size {w}x{h}")
+            logger.debug("   ❌ Invalid candidate region: (%s,%s) size %sx%s", x, y, w, h)
             return 0.0, None
             
         # Ensure coordinates are within frame bounds
         frame_height, frame_width = frame.shape[:2]
         if x + w > frame_width or y + h > frame_height:
-            print(f"   ❌ Candidate region out of bounds: ({x},{y}) size {w}x{h} vs frame {frame_width}x{frame_height}")
+            logger.debug("   ❌ Candidate region out of bounds: (%s,%s) size %sx%s vs frame %sx%s", x, y, w, h, frame_width, frame_height)
             return 0.0, None
         
         candidate_crop = frame[y:y+h, x:x+w]
         
         if candidate_crop.size == 0:
-            print(f"   ❌ Empty candidate crop at ({x},{y}) size {w}x{h}")
+            logger.debug("   ❌ Empty candidate crop at (%s,%s) size %sx%s", x, y, w, h)
             return 0.0, None
         
-        print(f"   🔍 Pattern matching candidate: {w}x{h} at ({x},{y}) with blue_ratio={blue_ratio:.2f}")
-        
-        # Pattern Recognition untuk KTP Indonesia
-        pattern_score = 0
-        total_patterns = 7  # Tambah 1 untuk watermark detection
-        
-        # Pattern 1: Blue Header Region Detection
-        try:
-            header_score = detect_blue_header_pattern(candidate_crop)
-            if header_score >= 0.6:
-                pattern_score += 1
-                print(f"   ✅ Pattern 1: Blue header detected ({header_score:.2f})")
-            elif header_score >= 0.4:
-                pattern_score += 0.5
-                print(f"   ⚡ Pattern 1: Weak blue header ({header_score:.2f})")
-            else:
-                print(f"   ❌ Pattern 1: No blue header ({header_score:.2f})")
-        except Exception as e:
-            print(f"   ❌ Pattern 1 error: {str(e)}")
-            header_score = 0
-        
-        # Pattern 2: Text Region Structure
-        try:
-            text_score = detect_text_regions(candidate_crop)
-            if text_score >= 0.5:
-                pattern_score += 1
-                print(f"   ✅ Pattern 2: Text regions found ({text_score:.2f})")
-            elif text_score >= 0.3:
-                pattern_score += 0.5
-                print(f"   ⚡ Pattern 2: Some text regions ({text_score:.2f})")
-            else:
-                print(f"   ❌ Pattern 2: No text structure ({text_score:.2f})")
-        except Exception as e:
-            print(f"   ❌ Pattern 2 error: {str(e)}")
-            text_score = 0
+        logger.debug("   🔍 Pattern matching candidate: %sx%s at (%s,%s) with blue_ratio=%.2f", w, h, x, y, blue_ratio)
+        
+        # Preprocessing dihitung sekali dan dipakai bersama semua pattern check
+        features = CandidateFeatures(candidate_crop)
+        
+        # Pattern Recognition untuk KTP Indonesia (7 pattern + template matching)
+        # dijalankan sebagai cascade: berhenti begitu kandidat pasti gagal
+        total_patterns = len(PATTERN_CHECKS)
+        raw_scores = {}
+        
+        def pattern_stage(name, check, full_threshold, half_threshold):
+            def run():
+                try:
+                    score = check(candidate_crop, features)
+                except Exception as e:
+                    logger.warning("   ❌ Pattern %s error: %s", name, e)
+                    score = 0
+                raw_scores[name] = score
+                return 1 if score >= full_threshold else (0.5 if score >= half_threshold else 0)
+            return run
+        
+        def template_stage():
+            try:
+                return perform_template_matching(candidate_crop, ktp_template, features)
+            except Exception as e:
+                logger.warning("   ❌ Template matching error: %s", e)
+                return 0.0
+        
+        stages = [
+            CascadeStage(name, pattern_stage(name, check, full_threshold, half_threshold), cost=cost, power=power)
+            for name, check, full_threshold, half_threshold, cost, power in PATTERN_CHECKS
+        ]
+        stages.append(CascadeStage('template', template_stage, max_value=TEMPLATE_SCORE_MAX,
+                                   cost=TEMPLATE_MATCH_COST, power=TEMPLATE_MATCH_POWER))
         
-        # Pattern 3: Photo Area Detection
-        try:
-            photo_score = detect_photo_area(candidate_crop)
-            if photo_score >= 0.4:
-                pattern_score += 1
-                print(f"   ✅ Pattern 3: Photo area detected ({photo_score:.2f})")
-            elif photo_score >= 0.25:
-                pattern_score += 0.5
-                print(f"   ⚡ Pattern 3: Possible photo area ({photo_score:.2f})")
-            else:
-                print(f"   ❌ Pattern 3: No photo area ({photo_score:.2f})")
-        except Exception as e:
-            print(f"   ❌ Pattern 3 error: {str(e)}")
-            photo_score = 0
+        def can_pass(values):
+            pattern_score = sum(values[name] for name, *_ in PATTERN_CHECKS)
+            return pattern_verification_decision(pattern_score / total_patterns, values['template'], blue_ratio)[0]
         
-        # Pattern 4: Background Gradient Analysis
-        try:
-            gradient_score = analyze_background_gradient(candidate_crop)
-            if gradient_score >= 0.5:
-                pattern_score += 1
-                print(f"   ✅ Pattern 4: KTP gradient pattern ({gradient_score:.2f})")
-            elif gradient_score >= 0.3:
-                pattern_score += 0.5
-                print(f"   ⚡ Pattern 4: Weak gradient ({gradient_score:.2f})")
-            else:
-                print(f"   ❌ Pattern 4: No KTP gradient ({gradient_score:.2f})")
-        except Exception as e:
-            print(f"   ❌ Pattern 4 error: {str(e)}")
-            gradient_score = 0
+        cascade = Cascade('pattern_verification', stages)
+        outcome = cascade.evaluate(can_pass)
+        values = cascade.bounded_values(outcome.values, 'min')
         
-        # Pattern 5: Edge Density Analysis
-        try:
-            edge_score = analyze_edge_density(candidate_crop)
-            if edge_score >= 0.4:
-                pattern_score += 1
-                print(f"   ✅ Pattern 5: Good edge density ({edge_score:.2f})")
-            elif edge_score >= 0.25:
-                pattern_score += 0.5
-                print(f"   ⚡ Pattern 5: Moderate edges ({edge_score:.2f})")
-            else:
-                print(f"   ❌ Pattern 5: Low edge density ({edge_score:.2f})")
-        except Exception as e:
-            print(f"   ❌ Pattern 5 error: {str(e)}")
-            edge_score = 0
+        for name, *_ in PATTERN_CHECKS:
+            if name in raw_scores:
+                logger.debug("   %s Pattern %s: %.2f (credit %s)", '✅' if values[name] == 1 else ('⚡' if values[name] else '❌'),
+                             name, raw_scores[name], values[name])
         
-        # Pattern 6: Color Distribution Analysis
-        try:
-            color_score = analyze_color_distribution(candidate_crop)
-            if color_score >= 0.5:
-                pattern_score += 1
-                print(f"   ✅ Pattern 6: KTP color pattern ({color_score:.2f})")
-            elif color_score >= 0.3:
-                pattern_score += 0.5
-                print(f"   ⚡ Pattern 6: Partial color match ({color_score:.2f})")
-            else:
-                print(f"   ❌ Pattern 6: Wrong color pattern ({color_score:.2f})")
-        except Exception as e:
-            print(f"   ❌ Pattern 6 error: {str(e)}")
-            color_score = 0
-        
-        # Pattern 7: Watermark Detection (KTP security feature)
-        try:
-            watermark_score = detect_watermark_pattern(candidate_crop)
-            if watermark_score >= 0.4:
-                pattern_score += 1
-                print(f"   ✅ Pattern 7: Watermark detected ({watermark_score:.2f})")
-            elif watermark_score >= 0.25:
-                pattern_score += 0.5
-                print(f"   ⚡ Pattern 7: Possible watermark ({watermark_score:.2f})")
-            else:
-                print(f"   ❌ Pattern 7: No watermark ({watermark_score:.2f})")
-        except Exception as e:
-            print(f"   ❌ Pattern 7 error: {str(e)}")
-            watermark_score = 0
+        if outcome.decided_early == 'reject':
+            logger.debug("   ❌ KTP PATTERN VERIFICATION FAILED early after %s/%s stages (%s)",
+                         len(outcome.stages_run), len(stages), ', '.join(outcome.stages_run))
+            return 0.0, None
         
         # Calculate final pattern confidence
+        pattern_score = sum(values[name] for name, *_ in PATTERN_CHECKS)
         pattern_confidence = pattern_score / total_patterns
-        print(f"   📊 Pattern Analysis: {pattern_score}/{total_patterns} = {pattern_confidence:.2f}")
+        template_confidence = values['template']
+        logger.debug("   📊 Pattern Analysis: %s/%s = %.2f", pattern_score, total_patterns, pattern_confidence)
+        logger.debug("   🔍 Template matching confidence: %.3f", template_confidence)
         
-        # Template matching sebagai validasi tambahan
-        try:
-            template_confidence = perform_template_matching(candidate_crop, ktp_template)
-            print(f"   🔍 Template matching confidence: {template_confidence:.3f}")
-        except Exception as e:
-            print(f"   ❌ Template matching error: {str(e)}")
-            template_confidence = 0.0
-        
-        # Combined scoring dengan emphasis pada pattern recognition
-        final_confidence = (pattern_confidence * 0.7) + (template_confidence * 0.3)
-        
-        # Threshold yang lebih realistis dan fleksibel
-        min_pattern_score = 0.35  # 2.5/7 patterns (lebih realistis untuk webcam)
-        min_template_score = 0.35  # Lower template threshold untuk variasi lighting
-        min_combined_score = 0.40  # More achievable combined score
-        
-        # Additional anti-fraud validation dengan logika yang lebih smart
-        critical_patterns_passed = 0
-        
-        # Critical check 1: Blue header OR good template match OR fallback candidate
-        if pattern_confidence >= 0.30 or template_confidence >= 0.45 or blue_ratio <= 0.15:  # Include fallback
-            critical_patterns_passed += 1
-            
-        # Critical check 2: Combined score meets minimum OR strong pattern match
-        if final_confidence >= 0.35 or pattern_confidence >= 0.40:  # Lower thresholds
-            critical_patterns_passed += 1
-        
-        print(f"   🎯 Final scores - Pattern: {pattern_confidence:.2f}, Template: {template_confidence:.3f}, Combined: {final_confidence:.3f}")
-        print(f"   🔒 Anti-fraud check: {critical_patterns_passed}/2 critical validations passed")
-        
-        # Simplified validation logic - either strong pattern OR good combined score
-        validation_passed = False
-        
-        if pattern_confidence >= min_pattern_score and final_confidence >= min_combined_score:
-            validation_passed = True
-            print(f"   ✅ Passed via strong pattern + combined score")
-        elif template_confidence >= 0.50 and critical_patterns_passed >= 1:
-            validation_passed = True
-            print(f"   ✅ Passed via strong template matching")
-        elif final_confidence >= 0.45 and critical_patterns_passed >= 2:
-            validation_passed = True
-            print(f"   ✅ Passed via good overall score")
-        elif blue_ratio <= 0.15 and pattern_confidence >= 0.25:  # Fallback candidates
-            validation_passed = True
-            print(f"   ✅ Passed via fallback detection with reasonable pattern")
+        validation_passed, reason, final_confidence, critical_patterns_passed = pattern_verification_decision(
+            pattern_confidence, template_confidence, blue_ratio)
+        
+        logger.debug("   🎯 Final scores - Pattern: %.2f, Template: %.3f, Combined: %.3f", pattern_confidence, template_confidence, final_confidence)
+        logger.debug("   🔒 Anti-fraud check: %s/2 critical validations passed", critical_patterns_passed)
         
         if validation_passed:
-            print(f"   ✅ KTP PATTERN VERIFICATION PASSED!")
+            logger.debug("   ✅ Passed via %s", reason)
+            logger.debug("   ✅ KTP PATTERN VERIFICATION PASSED!")
             return final_confidence, {
                 'confidence': template_confidence,
                 'pattern_score': pattern_confidence,
                 'combined_score': final_confidence,
-                'region': candidate_region
+                'region': candidate_region,
+                'stages_run': outcome.stages_run
             }
         else:
-            print(f"   ❌ KTP PATTERN VERIFICATION FAILED! (Critical checks: {critical_patterns_passed}/2)")
+            logger.debug("   ❌ KTP PATTERN VERIFICATION FAILED! (Critical checks: %s/2)", critical_patterns_passed)
             return 0.0, None
             
     except Exception as e:
-        print(f"   ❌ Critical error in KTP verification: {str(e)}")
+        logger.warning("   ❌ Critical error in KTP verification: %s", e)
         return 0.0, None
 
 
 # Pattern Recognition Functions untuk KTP Indonesia
-def detect_blue_header_pattern(candidate_crop):
+@traced('validator', name='blue_header')
+def detect_blue_header_pattern(candidate_crop, features=None):
     """Deteksi pola header biru khas KTP Indonesia - lebih fleksibel"""
     try:
+        features = features or CandidateFeatures(candidate_crop)
         h, w = candidate_crop.shape[:2]
         # Fokus pada area header (bagian atas 30% dari KTP)
         header_region = candidate_crop[0:int(h*0.3), :]
+        if header_region.size == 0:
+            return 0.2  # Sama seperti error cvtColor pada region kosong
         
-        # Konversi ke HSV untuk deteksi biru
-        hsv = cv2.cvtColor(header_region, cv2.COLOR_BGR2HSV)
+        # HSV untuk deteksi biru (konversi per pixel, jadi slice dari HSV crop)
+        hsv = features.hsv[0:int(h*0.3), :]
         
         # Range biru untuk header KTP - lebih luas
         lower_blue = np.array([90, 30, 30])    # Lebih permisif
@@ -356,13 +374,14 @@ def detect_blue_header_pattern(candidate_crop):
         return 0.2  # Default score untuk stability
 
 
-def detect_text_regions(candidate_crop):
+@traced('validator', name='text_regions')
+def detect_text_regions(candidate_crop, features=None):
     """Deteksi area teks yang khas pada KTP"""
     try:
-        gray = cv2.cvtColor(candidate_crop, cv2.COLOR_BGR2GRAY)
+        features = features or CandidateFeatures(candidate_crop)
         
         # Edge detection untuk mencari area teks
-        edges = cv2.Canny(gray, 50, 150)
+        edges = features.edges(50, 150)
         
         # Morphological operations untuk menghubungkan teks
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
@@ -387,9 +406,11 @@ def detect_text_regions(candidate_crop):
         return 0
 
 
-def detect_photo_area(candidate_crop):
+@traced('validator', name='photo_area')
+def detect_photo_area(candidate_crop, features=None):
     """Deteksi area foto pada KTP - critical pattern"""
     try:
+        features = features or CandidateFeatures(candidate_crop)
         h, w = candidate_crop.shape[:2]
         
         # Area foto biasanya di sebelah kiri (25% kiri, tengah vertikal)
@@ -404,13 +425,14 @@ def detect_photo_area(candidate_crop):
         photo_region = candidate_crop[photo_y:photo_y+photo_h, photo_x:photo_x+photo_w]
         
         # Multiple checks for photo area
-        gray = cv2.cvtColor(photo_region, cv2.COLOR_BGR2GRAY)
+        gray = features.gray[photo_y:photo_y+photo_h, photo_x:photo_x+photo_w]
         
         # Check 1: Variance in pixel values (photos have high variance)
         variance = np.var(gray)
         variance_score = min(variance / 1500, 1.0)  # Lower threshold
         
         # Check 2: Edge density (photos have many edges)
+        # Canny di sub-region (border/hysteresis berbeda dengan slice edge crop penuh)
         edges = cv2.Canny(gray, 50, 150)
         edge_density = cv2.countNonZero(edges) / (photo_w * photo_h)
         edge_score = min(edge_density * 15, 1.0)
@@ -429,10 +451,12 @@ def detect_photo_area(candidate_crop):
         return 0
 
 
-def analyze_background_gradient(candidate_crop):
+@traced('validator', name='background_gradient')
+def analyze_background_gradient(candidate_crop, features=None):
     """Analisis gradient background KTP asli - more flexible"""
     try:
-        gray = cv2.cvtColor(candidate_crop, cv2.COLOR_BGR2GRAY)
+        features = features or CandidateFeatures(candidate_crop)
+        gray = features.gray
         h, w = gray.shape
         
         # Skip area foto (kiri) dan fokus ke background area
@@ -475,16 +499,18 @@ def analyze_background_gradient(candidate_crop):
         return 0.3  # Default reasonable score
 
 
-def analyze_edge_density(candidate_crop):
+@traced('validator', name='edge_density')
+def analyze_edge_density(candidate_crop, features=None):
     """Analisis kepadatan edge untuk deteksi KTP asli - more stable"""
     try:
-        gray = cv2.cvtColor(candidate_crop, cv2.COLOR_BGR2GRAY)
+        features = features or CandidateFeatures(candidate_crop)
+        gray = features.gray
         h, w = gray.shape
         
         # Simplified edge analysis for better stability
         
         # Overall edge detection with adaptive threshold
-        edges_overall = cv2.Canny(gray, 30, 100)  # Lower thresholds
+        edges_overall = features.edges(30, 100)  # Lower thresholds
         overall_density = cv2.countNonZero(edges_overall) / (h * w)
         
         # More flexible scoring for edge density
@@ -512,12 +538,14 @@ def analyze_edge_density(candidate_crop):
         return 0.5  # Default reasonable score for stability
 
 
-def analyze_color_distribution(candidate_crop):
+@traced('validator', name='color_distribution')
+def analyze_color_distribution(candidate_crop, features=None):
     """Analisis distribusi warna khas KTP Indonesia - critical pattern"""
     try:
         # Multiple color space analysis
-        hsv = cv2.cvtColor(candidate_crop, cv2.COLOR_BGR2HSV)
-        bgr = candidate_crop.copy()
+        features = features or CandidateFeatures(candidate_crop)
+        hsv = features.hsv
+        bgr = candidate_crop
         h, w = candidate_crop.shape[:2]
         
         # Focus on header region for blue analysis (top 30%)
@@ -566,18 +594,17 @@ def analyze_color_distribution(candidate_crop):
         return 0
 
 
-def perform_template_matching(candidate_crop, template):
+@traced('template_match', method='pattern')
+def perform_template_matching(candidate_crop, template, features=None):
     """Template matching dengan preprocessing optimal"""
     try:
         # Preprocessing candidate
-        gray_candidate = cv2.cvtColor(candidate_crop, cv2.COLOR_BGR2GRAY)
-        gray_candidate = cv2.GaussianBlur(gray_candidate, (3, 3), 0)
+        features = features or CandidateFeatures(candidate_crop)
+        gray_candidate = cv2.GaussianBlur(features.gray, (3, 3), 0)
         gray_candidate = cv2.equalizeHist(gray_candidate)
         
-        # Preprocessing template
-        gray_template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-        gray_template = cv2.GaussianBlur(gray_template, (3, 3), 0)
-        gray_template = cv2.equalizeHist(gray_template)
+        # Preprocessing template (di-cache selama template tidak berganti)
+        gray_template = get_prepared_template(template)
         
         # Resize template untuk match candidate
         h, w = gray_candidate.shape
@@ -596,7 +623,8 @@ def perform_template_matching(candidate_crop, template):
         return 0
 
 
-def detect_watermark_pattern(candidate_crop):
+@traced('validator', name='watermark')
+def detect_watermark_pattern(candidate_crop, features=None):
     """
     Deteksi watermark KTP Indonesia menggunakan pattern analysis
     Watermark KTP memiliki pola subtle yang berulang dengan opacity rendah
@@ -604,20 +632,13 @@ def detect_watermark_pattern(candidate_crop):
     try:
         h, w = candidate_crop.shape[:2]
         
-        # Convert ke grayscale untuk analisis watermark
-        gray = cv2.cvtColor(candidate_crop, cv2.COLOR_BGR2GRAY)
-        
-        # Preprocessing untuk enhance watermark pattern
-        # High-pass filter untuk menonjolkan detail halus
-        blur = cv2.GaussianBlur(gray, (7, 7), 0)
-        high_pass = cv2.addWeighted(gray, 1.5, blur, -0.5, 0)
-        
-        # Adaptive histogram equalization untuk enhance contrast
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(high_pass)
+        # Preprocessing untuk enhance watermark pattern:
+        # high-pass filter + CLAHE (lihat CandidateFeatures.enhanced)
+        features = features or CandidateFeatures(candidate_crop)
+        enhanced = features.enhanced
         
         # Deteksi edge untuk pattern analysis
-        edges = cv2.Canny(enhanced, 20, 60)
+        edges = features.edges(20, 60, source='enhanced')
         
         # Check 1: Distribusi edge yang merata (karakteristik watermark)
         # Bagi gambar jadi 4 kuadran dan hitung edge density
@@ -674,23 +695,18 @@ def detect_watermark_pattern(candidate_crop):
         # Watermark memiliki komponen frekuensi tertentu
         frequency_score = 0
         try:
-            # DFT untuk analisis frekuensi
-            f_transform = np.fft.fft2(enhanced)
-            f_shift = np.fft.fftshift(f_transform)
-            magnitude_spectrum = np.log(np.abs(f_shift) + 1)
+            # DFT untuk analisis frekuensi (setengah spektrum rfft2, mask di-cache per shape)
+            magnitude_spectrum = np.log(frequency_analysis.magnitude_spectrum(enhanced) + 1)
             
-            # Analisis distribusi energi di frekuensi menengah
-            center_y, center_x = h//2, w//2
+            # Ring sampling untuk mid-frequency analysis: (min/8)^2 < r^2 < (min/3)^2
+            shape = enhanced.shape[:2]
+            ring_low_sq = (min(h, w) // 8) ** 2
+            ring_high_sq = (min(h, w) // 3) ** 2 - 1
+            ring_count = frequency_analysis.band_count(shape, ring_low_sq, ring_high_sq)
             
-            # Ring sampling untuk mid-frequency analysis
-            y, x = np.ogrid[:h, :w]
-            mask_inner = ((x - center_x)**2 + (y - center_y)**2) > (min(h,w)//8)**2
-            mask_outer = ((x - center_x)**2 + (y - center_y)**2) < (min(h,w)//3)**2
-            ring_mask = mask_inner & mask_outer
-            
-            if np.sum(ring_mask) > 0:
-                mid_freq_energy = np.mean(magnitude_spectrum[ring_mask])
-                total_energy = np.mean(magnitude_spectrum)
+            if ring_count > 0:
+                mid_freq_energy = frequency_analysis.band_sum(magnitude_spectrum, shape, ring_low_sq, ring_high_sq) / ring_count
+                total_energy = frequency_analysis.total_sum(magnitude_spectrum, shape) / (h * w)
                 
                 if total_energy > 0:
                     frequency_ratio = mid_freq_energy / total_energy
@@ -707,5 +723,26 @@ def detect_watermark_pattern(candidate_crop):
         return final_score if final_score >= 0.15 else 0
         
     except Exception as e:
-        print(f"      Watermark detection error: {str(e)}")
+        logger.warning("      Watermark detection error: %s", e)
         return 0
+
+
+# Pattern check Layer 2 untuk cascade verify_ktp_candidate_by_template:
+# (nama, fungsi, threshold kredit penuh, threshold kredit setengah, cost ms, power)
+# cost diukur pada crop kandidat scene sintetis (tools/generate_ktp_scenes.py),
+# power = fraksi crop non-KTP yang tidak mendapat kredit penuh dari check tersebut
+PATTERN_CHECKS = (
+    ('blue_header', detect_blue_header_pattern, 0.6, 0.4, 0.09, 0.48),
+    ('text_regions', detect_text_regions, 0.5, 0.3, 0.34, 0.61),
+    ('photo_area', detect_photo_area, 0.4, 0.25, 0.45, 0.48),
+    ('background_gradient', analyze_background_gradient, 0.5, 0.3, 0.35, 0.16),
+    ('edge_density', analyze_edge_density, 0.4, 0.25, 0.5, 0.12),
+    ('color_distribution', analyze_color_distribution, 0.5, 0.3, 0.85, 0.59),
+    ('watermark', detect_watermark_pattern, 0.4, 0.25, 2.1, 0.03)
+)
+# Tanpa template confidence rendah kandidat tidak pernah bisa ditolak (jalur
+# "strong template matching"), jadi template diberi power penuh agar berjalan
+# sebelum check pattern yang mahal
+TEMPLATE_MATCH_COST = 2.15
+TEMPLATE_MATCH_POWER = 1.0
+TEMPLATE_SCORE_MAX = 1.001      # matchTemplate *_NORMED bisa sedikit > 1 karena pembulatan float
@@ -3,6 +3,7 @@ Advanced KTP Detection Module - Feature Matching Approach
 Using ORB + SIFT + Homography for robust authentic KTP detection
 """
 import cv2
+import logging
 import numpy as np
 import sys
 import os
@@ -11,13 +12,15 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.config import get_ktp_template
 
+logger = logging.getLogger(__name__)
+
 # Initialize feature detectors with fewer features for better performance
 orb = cv2.ORB_create(nfeatures=500)  # Reduced from 1000
 try:
     sift = cv2.SIFT_create(nfeatures=200)  # Reduced from 500
     SIFT_AVAILABLE = True
 except AttributeError:
-    print("⚠️ SIFT not available, using ORB only")
+    logger.warning("⚠️ SIFT not available, using ORB only")
     SIFT_AVAILABLE = False
 
 # FLANN matcher for SIFT
@@ -52,18 +55,18 @@ def extract_template_features():
     # Direct absolute path to KTP template
     template_path = os.path.join(project_root, "assets", "ktp muka.png")
     
-    print(f"🔍 Looking for template at: {template_path}")
+    logger.info("🔍 Looking for template at: %s", template_path)
     
     if not os.path.exists(template_path):
-        print(f"❌ Template not found at: {template_path}")
+        logger.info("❌ Template not found at: %s", template_path)
         return None, None, None, None
     
     template = cv2.imread(template_path)
     if template is None:
-        print(f"❌ Could not read template from: {template_path}")
+        logger.info("❌ Could not read template from: %s", template_path)
         return None, None, None, None
     
-    print(f"✅ Template loaded successfully from: {template_path}")
+    logger.info("✅ Template loaded successfully from: %s", template_path)
     
     gray_template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
     
@@ -82,7 +85,7 @@ def extract_template_features():
     TEMPLATE_DES_SIFT = des_sift
     TEMPLATE_LOADED = True
     
-    print(f"✅ Template features extracted: ORB={len(kp_orb) if kp_orb else 0}, SIFT={len(kp_sift) if kp_sift else 0}")
+    logger.info("✅ Template features extracted: ORB=%s, SIFT=%s", len(kp_orb) if kp_orb else 0, len(kp_sift) if kp_sift else 0)
     
     return kp_orb, des_orb, kp_sift, des_sift
 
@@ -129,7 +132,7 @@ def detect_ktp_candidates_by_color_and_shape(frame):
                 
                 # Higher blue ratio requirement
                 if blue_ratio >= 0.35:  # At least 35% blue
-                    print(f"🔍 Enhanced KTP Candidate: {w2}x{h2}, aspect={aspect_ratio:.2f}, blue_ratio={blue_ratio:.2f}")
+                    logger.debug("🔍 Enhanced KTP Candidate: %sx%s, aspect=%.2f, blue_ratio=%.2f", w2, h2, aspect_ratio, blue_ratio)
                     candidates.append((x, y, w2, h2, area, blue_ratio))
     
     # Sort by blue ratio (higher is better for authentic KTP)
@@ -144,7 +147,7 @@ def advanced_feature_matching(candidate_crop):
     kp_orb_template, des_orb_template, kp_sift_template, des_sift_template = extract_template_features()
     
     if des_orb_template is None:
-        print(f"   ❌ Template features not available")
+        logger.debug("   ❌ Template features not available")
         return 0.0
     
     gray_candidate = cv2.cvtColor(candidate_crop, cv2.COLOR_BGR2GRAY)
@@ -153,7 +156,7 @@ def advanced_feature_matching(candidate_crop):
     kp_orb, des_orb = orb.detectAndCompute(gray_candidate, None)
     
     if des_orb is None or len(des_orb) < 10:
-        print("   ❌ Insufficient ORB features in candidate")
+        logger.debug("   ❌ Insufficient ORB features in candidate")
         return 0.0
     
     # ORB matching
@@ -163,7 +166,7 @@ def advanced_feature_matching(candidate_crop):
     good_orb_matches = [m for m in orb_matches if m.distance < 50]  # Stricter threshold
     orb_score = len(good_orb_matches) / max(len(kp_orb_template), len(kp_orb)) if len(kp_orb) > 0 else 0
     
-    print(f"   🔍 ORB matches: {len(good_orb_matches)}/{len(orb_matches)}, score: {orb_score:.3f}")
+    logger.debug("   🔍 ORB matches: %s/%s, score: %.3f", len(good_orb_matches), len(orb_matches), orb_score)
     
     # SIFT matching (if available)
     sift_score = 0.0
@@ -182,7 +185,7 @@ def advanced_feature_matching(candidate_crop):
                         good_sift_matches.append(m)
             
             sift_score = len(good_sift_matches) / max(len(kp_sift_template), len(kp_sift)) if len(kp_sift) > 0 else 0
-            print(f"   🔍 SIFT matches: {len(good_sift_matches)}, score: {sift_score:.3f}")
+            logger.debug("   🔍 SIFT matches: %s, score: %.3f", len(good_sift_matches), sift_score)
             
             # Homography validation for geometric consistency
             if len(good_sift_matches) >= 8:  # Need minimum matches for homography
@@ -194,10 +197,10 @@ def advanced_feature_matching(candidate_crop):
                     if M is not None:
                         inliers = np.sum(mask)
                         homography_score = inliers / len(good_sift_matches)
-                        print(f"   🔍 Homography inliers: {inliers}/{len(good_sift_matches)}, score: {homography_score:.3f}")
+                        logger.debug("   🔍 Homography inliers: %s/%s, score: %.3f", inliers, len(good_sift_matches), homography_score)
                         sift_score *= homography_score  # Multiply by geometric consistency
                 except:
-                    print("   ❌ Homography calculation failed")
+                    logger.warning("   ❌ Homography calculation failed")
     
     # Combined feature score
     if SIFT_AVAILABLE:
@@ -250,7 +253,7 @@ def texture_analysis(candidate_crop):
     else:
         texture_score = 0.3
     
-    print(f"   🔍 Texture entropy: {entropy:.2f}, score: {texture_score:.2f}")
+    logger.debug("   🔍 Texture entropy: %.2f, score: %.2f", entropy, texture_score)
     return texture_score
 
 def verify_ktp_candidate_by_advanced_matching(frame, candidate_region):
@@ -272,7 +275,7 @@ def verify_ktp_candidate_by_advanced_matching(frame, candidate_region):
         if candidate_crop.size == 0:
             return 0.0, None
         
-        print(f"   🔍 Fast verification: {w}x{h} at ({x},{y}) with blue_ratio={blue_ratio:.2f}")
+        logger.debug("   🔍 Fast verification: %sx%s at (%s,%s) with blue_ratio=%.2f", w, h, x, y, blue_ratio)
         
         # FAST MODE: Simplified scoring
         
@@ -307,14 +310,14 @@ def verify_ktp_candidate_by_advanced_matching(frame, candidate_region):
         # 4. Size check
         size_score = 1.0 if (60 <= w <= 500 and 40 <= h <= 300) else 0.5
         
-        print(f"   📊 Fast Scores - Feature: {feature_score:.3f}, Texture: {texture_score:.2f}, Header: {header_score:.2f}, Size: {size_score:.2f}")
+        logger.debug("   📊 Fast Scores - Feature: %.3f, Texture: %.2f, Header: %.2f, Size: %.2f", feature_score, texture_score, header_score, size_score)
         
         # Simplified scoring (reduced weight on expensive feature matching)
         final_score = (feature_score * 0.3 + texture_score * 0.3 + header_score * 0.3 + size_score * 0.1)
         
         # More lenient threshold for better usability
         if final_score >= 0.2:  # Lower threshold
-            print(f"   ✅ FAST KTP VERIFICATION PASSED! Score: {final_score:.3f}")
+            logger.debug("   ✅ FAST KTP VERIFICATION PASSED! Score: %.3f", final_score)
             return final_score, {
                 'confidence': final_score,
                 'feature_score': feature_score,
@@ -323,9 +326,9 @@ def verify_ktp_candidate_by_advanced_matching(frame, candidate_region):
                 'region': candidate_region
             }
         else:
-            print(f"   ❌ FAST KTP VERIFICATION FAILED! Score: {final_score:.3f}")
+            logger.debug("   ❌ FAST KTP VERIFICATION FAILED! Score: %.3f", final_score)
             return 0.0, None
             
     except Exception as e:
-        print(f"   ❌ Error in fast verification: {str(e)}")
+        logger.error("   ❌ Error in fast verification: %s", e)
         return 0.0, None
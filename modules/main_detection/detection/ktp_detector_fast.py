@@ -3,6 +3,7 @@ Fast KTP Detection Module - Optimized for Performance
 Simple and efficient KTP detection without heavy feature matching
 """
 import cv2
+import logging
 import numpy as np
 import sys
 import os
@@ -10,6 +11,9 @@ import os
 # Add path to access config module
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.config import get_ktp_template
+from detection.cascade import Cascade, CascadeStage
+
+logger = logging.getLogger(__name__)
 
 def lightweight_template_match(candidate_crop, ktp_template):
     """
@@ -50,12 +54,12 @@ def lightweight_template_match(candidate_crop, ktp_template):
         # Combine scores
         final_template_score = (max_val * 0.7 + edge_score * 0.3)
         
-        print(f"      📋 Template details: correlation={max_val:.3f}, edge={edge_score:.3f}, final={final_template_score:.3f}")
+        logger.debug("      📋 Template details: correlation=%.3f, edge=%.3f, final=%.3f", max_val, edge_score, final_template_score)
         
         return final_template_score
         
     except Exception as e:
-        print(f"      ❌ Template matching error: {str(e)}")
+        logger.warning("      ❌ Template matching error: %s", e)
         return 0.3  # Low but not zero score on error
 
 def detect_ktp_candidates_by_color_and_shape(frame):
@@ -65,13 +69,13 @@ def detect_ktp_candidates_by_color_and_shape(frame):
     candidates = []
     h, w, _ = frame.shape
     
-    print(f"🔍 Scanning frame {w}x{h} for KTP candidates...")
+    logger.debug("🔍 Scanning frame %sx%s for KTP candidates...", w, h)
     
     # Resize for speed if frame is too large
     scale = 0.5 if min(h, w) > 640 else 1.0
     if scale < 1.0:
         work_frame = cv2.resize(frame, None, fx=scale, fy=scale)
-        print(f"   Resized to {work_frame.shape[1]}x{work_frame.shape[0]} (scale={scale})")
+        logger.debug("   Resized to %sx%s (scale=%s)", work_frame.shape[1], work_frame.shape[0], scale)
     else:
         work_frame = frame
     
@@ -94,11 +98,11 @@ def detect_ktp_candidates_by_color_and_shape(frame):
     # Find contours
     contours, _ = cv2.findContours(blue_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     
-    print(f"   Found {len(contours)} blue contours")
+    logger.debug("   Found %s blue contours", len(contours))
     
     # Early exit if no significant blue areas
     if len(contours) == 0:
-        print("   ❌ No blue contours found")
+        logger.debug("   ❌ No blue contours found")
         return candidates
     
     for i, contour in enumerate(contours):
@@ -107,7 +111,7 @@ def detect_ktp_candidates_by_color_and_shape(frame):
         # EXTREMELY STRICT minimum area to avoid ANY small blue objects
         min_area = 5000 * (scale ** 2)  # Increased from 2000 to 5000
         
-        print(f"   Contour {i+1}: area={area:.0f} (min={min_area:.0f})")
+        logger.debug("   Contour %s: area=%.0f (min=%.0f)", i+1, area, min_area)
         
         if area > min_area:
             x, y, w2, h2 = cv2.boundingRect(contour)
@@ -121,7 +125,7 @@ def detect_ktp_candidates_by_color_and_shape(frame):
             
             aspect_ratio = w2 / h2 if h2 > 0 else 0
             
-            print(f"      Size: {w2}x{h2}, aspect={aspect_ratio:.2f}")
+            logger.debug("      Size: %sx%s, aspect=%.2f", w2, h2, aspect_ratio)
             
             # EXTREMELY STRICT KTP aspect ratio range
             if 1.55 <= aspect_ratio <= 1.85:  # Very narrow KTP-specific range
@@ -131,31 +135,37 @@ def detect_ktp_candidates_by_color_and_shape(frame):
                 roi_blue_mask = cv2.inRange(roi_hsv, lower_blue, upper_blue)
                 blue_ratio = cv2.countNonZero(roi_blue_mask) / (w2 * h2)
                 
-                print(f"      Blue ratio: {blue_ratio:.3f}")
+                logger.debug("      Blue ratio: %.3f", blue_ratio)
                 
                 # EXTREMELY STRICT blue ratio threshold
                 if blue_ratio >= 0.6:  # Very high threshold - 60% blue content required
-                    print(f"🔍 Fast KTP Candidate: {w2}x{h2}, aspect={aspect_ratio:.2f}, blue_ratio={blue_ratio:.2f}")
+                    logger.debug("🔍 Fast KTP Candidate: %sx%s, aspect=%.2f, blue_ratio=%.2f", w2, h2, aspect_ratio, blue_ratio)
                     candidates.append((x, y, w2, h2, area, blue_ratio))
                 else:
-                    print(f"   ❌ Rejected: blue_ratio {blue_ratio:.3f} < 0.6")
+                    logger.debug("   ❌ Rejected: blue_ratio %.3f < 0.6", blue_ratio)
             else:
-                print(f"   ❌ Rejected: aspect ratio {aspect_ratio:.2f} not in [1.55, 1.85]")
+                logger.debug("   ❌ Rejected: aspect ratio %.2f not in [1.55, 1.85]", aspect_ratio)
         else:
-            print(f"   ❌ Rejected: area {area:.0f} < {min_area:.0f}")
+            logger.debug("   ❌ Rejected: area %.0f < %.0f", area, min_area)
     
     # Limit to 2 best candidates to avoid lag
     if len(candidates) > 2:
         candidates = sorted(candidates, key=lambda x: x[5], reverse=True)[:2]
-        print(f"   📊 Limited to top 2 candidates")
+        logger.debug("   📊 Limited to top 2 candidates")
     
     if len(candidates) == 0:
-        print("   ❌ NO VALID KTP CANDIDATES FOUND")
+        logger.debug("   ❌ NO VALID KTP CANDIDATES FOUND")
     else:
-        print(f"   ✅ {len(candidates)} candidate(s) passed initial screening")
+        logger.debug("   ✅ %s candidate(s) passed initial screening", len(candidates))
     
     return candidates
 
+def fast_verification_score(header_score, template_score, texture_score, size_score, aspect_score):
+    return (header_score * 0.3 + template_score * 0.3 + texture_score * 0.2 + size_score * 0.1 + aspect_score * 0.1)
+
+def fast_verification_passed(final_score, template_score):
+    return final_score >= 0.65 and template_score >= 0.4
+
 def verify_ktp_candidate_fast(frame, candidate_region):
     """
     Fast KTP verification WITH lightweight template matching
@@ -175,86 +185,108 @@ def verify_ktp_candidate_fast(frame, candidate_region):
         if candidate_crop.size == 0:
             return 0.0, None
         
-        print(f"   🔍 Fast verification: {w}x{h} at ({x},{y}) with blue_ratio={blue_ratio:.2f}")
+        logger.debug("   🔍 Fast verification: %sx%s at (%s,%s) with blue_ratio=%.2f", w, h, x, y, blue_ratio)
         
         # Load KTP template for comparison
         ktp_template = get_ktp_template()
-        if ktp_template is None:
-            print("   ⚠️ Warning: No KTP template loaded, proceeding without template matching")
-            template_score = 0.5  # Neutral score
-        else:
-            # Lightweight template matching
-            template_score = lightweight_template_match(candidate_crop, ktp_template)
-            print(f"   📋 Template Match Score: {template_score:.3f}")
         
         # 1. Blue header score (most important for KTP) - Stricter
         header_score = 1.0 if blue_ratio >= 0.5 else (0.6 if blue_ratio >= 0.4 else 0.2)
         
+        # 4. Size score (stricter)
+        size_score = 1.0 if (80 <= w <= 400 and 50 <= h <= 250) else 0.4
+        
+        # 5. Aspect ratio score (stricter)
+        aspect_ratio = w / h
+        aspect_score = 1.0 if (1.5 <= aspect_ratio <= 1.9) else 0.4
+        
         # 2. Template matching score (NEW - prevents false positives from other blue cards)
         # This will distinguish KTP from credit cards, SIM cards, etc.
+        def template_stage():
+            if ktp_template is None:
+                logger.debug("   ⚠️ Warning: No KTP template loaded, proceeding without template matching")
+                return 0.5  # Neutral score
+            # Lightweight template matching
+            template_score = lightweight_template_match(candidate_crop, ktp_template)
+            logger.debug("   📋 Template Match Score: %.3f", template_score)
+            return template_score
         
         # 3. Enhanced texture score with anti-digital validation
-        gray = cv2.cvtColor(candidate_crop, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
-        edge_density = np.sum(edges > 0) / (w * h)
-        
-        # Digital/PDF detection: Check for uniform patterns (pixelation artifacts)
-        hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
-        hist_peaks = np.sum(hist > np.max(hist) * 0.1)  # Count significant peaks
-        digital_penalty = 0.3 if hist_peaks < 10 else 0.0  # Penalize too few gray levels
+        def texture_stage():
+            gray = cv2.cvtColor(candidate_crop, cv2.COLOR_BGR2GRAY)
+            edges = cv2.Canny(gray, 50, 150)
+            edge_density = np.sum(edges > 0) / (w * h)
+            
+            # Digital/PDF detection: Check for uniform patterns (pixelation artifacts)
+            hist = cv2.calcHist([gray], [0], None, [256], [0, 256])
+            hist_peaks = np.sum(hist > np.max(hist) * 0.1)  # Count significant peaks
+            digital_penalty = 0.3 if hist_peaks < 10 else 0.0  # Penalize too few gray levels
+            
+            return max(0.0, min(edge_density * 8, 1.0) - digital_penalty)
         
-        texture_score = max(0.0, min(edge_density * 8, 1.0) - digital_penalty)
+        # Header/size/aspect sudah diketahui: kandidat yang tidak mungkin lolos
+        # bahkan dengan template dan texture maksimal ditolak tanpa analisis gambar
+        cascade = Cascade('fast_verification', [
+            CascadeStage('template', template_stage, max_value=1.001, min_value=-1.0, cost=1.2, power=0.8),
+            CascadeStage('texture', texture_stage, cost=0.5, power=0.3)
+        ])
+        outcome = cascade.evaluate(lambda values: fast_verification_passed(
+            fast_verification_score(header_score, values['template'], values['texture'], size_score, aspect_score),
+            values['template']))
         
-        # 4. Size score (stricter)
-        size_score = 1.0 if (80 <= w <= 400 and 50 <= h <= 250) else 0.4
+        if outcome.decided_early == 'reject':
+            logger.debug("   ❌ FAST KTP VERIFICATION FAILED early after %s (header %.2f, size %.2f, aspect %.2f)",
+                         outcome.stages_run or 'no analysis', header_score, size_score, aspect_score)
+            return 0.0, None
         
-        # 5. Aspect ratio score (stricter)
-        aspect_ratio = w / h
-        aspect_score = 1.0 if (1.5 <= aspect_ratio <= 1.9) else 0.4
+        values = cascade.bounded_values(outcome.values, 'min')
+        template_score = values['template']
+        texture_score = values['texture']
         
-        print(f"   📊 Fast Scores - Header: {header_score:.2f}, Template: {template_score:.2f}, Texture: {texture_score:.2f}, Size: {size_score:.2f}, Aspect: {aspect_score:.2f}")
+        logger.debug("   📊 Fast Scores - Header: %.2f, Template: %.2f, Texture: %.2f, Size: %.2f, Aspect: %.2f", header_score, template_score, texture_score, size_score, aspect_score)
         
         # NEW 5-component scoring with template matching
-        final_score = (header_score * 0.3 + template_score * 0.3 + texture_score * 0.2 + size_score * 0.1 + aspect_score * 0.1)
+        final_score = fast_verification_score(header_score, template_score, texture_score, size_score, aspect_score)
         
         # Higher threshold to block fake KTPs AND other blue cards
-        if final_score >= 0.65 and template_score >= 0.4:  # Must pass both overall AND template threshold
-            print(f"   ✅ FAST KTP VERIFICATION PASSED! Score: {final_score:.3f} (Template: {template_score:.3f})")
+        if fast_verification_passed(final_score, template_score):  # Must pass both overall AND template threshold
+            logger.debug("   ✅ FAST KTP VERIFICATION PASSED! Score: %.3f (Template: %.3f)", final_score, template_score)
             return final_score, {
                 'confidence': final_score,
                 'header_score': header_score,
                 'template_score': template_score,
                 'texture_score': texture_score,
                 'size_score': size_score,
-                'region': candidate_region
+                'region': candidate_region,
+                'stages_run': outcome.stages_run
             }
         else:
-            print(f"   ❌ FAST KTP VERIFICATION FAILED! Score: {final_score:.3f}, Template: {template_score:.3f} (need both ≥0.65 and template ≥0.4)")
+            logger.debug("   ❌ FAST KTP VERIFICATION FAILED! Score: %.3f, Template: %.3f (need both ≥0.65 and template ≥0.4)", final_score, template_score)
             return 0.0, None
             
     except Exception as e:
-        print(f"   ❌ Error in fast verification: {str(e)}")
+        logger.error("   ❌ Error in fast verification: %s", e)
         return 0.0, None
 
 def detect_ktp_in_frame(frame):
     """
     Main KTP detection function - FAST VERSION
     """
-    print("🔍 Layer 1: Detecting KTP candidates by color and shape...")
+    logger.debug("🔍 Layer 1: Detecting KTP candidates by color and shape...")
     candidates = detect_ktp_candidates_by_color_and_shape(frame)
     
     if not candidates:
-        print("❌ No KTP candidates found in Layer 1")
+        logger.debug("❌ No KTP candidates found in Layer 1")
         return False, 0.0, None
     
-    print(f"   Found {len(candidates)} KTP candidate(s)")
-    print("🎯 Layer 2: Verifying candidates with fast matching...")
+    logger.debug("   Found %s KTP candidate(s)", len(candidates))
+    logger.debug("🎯 Layer 2: Verifying candidates with fast matching...")
     
     best_confidence = 0.0
     best_result = None
     
     for i, candidate in enumerate(candidates):
-        print(f"   Testing candidate {i+1}/{len(candidates)}")
+        logger.debug("   Testing candidate %s/%s", i+1, len(candidates))
         confidence, result = verify_ktp_candidate_fast(frame, candidate)
         
         if confidence > best_confidence:
@@ -262,8 +294,8 @@ def detect_ktp_in_frame(frame):
             best_result = result
     
     if best_confidence > 0:
-        print(f"✅ KTP VERIFIED! Final confidence: {best_confidence:.3f}")
+        logger.debug("✅ KTP VERIFIED! Final confidence: %.3f", best_confidence)
         return True, best_confidence, best_result
     else:
-        print("❌ No candidates passed template verification")
+        logger.debug("❌ No candidates passed template verification")
         return False, 0.0, None
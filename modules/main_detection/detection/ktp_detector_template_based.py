@@ -9,16 +9,25 @@ Performance Modes:
 - ADAPTIVE: Choose mode based on detection confidence and image size
 """
 import cv2
+import logging
 import numpy as np
 import os
+import threading
 import time
 from core.config import get_ktp_template
+from core.governor import get_governor
+from core.tracing import Histogram, span, traced
+from .cascade import Cascade, CascadeStage
+from .frequency_analysis import canonical_resize, high_frequency_ratio, radial_band_energies
+from .nms import NMS_IOU_THRESHOLD, iou_matrix, suppress_detections
+from .response_peaks import find_response_peaks, peak_window
 from .template_manager import get_template_manager, get_adaptive_template, initialize_template_manager
 from scipy import ndimage
 from skimage.feature import local_binary_pattern, graycomatrix, graycoprops
-from scipy.fft import fft2, fftshift
 import pywt
 
+logger = logging.getLogger(__name__)
+
 # === ADAPTIVE THRESHOLDS CONFIGURATION ===
 class AuthenticityThresholds:
     """
@@ -66,22 +75,97 @@ class AuthenticityThresholds:
         
         return thresholds
 
+# Scale template matching default (profil governor 'full')
+TEMPLATE_SCALES = (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2)
+TEMPLATE_MATCH_THRESHOLD = 0.6  # High threshold untuk template similarity
+# Peak response yang tidak overlap per scale. 1 = perilaku lama persis (minMaxLoc,
+# ranking confidence). Lebih dari 1: kandidat di-rank dengan rank_score (z-score peak
+# terhadap response map method-nya sendiri) karena confidence mentah antar method
+# tidak sebanding (TM_CCORR_NORMED hampir selalu ~0.9 di mana saja). Pada scene
+# sintetis (seed 5 / seed 11) nilai 3 menaikkan KTP di top-1 dari 1/60 -> 7/60 dan
+# 0/67 -> 4/67, di top-3 dari 10/60 -> 17/60 dan 4/67 -> 18/67, dengan waktu
+# deteksi per frame yang setara
+TEMPLATE_PEAKS_PER_SCALE = 3
+RANK_SCORE_EPSILON = 1e-6       # Hindari pembagian nol pada response map datar
+TEXTURE_VALIDATORS = ('lbp', 'glcm', 'prnu', 'fourier')
+MAX_RANKED_DETECTIONS = 3
+DETECTION_SOFT_NMS = None       # None = greedy NMS; 'linear'/'gaussian' = soft-NMS (lihat detection/nms.py)
+
+
+def ranking_key(peaks_per_scale):
+    """Key skor untuk ranking kandidat: confidence mentah untuk 1 peak (perilaku lama), rank_score untuk top-k"""
+    return 'rank_score' if peaks_per_scale > 1 else 'confidence'
+
+# Urutan cascade validate_ktp_detection: cost = ms rata-rata dan power = fraksi
+# region non-KTP yang gagal check tersebut, diukur pada scene sintetis
+# (tools/generate_ktp_scenes.py); power template_confidence bergantung detector
+VALIDATION_CHECK_COSTS = {
+    'aspect_ratio': {'cost': 0.001, 'power': 0.84},
+    'size': {'cost': 0.001, 'power': 0.38},
+    'template_confidence': {'cost': 0.001, 'power': 0.5},
+    'edge_density': {'cost': 0.23, 'power': 0.81},
+    'color_variance': {'cost': 1.3, 'power': 0.19},
+    'fourier': {'cost': 1.43, 'power': 0.81},
+    'lbp': {'cost': 7.5, 'power': 0.96},
+    'prnu': {'cost': 0.86, 'power': 0.05},
+    'glcm': {'cost': 2.6, 'power': 0.05}
+}
+
 # === PERFORMANCE MONITORING ===
+ANALYSIS_TIME_BUCKETS_MS = (1, 2.5, 5, 10, 20, 33, 50, 100, 250, 500, 1000)
+ANALYSIS_TIME_EWMA_ALPHA = 0.1   # Bobot sample terbaru (~10 deteksi terakhir dominan)
+FAST_MODE_TOTAL_MS = 100         # Total rata-rata analisis di atas ini -> fast mode
+
 class PerformanceMonitor:
+    """
+    Statistik waktu analisis per stage dengan memori konstan:
+    EWMA O(1) untuk keputusan fast mode, histogram bucket tetap untuk p50/p95/p99.
+    Aman dipanggil dari beberapa thread.
+    """
     def __init__(self):
-        self.analysis_times = {}
-        self.total_detections = 0
-        self.fast_mode_used = 0
-        
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self.ewma = {}          # analysis_type -> EWMA waktu (ms)
+            self.histograms = {}    # analysis_type -> Histogram (ms)
+            self.total_detections = 0
+            self.fast_mode_used = 0
+    
     def log_analysis_time(self, analysis_type, duration):
-        if analysis_type not in self.analysis_times:
-            self.analysis_times[analysis_type] = []
-        self.analysis_times[analysis_type].append(duration)
+        with self._lock:
+            previous = self.ewma.get(analysis_type)
+            if previous is None:
+                self.ewma[analysis_type] = duration
+            else:
+                self.ewma[analysis_type] = previous + ANALYSIS_TIME_EWMA_ALPHA * (duration - previous)
+            histogram = self.histograms.get(analysis_type)
+            if histogram is None:
+                histogram = self.histograms[analysis_type] = Histogram(ANALYSIS_TIME_BUCKETS_MS)
+        histogram.observe(duration)
+    
+    def log_detection(self, fast_mode=False):
+        with self._lock:
+            self.total_detections += 1
+            if fast_mode:
+                self.fast_mode_used += 1
     
     def get_average_time(self, analysis_type):
-        if analysis_type in self.analysis_times:
-            return np.mean(self.analysis_times[analysis_type])
-        return 0
+        """EWMA waktu analisis dalam ms (0 jika belum ada data)"""
+        return self.ewma.get(analysis_type, 0)
+    
+    def get_percentiles(self, analysis_type):
+        histogram = self.histograms.get(analysis_type)
+        if histogram is None:
+            return {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+        return {
+            'count': histogram.count,
+            'p50': round(histogram.quantile(0.5), 2),
+            'p95': round(histogram.quantile(0.95), 2),
+            'p99': round(histogram.quantile(0.99), 2),
+            'max': round(histogram.max, 2)
+        }
     
     def should_use_fast_mode(self, current_load=None):
         """Determine if fast mode should be used based on performance"""
@@ -90,14 +174,16 @@ class PerformanceMonitor:
         
         # If average analysis time is too high, switch to fast mode
         avg_total = sum(self.get_average_time(t) for t in ['lbp', 'glcm', 'fourier', 'prnu'])
-        return avg_total > 100  # milliseconds
+        return avg_total > FAST_MODE_TOTAL_MS  # milliseconds
 
 # Global performance monitor
 performance_monitor = PerformanceMonitor()
 
-def detect_ktp_by_template_similarity(frame):
+def detect_ktp_by_template_similarity(frame, scales=None, peaks_per_scale=None):
     """
     Enhanced template-based KTP detection dengan adaptive template selection
+    peaks_per_scale: kandidat per scale (top-k peak response, detection/response_peaks.py);
+    None = TEMPLATE_PEAKS_PER_SCALE
     Returns: List of detected KTP regions with confidence scores
     """
     try:
@@ -109,12 +195,12 @@ def detect_ktp_by_template_similarity(frame):
             base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
             assets_dir = os.path.join(base_dir, "assets")
             template_manager = initialize_template_manager(assets_dir)
-            print(f"📁 Initialized template manager with {template_manager.get_template_info()['total_templates']} templates")
+            logger.info("📁 Initialized template manager with %s templates", template_manager.get_template_info()['total_templates'])
         
         # Get adaptive template based on frame characteristics
         template_info = get_adaptive_template(frame)
         if template_info is None:
-            print("❌ No suitable template found!")
+            logger.debug("❌ No suitable template found!")
             return []
         
         template = template_info['template']
@@ -125,18 +211,17 @@ def detect_ktp_by_template_similarity(frame):
         template_h, template_w = template.shape[:2]
         frame_h, frame_w = frame.shape[:2]
         
-        print(f"🔍 Adaptive template detection:")
-        print(f"   Template: {template_type} ({template_w}x{template_h})")
-        print(f"   Reason: {selection_reason}")
-        print(f"   Blue ratio: {template_info['blue_ratio']:.3f}")
-        print(f"   Frame: {frame_w}x{frame_h}")
+        logger.debug("🔍 Adaptive template detection:")
+        logger.debug("   Template: %s (%sx%s)", template_type, template_w, template_h)
+        logger.debug("   Reason: %s", selection_reason)
+        logger.debug("   Blue ratio: %.3f", template_info['blue_ratio'])
+        logger.debug("   Frame: %sx%s", frame_w, frame_h)
         
         detections = []
+        peaks_per_scale = peaks_per_scale or TEMPLATE_PEAKS_PER_SCALE
         
         # Multi-scale template matching untuk berbagai ukuran KTP
-        scales = [0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2]
-        
-        for scale in scales:
+        for scale in scales or TEMPLATE_SCALES:
             # Resize template sesuai scale
             new_w = int(template_w * scale)
             new_h = int(template_h * scale)
@@ -148,27 +233,30 @@ def detect_ktp_by_template_similarity(frame):
             resized_template = cv2.resize(template, (new_w, new_h))
             
             # Template matching dengan multiple methods
-            detection = perform_multiscale_template_matching(frame, resized_template, scale)
-            if detection:
+            with span('template_match', scale=f'{scale:.1f}'):
+                scale_detections = perform_multiscale_template_matching(frame, resized_template, scale,
+                                                                        peaks_per_scale)
+            for detection in scale_detections:
                 # Add template info to detection
                 detection['template_type'] = template_type
                 detection['template_blue_ratio'] = template_info['blue_ratio']
                 detections.append(detection)
         
-        # Filter dan rank detections berdasarkan confidence
-        filtered_detections = filter_and_rank_detections(detections)
+        # Filter dan rank detections (rank_score untuk top-k, confidence untuk 1 peak)
+        filtered_detections = filter_and_rank_detections(detections, score_key=ranking_key(peaks_per_scale))
         
-        print(f"🎯 Found {len(filtered_detections)} high-confidence KTP detections using {template_type} template")
+        logger.debug("🎯 Found %s high-confidence KTP detections using %s template", len(filtered_detections), template_type)
         return filtered_detections
         
     except Exception as e:
-        print(f"❌ Error in template-based detection: {str(e)}")
+        logger.error("❌ Error in template-based detection: %s", e)
         return []
 
 
-def perform_multiscale_template_matching(frame, template, scale):
+def perform_multiscale_template_matching(frame, template, scale, top_k=1):
     """
     Perform template matching dengan multiple methods dan preprocessing
+    Returns: list maksimal top_k deteksi (peak response yang tidak saling overlap)
     """
     try:
         # Convert both to grayscale
@@ -186,48 +274,43 @@ def perform_multiscale_template_matching(frame, template, scale):
             cv2.TM_SQDIFF_NORMED
         ]
         
-        best_confidence = 0
-        best_location = None
-        best_method = None
+        template_h, template_w = template.shape[:2]
+        radius = peak_window((template_w, template_h))
+        candidates = []
         
         for method in methods:
             result = cv2.matchTemplate(frame_processed, template_processed, method)
+            mean, std = (float(value[0][0]) for value in cv2.meanStdDev(result))
             
+            # Top-k peak per method; threshold confidence untuk menfilter false positives
             if method == cv2.TM_SQDIFF_NORMED:
                 # Untuk SQDIFF, nilai lebih kecil = lebih baik
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-                confidence = 1 - min_val  # Invert untuk consistency
-                location = min_loc
+                peaks = find_response_peaks(result, top_k, radius, 1 - TEMPLATE_MATCH_THRESHOLD, minimize=True)
+                peaks = [(x, y, 1 - value) for x, y, value in peaks]  # Invert untuk consistency
+                mean = 1 - mean
             else:
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-                confidence = max_val
-                location = max_loc
+                peaks = find_response_peaks(result, top_k, radius, TEMPLATE_MATCH_THRESHOLD)
             
-            if confidence > best_confidence:
-                best_confidence = confidence
-                best_location = location
-                best_method = method
-        
-        # Threshold confidence untuk menfilter false positives
-        if best_confidence >= 0.6:  # High threshold untuk template similarity
-            template_h, template_w = template.shape[:2]
-            x, y = best_location
-            
-            # Validasi posisi
-            if x + template_w <= frame.shape[1] and y + template_h <= frame.shape[0]:
-                return {
-                    'bbox': (x, y, template_w, template_h),
-                    'confidence': best_confidence,
-                    'scale': scale,
-                    'method': best_method,
-                    'area': template_w * template_h
-                }
-        
-        return None
+            for x, y, confidence in peaks:
+                # Validasi confidence (presisi float64 seperti minMaxLoc) dan posisi
+                if (confidence >= TEMPLATE_MATCH_THRESHOLD and
+                        x + template_w <= frame.shape[1] and y + template_h <= frame.shape[0]):
+                    candidates.append({
+                        'bbox': (x, y, template_w, template_h),
+                        'confidence': confidence,
+                        'rank_score': (confidence - mean) / (std + RANK_SCORE_EPSILON),
+                        'scale': scale,
+                        'method': method,
+                        'area': template_w * template_h
+                    })
+        
+        # Method berbeda sering menemukan posisi yang sama: ambil yang paling tinggi
+        # (top_k=1: confidence seperti perilaku lama; top-k: rank_score)
+        return suppress_detections(candidates, NMS_IOU_THRESHOLD, max_output=top_k, score_key=ranking_key(top_k))
         
     except Exception as e:
-        print(f"   ❌ Template matching error at scale {scale}: {str(e)}")
-        return None
+        logger.warning("   ❌ Template matching error at scale %s: %s", scale, e)
+        return []
 
 
 def preprocess_for_matching(image):
@@ -247,71 +330,32 @@ def preprocess_for_matching(image):
     return equalized
 
 
-def filter_and_rank_detections(detections):
+@traced('rank_detections')
+def filter_and_rank_detections(detections, soft_nms=None, max_results=MAX_RANKED_DETECTIONS,
+                               score_key='rank_score'):
     """
-    Filter overlapping detections dan rank berdasarkan confidence
+    Filter overlapping detections dan rank berdasarkan score_key: 'rank_score' (z-score
+    peak terhadap response map-nya, sebanding antar method) atau 'confidence'
+    NMS tervektorisasi (detection/nms.py); soft_nms None = DETECTION_SOFT_NMS
     """
     if not detections:
         return []
     
-    # Sort by confidence (descending)
-    sorted_detections = sorted(detections, key=lambda x: x['confidence'], reverse=True)
-    
-    # Non-maximum suppression untuk remove overlapping detections
-    filtered = []
-    
-    for current in sorted_detections:
-        is_duplicate = False
-        current_bbox = current['bbox']
-        
-        for existing in filtered:
-            existing_bbox = existing['bbox']
-            
-            # Calculate overlap
-            overlap_ratio = calculate_bbox_overlap(current_bbox, existing_bbox)
-            
-            # Jika overlap > 50%, skip detection ini
-            if overlap_ratio > 0.5:
-                is_duplicate = True
-                break
-        
-        if not is_duplicate:
-            filtered.append(current)
-    
-    # Return top 3 detections
-    return filtered[:3]
+    # Overlap > 50% dianggap duplikat; return top max_results detections
+    soft = DETECTION_SOFT_NMS if soft_nms is None else soft_nms
+    return suppress_detections(detections, NMS_IOU_THRESHOLD, max_output=max_results, soft=soft,
+                               score_key=score_key)
 
 
 def calculate_bbox_overlap(bbox1, bbox2):
     """
     Calculate intersection over union (IoU) of two bounding boxes
+    Wrapper satu pasangan untuk iou_matrix (detection/nms.py)
     """
-    x1, y1, w1, h1 = bbox1
-    x2, y2, w2, h2 = bbox2
-    
-    # Calculate intersection
-    inter_x1 = max(x1, x2)
-    inter_y1 = max(y1, y2)
-    inter_x2 = min(x1 + w1, x2 + w2)
-    inter_y2 = min(y1 + h1, y2 + h2)
-    
-    if inter_x2 <= inter_x1 or inter_y2 <= inter_y1:
-        return 0.0
-    
-    inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
-    
-    # Calculate union
-    area1 = w1 * h1
-    area2 = w2 * h2
-    union_area = area1 + area2 - inter_area
-    
-    if union_area == 0:
-        return 0.0
-    
-    return inter_area / union_area
+    return float(iou_matrix([bbox1], [bbox2])[0, 0])
 
 
-def validate_ktp_detection(frame, detection, mode='adaptive'):
+def validate_ktp_detection(frame, detection, mode='adaptive', validators=None):
     """
     Validasi tambahan untuk memastikan detection adalah KTP asli
     Menggunakan advanced texture analysis untuk authenticity verification
@@ -320,8 +364,12 @@ def validate_ktp_detection(frame, detection, mode='adaptive'):
     - 'fast': Basic + LBP + GLCM only (real-time friendly)
     - 'thorough': All analysis including Fourier/Wavelet 
     - 'adaptive': Choose based on image size and performance
+    
+    validators: subset TEXTURE_VALIDATORS yang boleh dijalankan (None = semua);
+    validator yang dimatikan governor mendapat partial credit seperti analisis yang di-skip
     """
     start_time = time.time() * 1000  # milliseconds
+    enabled = TEXTURE_VALIDATORS if validators is None else validators
     
     try:
         bbox = detection['bbox']
@@ -334,158 +382,138 @@ def validate_ktp_detection(frame, detection, mode='adaptive'):
             return False, 0.0
         
         # Determine analysis mode
+        fast_mode_selected = False
         if mode == 'adaptive':
             if performance_monitor.should_use_fast_mode():
                 mode = 'fast'
-                performance_monitor.fast_mode_used += 1
+                fast_mode_selected = True
             elif w < AuthenticityThresholds.MIN_WIDTH_FOR_FOURIER or h < AuthenticityThresholds.MIN_HEIGHT_FOR_FOURIER:
                 mode = 'fast'
             else:
                 mode = 'thorough'
         
-        print(f"   🔧 Using {mode.upper()} analysis mode")
+        logger.debug("   🔧 Using %s analysis mode", mode.upper())
         
         # Get adaptive thresholds
         thresholds = AuthenticityThresholds.get_adaptive_thresholds(
             (w, h), detection['confidence'], mode
         )
         
-        # Basic validation checks
-        validation_score = 0
+        # Checks dijalankan sebagai cascade (murah lebih dulu); berhenti begitu
+        # min_checks pasti tidak tercapai. Kredit per check: 1 lolos, 0 gagal,
+        # 0.5 jika analisis di-skip (governor / gambar terlalu kecil)
         total_checks = 5 if mode == 'fast' else 9
+        gray_region = cv2.cvtColor(ktp_region, cv2.COLOR_BGR2GRAY)
         
         # Check 1: Aspect ratio validation
-        aspect_ratio = w / h if h > 0 else 0
-        if 1.4 <= aspect_ratio <= 2.0:  # KTP aspect ratio range
-            validation_score += 1
-            print(f"   ✅ Aspect ratio valid: {aspect_ratio:.2f}")
-        else:
-            print(f"   ❌ Invalid aspect ratio: {aspect_ratio:.2f}")
+        def aspect_check():
+            aspect_ratio = w / h if h > 0 else 0
+            passed = 1.4 <= aspect_ratio <= 2.0  # KTP aspect ratio range
+            logger.debug("   %s aspect ratio: %.2f", '✅ Valid' if passed else '❌ Invalid', aspect_ratio)
+            return int(passed)
         
         # Check 2: Size validation (not too small or too large)
-        frame_area = frame.shape[0] * frame.shape[1]
-        region_area = w * h
-        area_ratio = region_area / frame_area
-        
-        if 0.05 <= area_ratio <= 0.8:  # 5% to 80% of frame
-            validation_score += 1
-            print(f"   ✅ Size valid: {area_ratio:.3f} of frame")
-        else:
-            print(f"   ❌ Invalid size: {area_ratio:.3f} of frame")
+        def size_check():
+            area_ratio = (w * h) / (frame.shape[0] * frame.shape[1])
+            passed = 0.05 <= area_ratio <= 0.8  # 5% to 80% of frame
+            logger.debug("   %s size: %.3f of frame", '✅ Valid' if passed else '❌ Invalid', area_ratio)
+            return int(passed)
         
         # Check 3: Edge density (KTP should have good edge definition)
-        gray_region = cv2.cvtColor(ktp_region, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray_region, 50, 150)
-        edge_density = np.sum(edges > 0) / (w * h)
-        
-        if 0.05 <= edge_density <= 0.25:  # Reasonable edge density
-            validation_score += 1
-            print(f"   ✅ Edge density valid: {edge_density:.3f}")
-        else:
-            print(f"   ❌ Invalid edge density: {edge_density:.3f}")
+        def edge_check():
+            edges = cv2.Canny(gray_region, 50, 150)
+            edge_density = np.sum(edges > 0) / (w * h)
+            passed = 0.05 <= edge_density <= 0.25  # Reasonable edge density
+            logger.debug("   %s edge density: %.3f", '✅ Valid' if passed else '❌ Invalid', edge_density)
+            return int(passed)
         
         # Check 4: Color variance (KTP should have color variation)
-        color_std = np.std(ktp_region.reshape(-1, 3), axis=0)
-        avg_std = np.mean(color_std)
-        
-        if avg_std >= 15:  # Sufficient color variation
-            validation_score += 1
-            print(f"   ✅ Color variance valid: {avg_std:.1f}")
-        else:
-            print(f"   ❌ Low color variance: {avg_std:.1f}")
+        def color_check():
+            avg_std = np.mean(np.std(ktp_region.reshape(-1, 3), axis=0))
+            passed = avg_std >= 15  # Sufficient color variation
+            logger.debug("   %s color variance: %.1f", '✅ Valid' if passed else '❌ Low', avg_std)
+            return int(passed)
         
         # Check 5: Template confidence threshold
-        if detection['confidence'] >= 0.65:
-            validation_score += 1
-            print(f"   ✅ High template confidence: {detection['confidence']:.3f}")
-        else:
-            print(f"   ⚠️ Lower template confidence: {detection['confidence']:.3f}")
+        def confidence_check():
+            passed = detection['confidence'] >= 0.65
+            logger.debug("   %s template confidence: %.3f", '✅ High' if passed else '⚠️ Lower', detection['confidence'])
+            return int(passed)
         
         # === ADVANCED TEXTURE ANALYSIS (Mode-dependent) ===
+        def texture_check(name, analyze):
+            def run():
+                analysis_start = time.time() * 1000
+                authenticity = analyze(gray_region)
+                performance_monitor.log_analysis_time(name, time.time() * 1000 - analysis_start)
+                passed = authenticity >= thresholds[name]
+                logger.debug("   %s %s: %.3f (threshold: %.3f)", '✅' if passed else '❌', name.upper(), authenticity, thresholds[name])
+                return int(passed)
+            return run
+        
+        def skipped_check(name, reason):
+            def run():
+                logger.debug("   ⏭️ %s analysis skipped (%s)", name.upper(), reason)
+                return 0.5  # Partial credit for skipped analysis
+            return run
+        
+        stages = [
+            CascadeStage('aspect_ratio', aspect_check, **VALIDATION_CHECK_COSTS['aspect_ratio']),
+            CascadeStage('size', size_check, **VALIDATION_CHECK_COSTS['size']),
+            CascadeStage('edge_density', edge_check, **VALIDATION_CHECK_COSTS['edge_density']),
+            CascadeStage('color_variance', color_check, **VALIDATION_CHECK_COSTS['color_variance']),
+            CascadeStage('template_confidence', confidence_check, **VALIDATION_CHECK_COSTS['template_confidence'])
+        ]
         
-        # Always perform LBP and GLCM (fast and reliable)
+        # LBP dan GLCM selalu (fast dan thorough); thorough menambah PRNU dan
+        # frequency analysis, masing-masing hanya jika region cukup besar
+        texture_checks = []
         if mode in ['fast', 'thorough']:
-            # Check 6: LBP (Local Binary Pattern) Analysis
-            lbp_start = time.time() * 1000
-            lbp_authenticity = analyze_lbp_texture(gray_region)
-            lbp_time = time.time() * 1000 - lbp_start
-            performance_monitor.log_analysis_time('lbp', lbp_time)
-            
-            if lbp_authenticity >= thresholds['lbp']:
-                validation_score += 1
-                print(f"   ✅ LBP texture authentic: {lbp_authenticity:.3f} (threshold: {thresholds['lbp']:.3f})")
-            else:
-                print(f"   ❌ LBP texture suspicious: {lbp_authenticity:.3f} (threshold: {thresholds['lbp']:.3f})")
-            
-            # Check 7: GLCM (Gray Level Co-occurrence Matrix) Analysis
-            glcm_start = time.time() * 1000
-            glcm_authenticity = analyze_glcm_properties(gray_region)
-            glcm_time = time.time() * 1000 - glcm_start
-            performance_monitor.log_analysis_time('glcm', glcm_time)
-            
-            if glcm_authenticity >= thresholds['glcm']:
-                validation_score += 1
-                print(f"   ✅ GLCM properties authentic: {glcm_authenticity:.3f} (threshold: {thresholds['glcm']:.3f})")
-            else:
-                print(f"   ❌ GLCM properties suspicious: {glcm_authenticity:.3f} (threshold: {thresholds['glcm']:.3f})")
-        
-        # Thorough mode: Add PRNU and Frequency analysis
+            texture_checks += [('lbp', analyze_lbp_texture, True), ('glcm', analyze_glcm_properties, True)]
         if mode == 'thorough':
-            # Check 8: PRNU Analysis (only if image is large enough and likely from camera)
-            if w >= AuthenticityThresholds.MIN_WIDTH_FOR_PRNU and h >= AuthenticityThresholds.MIN_HEIGHT_FOR_PRNU:
-                prnu_start = time.time() * 1000
-                prnu_authenticity = analyze_prnu_pattern(gray_region)
-                prnu_time = time.time() * 1000 - prnu_start
-                performance_monitor.log_analysis_time('prnu', prnu_time)
-                
-                if prnu_authenticity >= thresholds['prnu']:
-                    validation_score += 1
-                    print(f"   ✅ PRNU pattern authentic: {prnu_authenticity:.3f} (threshold: {thresholds['prnu']:.3f})")
-                else:
-                    print(f"   ⚠️ PRNU pattern suspicious: {prnu_authenticity:.3f} (may be scanned/printed)")
+            texture_checks += [
+                ('prnu', analyze_prnu_pattern,
+                 w >= AuthenticityThresholds.MIN_WIDTH_FOR_PRNU and h >= AuthenticityThresholds.MIN_HEIGHT_FOR_PRNU),
+                ('fourier', analyze_frequency_domain,
+                 w >= AuthenticityThresholds.MIN_WIDTH_FOR_FOURIER and h >= AuthenticityThresholds.MIN_HEIGHT_FOR_FOURIER)
+            ]
+        for name, analyze, large_enough in texture_checks:
+            if name in enabled and large_enough:
+                stages.append(CascadeStage(name, texture_check(name, analyze), **VALIDATION_CHECK_COSTS[name]))
             else:
-                print(f"   ⏭️ PRNU analysis skipped (image too small: {w}x{h})")
-                validation_score += 0.5  # Partial credit for skipped analysis
-            
-            # Check 9: Frequency Domain Analysis (only if image is large enough)
-            if w >= AuthenticityThresholds.MIN_WIDTH_FOR_FOURIER and h >= AuthenticityThresholds.MIN_HEIGHT_FOR_FOURIER:
-                freq_start = time.time() * 1000
-                freq_authenticity = analyze_frequency_domain(gray_region)
-                freq_time = time.time() * 1000 - freq_start
-                performance_monitor.log_analysis_time('fourier', freq_time)
-                
-                if freq_authenticity >= thresholds['fourier']:
-                    validation_score += 1
-                    print(f"   ✅ Frequency analysis authentic: {freq_authenticity:.3f} (threshold: {thresholds['fourier']:.3f})")
-                else:
-                    print(f"   ⚠️ Frequency analysis suspicious: {freq_authenticity:.3f} (may be printed/copied)")
-            else:
-                print(f"   ⏭️ Frequency analysis skipped (image too small: {w}x{h})")
-                validation_score += 0.5  # Partial credit for skipped analysis
+                reason = f"image too small: {w}x{h}" if name in enabled else "governor"
+                stages.append(CascadeStage(name, skipped_check(name, reason), max_value=0.5, min_value=0.5, cost=0.0))
+        
+        cascade = Cascade(f"texture_validation:{mode}", stages)
+        outcome = cascade.evaluate(lambda values: sum(values.values()) >= thresholds['min_checks'])
+        if outcome.decided_early:
+            logger.debug("   ⏩ Decided early (%s) after %s", outcome.decided_early, ', '.join(outcome.stages_run))
         
-        # Calculate final validation score
+        # Calculate final validation score (check yang tidak dijalankan dihitung 0)
+        validation_score = sum(cascade.bounded_values(outcome.values, 'min').values())
         final_score = validation_score / total_checks
-        is_valid = validation_score >= thresholds['min_checks']
+        is_valid = outcome.passed
         
         # Performance monitoring
         total_time = time.time() * 1000 - start_time
-        performance_monitor.total_detections += 1
+        performance_monitor.log_detection(fast_mode_selected)
         
-        print(f"   📊 {mode.upper()} Validation: {validation_score:.1f}/{total_checks} checks passed")
-        print(f"   ⏱️ Analysis time: {total_time:.1f}ms, final score: {final_score:.2f}")
+        logger.debug("   📊 %s Validation: %.1f/%s checks passed", mode.upper(), validation_score, total_checks)
+        logger.debug("   ⏱️ Analysis time: %.1fms, final score: %.2f", total_time, final_score)
         
         # Timeout protection
         timeout_limit = AuthenticityThresholds.FAST_MODE_TIMEOUT if mode == 'fast' else AuthenticityThresholds.THOROUGH_MODE_TIMEOUT
         if total_time > timeout_limit:
-            print(f"   ⚠️ Analysis timeout ({total_time:.1f}ms > {timeout_limit}ms)")
+            logger.debug("   ⚠️ Analysis timeout (%.1fms > %sms)", total_time, timeout_limit)
         
         return is_valid, final_score
         
     except Exception as e:
-        print(f"   ❌ Validation error: {str(e)}")
+        logger.warning("   ❌ Validation error: %s", e)
         return False, 0.0
 
 
+@traced('validator', name='lbp')
 def analyze_lbp_texture(gray_image):
     """
     LBP (Local Binary Pattern) Analysis untuk mendeteksi pola tekstur permukaan KTP
@@ -534,10 +562,11 @@ def analyze_lbp_texture(gray_image):
         return min(authenticity_score, 1.0)
         
     except Exception as e:
-        print(f"      LBP analysis error: {str(e)}")
+        logger.warning("      LBP analysis error: %s", e)
         return 0.0
 
 
+@traced('validator', name='glcm')
 def analyze_glcm_properties(gray_image):
     """
     GLCM (Gray Level Co-occurrence Matrix) Analysis
@@ -614,10 +643,11 @@ def analyze_glcm_properties(gray_image):
         return authenticity_score
         
     except Exception as e:
-        print(f"      GLCM analysis error: {str(e)}")
+        logger.warning("      GLCM analysis error: %s", e)
         return 0.0
 
 
+@traced('validator', name='prnu')
 def analyze_prnu_pattern(gray_image):
     """
     PRNU (Photo Response Non-Uniformity) Analysis
@@ -653,21 +683,8 @@ def analyze_prnu_pattern(gray_image):
         prnu_mean = np.abs(np.mean(prnu_pattern))
         
         # 3. Spatial frequency analysis of PRNU
-        prnu_fft = np.abs(fft2(prnu_pattern))
-        prnu_fft_center = fftshift(prnu_fft)
-        
         # High frequency energy ratio (sensor noise has more high freq components)
-        h, w = prnu_fft_center.shape
-        center_h, center_w = h//2, w//2
-        
-        # High frequency region (outer ring)
-        mask_high = np.zeros((h, w))
-        y, x = np.ogrid[:h, :w]
-        mask_high[((x - center_w)**2 + (y - center_h)**2) > (min(h,w)//4)**2] = 1
-        
-        high_freq_energy = np.sum(prnu_fft_center * mask_high)
-        total_energy = np.sum(prnu_fft_center)
-        high_freq_ratio = high_freq_energy / (total_energy + 1e-7)
+        high_freq_ratio = high_frequency_ratio(prnu_pattern)
         
         # ADJUSTED SCORING for scanned/printed documents
         # Lower expectations because PRNU from camera sensors won't be present
@@ -692,10 +709,11 @@ def analyze_prnu_pattern(gray_image):
         return authenticity_score
         
     except Exception as e:
-        print(f"      PRNU analysis error: {str(e)}")
+        logger.warning("      PRNU analysis error: %s", e)
         return 0.3  # Default reasonable score for scanned images
 
 
+@traced('validator', name='frequency_domain')
 def analyze_frequency_domain(gray_image):
     """
     Frequency Domain Analysis menggunakan Fourier dan Wavelet Transform
@@ -712,16 +730,12 @@ def analyze_frequency_domain(gray_image):
         
         # Resolution check - skip if too small for reliable frequency analysis
         if w < 64 or h < 40:
-            print(f"        Warning: Image too small ({w}x{h}) for reliable frequency analysis")
+            logger.debug("        Warning: Image too small (%sx%s) for reliable frequency analysis", w, h)
             return 0.5  # Neutral score rather than failing
         
-        # Resize untuk consistency but preserve aspect ratio
-        target_size = 128
-        scale = min(target_size / w, target_size / h)
-        new_w, new_h = int(w * scale), int(h * scale)
-        
-        if new_w != w or new_h != h:
-            gray_image = cv2.resize(gray_image, (new_w, new_h))
+        # Resize untuk consistency but preserve aspect ratio (snap ke shape kanonik jika dekat)
+        gray_image = canonical_resize(gray_image)
+        new_h, new_w = gray_image.shape
         
         # === FOURIER ANALYSIS ===
         fourier_score = analyze_fourier_spectrum(gray_image)
@@ -739,44 +753,22 @@ def analyze_frequency_domain(gray_image):
         return frequency_authenticity
         
     except Exception as e:
-        print(f"      Frequency analysis error: {str(e)}")
+        logger.warning("      Frequency analysis error: %s", e)
         return 0.4  # Default reasonable score for small/problematic images
 
 
+@traced('validator', name='fourier')
 def analyze_fourier_spectrum(gray_image):
     """
     Analisis spektrum Fourier untuk mendeteksi pola printing/scanning
     """
     try:
-        # FFT analysis
-        f_transform = fft2(gray_image)
-        f_shift = fftshift(f_transform)
-        magnitude_spectrum = np.abs(f_shift)
-        log_spectrum = np.log(magnitude_spectrum + 1)
-        
-        h, w = log_spectrum.shape
-        center_h, center_w = h//2, w//2
-        
-        # Analyze frequency distribution
-        # 1. Low frequency energy (DC and near-DC components)
-        mask_low = np.zeros((h, w))
-        y, x = np.ogrid[:h, :w]
-        low_freq_radius = min(h, w) // 8
-        mask_low[((x - center_w)**2 + (y - center_h)**2) <= low_freq_radius**2] = 1
-        
-        low_freq_energy = np.sum(log_spectrum * mask_low)
-        
-        # 2. Mid frequency energy
-        mask_mid = np.zeros((h, w))
-        mid_freq_radius = min(h, w) // 4
-        mask_mid[((x - center_w)**2 + (y - center_h)**2) <= mid_freq_radius**2] = 1
-        mask_mid = mask_mid - mask_low  # Ring shape
-        
-        mid_freq_energy = np.sum(log_spectrum * mask_mid)
-        
-        # 3. High frequency energy
-        mask_high = np.ones((h, w)) - (mask_low + mask_mid)
-        high_freq_energy = np.sum(log_spectrum * mask_high)
+        # FFT analysis: energi log-spektrum per pita radial
+        # (low: r <= min/8, mid: ring sampai min/4, high: sisanya)
+        bands = radial_band_energies(gray_image)
+        low_freq_energy = bands['low']
+        mid_freq_energy = bands['mid']
+        high_freq_energy = bands['high']
         
         total_energy = low_freq_energy + mid_freq_energy + high_freq_energy
         
@@ -799,8 +791,8 @@ def analyze_fourier_spectrum(gray_image):
         
         # Check for printing artifacts (regular patterns in frequency domain)
         # Calculate variance in different frequency bands
-        low_variance = np.var(log_spectrum * mask_low) if np.sum(mask_low) > 0 else 0
-        mid_variance = np.var(log_spectrum * mask_mid) if np.sum(mask_mid) > 0 else 0
+        low_variance = bands['low_variance']
+        mid_variance = bands['mid_variance']
         
         # Higher variance = more natural, lower variance = more artificial
         variance_score = min((low_variance + mid_variance) / 20.0, 1.0)
@@ -808,10 +800,11 @@ def analyze_fourier_spectrum(gray_image):
         return (balance_score * 0.7 + variance_score * 0.3)
         
     except Exception as e:
-        print(f"        Fourier analysis error: {str(e)}")
+        logger.warning("        Fourier analysis error: %s", e)
         return 0.0
 
 
+@traced('validator', name='wavelet')
 def analyze_wavelet_coefficients(gray_image):
     """
     Analisis koefisien Wavelet untuk mendeteksi karakteristik autentik
@@ -858,7 +851,7 @@ def analyze_wavelet_coefficients(gray_image):
         return (energy_score * 0.6 + kurtosis_score * 0.4)
         
     except Exception as e:
-        print(f"        Wavelet analysis error: {str(e)}")
+        logger.warning("        Wavelet analysis error: %s", e)
         return 0.0
 
 
@@ -877,6 +870,7 @@ def calculate_kurtosis(data):
 
 
 # Main detection function yang akan dipanggil dari sistem utama
+@traced('template_detection')
 def detect_ktp_template_based(frame, performance_mode='adaptive'):
     """
     Main function untuk deteksi KTP berdasarkan template similarity
@@ -886,24 +880,31 @@ def detect_ktp_template_based(frame, performance_mode='adaptive'):
     - 'thorough': Full analysis including Fourier/Wavelet  
     - 'adaptive': Auto-choose based on system performance and image characteristics
     
+    Set scale template dan validator tekstur mengikuti profil governor; pada mode
+    'adaptive' governor juga bisa memaksa 'fast' saat sistem sedang terbebani.
+    
     Returns: List of validated KTP detections
     """
-    print(f"🎯 Starting template-based KTP detection (mode: {performance_mode})...")
+    profile = get_governor().current_profile()
+    if performance_mode == 'adaptive' and profile['performance_mode'] == 'fast':
+        performance_mode = 'fast'
+    
+    logger.debug("🎯 Starting template-based KTP detection (mode: %s, profile: %s)...", performance_mode, profile['name'])
     
     # Step 1: Template matching
-    raw_detections = detect_ktp_by_template_similarity(frame)
+    raw_detections = detect_ktp_by_template_similarity(frame, profile['scales'])
     
     if not raw_detections:
-        print("❌ No template matches found")
+        logger.debug("❌ No template matches found")
         return []
     
     # Step 2: Validate each detection with performance monitoring
     validated_detections = []
     
     for i, detection in enumerate(raw_detections):
-        print(f"🔍 Validating detection {i+1}/{len(raw_detections)}...")
+        logger.debug("🔍 Validating detection %s/%s...", i+1, len(raw_detections))
         
-        is_valid, validation_score = validate_ktp_detection(frame, detection, performance_mode)
+        is_valid, validation_score = validate_ktp_detection(frame, detection, performance_mode, profile['validators'])
         
         if is_valid:
             # Combine template confidence with validation score
@@ -914,17 +915,17 @@ def detect_ktp_template_based(frame, performance_mode='adaptive'):
             detection['analysis_mode'] = performance_mode
             
             validated_detections.append(detection)
-            print(f"   ✅ Detection validated! Combined confidence: {combined_confidence:.3f}")
+            logger.debug("   ✅ Detection validated! Combined confidence: %.3f", combined_confidence)
         else:
-            print(f"   ❌ Detection rejected (validation score: {validation_score:.2f})")
+            logger.debug("   ❌ Detection rejected (validation score: %.2f)", validation_score)
     
     # Sort by combined confidence
     validated_detections.sort(key=lambda x: x['combined_confidence'], reverse=True)
     
-    # Performance statistics
-    if performance_monitor.total_detections > 0:
+    # Performance statistics (hanya dihitung jika DEBUG aktif)
+    if performance_monitor.total_detections > 0 and logger.isEnabledFor(logging.DEBUG):
         fast_mode_percentage = (performance_monitor.fast_mode_used / performance_monitor.total_detections) * 100
-        print(f"📈 Performance stats: {fast_mode_percentage:.1f}% fast mode usage")
+        logger.debug("📈 Performance stats: %.1f%% fast mode usage", fast_mode_percentage)
         
         avg_times = {
             'LBP': performance_monitor.get_average_time('lbp'),
@@ -935,9 +936,9 @@ def detect_ktp_template_based(frame, performance_mode='adaptive'):
         
         for analysis, avg_time in avg_times.items():
             if avg_time > 0:
-                print(f"    ⏱️ {analysis}: {avg_time:.1f}ms avg")
+                logger.debug("    ⏱️ %s: %.1fms avg", analysis, avg_time)
     
-    print(f"🎯 Template-based detection complete: {len(validated_detections)} valid KTP found")
+    logger.debug("🎯 Template-based detection complete: %s valid KTP found", len(validated_detections))
     
     return validated_detections
 
@@ -957,30 +958,32 @@ def configure_authenticity_thresholds(lbp=None, glcm=None, prnu=None, fourier=No
     if fourier is not None:
         AuthenticityThresholds.BASE_FOURIER = fourier
     
-    print(f"📊 Thresholds updated: LBP={AuthenticityThresholds.BASE_LBP}, "
-          f"GLCM={AuthenticityThresholds.BASE_GLCM}, "
-          f"PRNU={AuthenticityThresholds.BASE_PRNU}, "
-          f"Fourier={AuthenticityThresholds.BASE_FOURIER}")
+    logger.info("📊 Thresholds updated: LBP=%s, GLCM=%s, PRNU=%s, Fourier=%s",
+                AuthenticityThresholds.BASE_LBP, AuthenticityThresholds.BASE_GLCM,
+                AuthenticityThresholds.BASE_PRNU, AuthenticityThresholds.BASE_FOURIER)
 
 
 def get_performance_statistics():
     """
     Get detailed performance statistics for system tuning
+    average_times: EWMA (ms); percentiles: p50/p95/p99 dari histogram (ms)
     """
+    analysis_types = ['lbp', 'glcm', 'prnu', 'fourier']
     return {
         'total_detections': performance_monitor.total_detections,
         'fast_mode_usage': performance_monitor.fast_mode_used,
         'average_times': {
-            'lbp': performance_monitor.get_average_time('lbp'),
-            'glcm': performance_monitor.get_average_time('glcm'), 
-            'prnu': performance_monitor.get_average_time('prnu'),
-            'fourier': performance_monitor.get_average_time('fourier')
+            analysis_type: performance_monitor.get_average_time(analysis_type)
+            for analysis_type in analysis_types
+        },
+        'percentiles': {
+            analysis_type: performance_monitor.get_percentiles(analysis_type)
+            for analysis_type in analysis_types
         }
     }
 
 
 def reset_performance_monitor():
     """Reset performance statistics"""
-    global performance_monitor
-    performance_monitor = PerformanceMonitor()
-    print("📊 Performance monitor reset")
+    performance_monitor.reset()
+    logger.info("📊 Performance monitor reset")
@@ -3,10 +3,17 @@ Main Detection Coordinator
 Mengkoordinasikan deteksi wajah dan KTP dengan 2-layer detection approach
 """
 import cv2
+import logging
 import numpy as np
-from detection.face_detector import detect_face
+from core.tracing import traced
+from detection.face_detector import detect_face, locate_face
 from detection.ktp_detector import detect_ktp_candidates_by_color_and_shape, verify_ktp_candidate_by_template
 
+logger = logging.getLogger(__name__)
+
+KTP_CONFIDENCE_THRESHOLD = 0.35  # Threshold minimum layer 2
+
+@traced('detect_face_and_ktp')
 def detect_face_and_ktp(frame):
     """
     Main detection function yang mengkoordinasikan deteksi face dan KTP
@@ -20,21 +27,12 @@ def detect_face_and_ktp(frame):
         face_img = detect_face(frame)
         
         # KTP detection menggunakan 2-layer detection system
-        candidates = detect_ktp_candidates_by_color_and_shape(frame)
+        best_candidate, best_confidence = select_ktp_candidate(frame)
         
         ktp_img = None
         ktp_face_img = None
-        best_confidence = 0.0
-        best_candidate = None
-        
-        # Verifikasi setiap kandidat dengan layer 2
-        for candidate in candidates:
-            confidence, result = verify_ktp_candidate_by_template(frame, candidate)
-            if confidence > best_confidence:
-                best_confidence = confidence
-                best_candidate = candidate
         
-        if best_candidate and best_confidence > 0.35:  # Threshold minimum
+        if best_candidate:
             x, y, w, h, area, blue_ratio = best_candidate
             
             # Extract KTP region
@@ -44,15 +42,74 @@ def detect_face_and_ktp(frame):
             if ktp_img is not None and ktp_img.size > 0:
                 ktp_face_img = detect_face(ktp_img)
             
-            print(f"✅ KTP detected with confidence: {best_confidence:.3f} (2-layer detection)")
+            logger.debug("✅ KTP detected with confidence: %.3f (2-layer detection)", best_confidence)
         
         return face_img, ktp_img, ktp_face_img
         
     except Exception as e:
-        print(f"❌ Error in detect_face_and_ktp: {str(e)}")
+        logger.error("❌ Error in detect_face_and_ktp: %s", e)
         return None, None, None
 
 
+def select_ktp_candidate(frame):
+    """
+    Pilih kandidat KTP terbaik (layer 1 + verifikasi layer 2)
+    Returns: (candidate, confidence) atau (None, confidence) jika di bawah threshold
+    """
+    candidates = detect_ktp_candidates_by_color_and_shape(frame)
+    best_confidence = 0.0
+    best_candidate = None
+    
+    # Verifikasi setiap kandidat dengan layer 2
+    for candidate in candidates:
+        confidence, result = verify_ktp_candidate_by_template(frame, candidate)
+        if confidence > best_confidence:
+            best_confidence = confidence
+            best_candidate = candidate
+    
+    if best_candidate and best_confidence > KTP_CONFIDENCE_THRESHOLD:
+        return best_candidate, best_confidence
+    return None, best_confidence
+
+
+@traced('detect_face_and_ktp_regions')
+def detect_face_and_ktp_regions(frame):
+    """
+    Deteksi face dan KTP tanpa crop, untuk live guidance (streaming)
+    Returns: dict dengan bbox (x, y, w, h) dan confidence per objek
+    """
+    result = {
+        'face': None,
+        'ktp': None,
+        'face_detected': False,
+        'ktp_detected': False,
+        'both_detected': False
+    }
+    
+    try:
+        if frame is None or frame.size == 0:
+            return result
+        
+        located = locate_face(frame)
+        if located is not None:
+            bbox, score = located
+            result['face'] = {'bbox': list(bbox), 'confidence': round(score, 3)}
+        
+        best_candidate, best_confidence = select_ktp_candidate(frame)
+        if best_candidate:
+            x, y, w, h = best_candidate[:4]
+            result['ktp'] = {'bbox': [int(x), int(y), int(w), int(h)], 'confidence': round(float(best_confidence), 3)}
+        
+        result['face_detected'] = result['face'] is not None
+        result['ktp_detected'] = result['ktp'] is not None
+        result['both_detected'] = result['face_detected'] and result['ktp_detected']
+        return result
+        
+    except Exception as e:
+        logger.error("❌ Error in detect_face_and_ktp_regions: %s", e)
+        return result
+
+
 def get_detection_info():
     """
     Return informasi tentang metode deteksi yang digunakan
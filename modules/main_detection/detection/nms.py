@@ -0,0 +1,151 @@
+"""
+Non-Maximum Suppression
+IoU dan NMS tervektorisasi (NumPy) untuk array bbox (x, y, w, h) + skor,
+pengganti loop O(n^2) per pasangan bbox saat kandidat berjumlah ratusan
+(banyak scale, top-k peak per scale, tiled search).
+
+- iou_matrix: IoU semua pasangan sekaligus (0 jika tidak beririsan / union 0);
+  satu-satunya implementasi IoU, calculate_bbox_overlap hanya wrapper satu pasangan
+- non_max_suppression: greedy NMS; per kandidat yang dipertahankan satu baris
+  IoU dihitung terhadap semua sisa kandidat (tanpa loop Python per pasangan)
+- soft_non_max_suppression: skor kandidat yang overlap diturunkan (linear atau
+  gaussian) alih-alih dibuang, berguna saat dua KTP berdekatan
+
+Urutan skor sama memakai sort stabil sehingga hasilnya identik dengan
+sorted(..., reverse=True) pada list deteksi.
+"""
+import numpy as np
+
+NMS_IOU_THRESHOLD = 0.5         # Overlap > threshold dianggap duplikat
+SOFT_NMS_METHODS = ('linear', 'gaussian')
+SOFT_NMS_SIGMA = 0.5            # Lebar penalti gaussian
+SOFT_NMS_SCORE_THRESHOLD = 0.3  # Kandidat dengan skor hasil decay di bawah ini dibuang
+
+
+def boxes_to_array(bboxes):
+    """List bbox (x, y, w, h) -> array float64 (n, 4)"""
+    return np.asarray(bboxes, dtype=np.float64).reshape(-1, 4)
+
+
+def box_areas(boxes):
+    return boxes[:, 2] * boxes[:, 3]
+
+
+def iou_matrix(boxes_a, boxes_b=None):
+    """
+    IoU setiap pasangan bbox
+    Returns: array (len(boxes_a), len(boxes_b)); boxes_b None = boxes_a vs dirinya sendiri
+    """
+    boxes_a = boxes_to_array(boxes_a)
+    boxes_b = boxes_a if boxes_b is None else boxes_to_array(boxes_b)
+
+    a_x1, a_y1 = boxes_a[:, 0:1], boxes_a[:, 1:2]
+    a_x2, a_y2 = a_x1 + boxes_a[:, 2:3], a_y1 + boxes_a[:, 3:4]
+    b_x1, b_y1 = boxes_b[:, 0], boxes_b[:, 1]
+    b_x2, b_y2 = b_x1 + boxes_b[:, 2], b_y1 + boxes_b[:, 3]
+
+    inter_w = np.clip(np.minimum(a_x2, b_x2) - np.maximum(a_x1, b_x1), 0, None)
+    inter_h = np.clip(np.minimum(a_y2, b_y2) - np.maximum(a_y1, b_y1), 0, None)
+    inter = inter_w * inter_h
+    union = box_areas(boxes_a)[:, None] + box_areas(boxes_b)[None, :] - inter
+
+    iou = np.zeros_like(inter)
+    np.divide(inter, union, out=iou, where=union > 0)
+    return iou
+
+
+def _iou_one_to_many(box, boxes, areas):
+    """IoU satu bbox terhadap banyak bbox (areas boxes sudah dihitung)"""
+    inter_w = np.clip(np.minimum(box[0] + box[2], boxes[:, 0] + boxes[:, 2]) - np.maximum(box[0], boxes[:, 0]), 0, None)
+    inter_h = np.clip(np.minimum(box[1] + box[3], boxes[:, 1] + boxes[:, 3]) - np.maximum(box[1], boxes[:, 1]), 0, None)
+    inter = inter_w * inter_h
+    union = box[2] * box[3] + areas - inter
+
+    iou = np.zeros_like(inter)
+    np.divide(inter, union, out=iou, where=union > 0)
+    return iou
+
+
+def non_max_suppression(boxes, scores, iou_threshold=NMS_IOU_THRESHOLD, max_output=None):
+    """
+    Greedy NMS: ambil skor tertinggi, buang semua sisa kandidat dengan IoU > iou_threshold
+    Returns: array index kandidat yang dipertahankan, urut skor menurun
+    """
+    boxes = boxes_to_array(boxes)
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(-scores, kind='stable')
+    areas = box_areas(boxes)
+
+    # Satu baris IoU per kandidat yang dipertahankan: O(k * n), k = jumlah hasil
+    keep = []
+    while order.size:
+        current = order[0]
+        keep.append(current)
+        if max_output is not None and len(keep) >= max_output:
+            break
+        rest = order[1:]
+        overlap = _iou_one_to_many(boxes[current], boxes[rest], areas[rest])
+        order = rest[overlap <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.intp)
+
+
+def soft_non_max_suppression(boxes, scores, iou_threshold=NMS_IOU_THRESHOLD, method='gaussian',
+                             sigma=SOFT_NMS_SIGMA, score_threshold=SOFT_NMS_SCORE_THRESHOLD,
+                             max_output=None):
+    """
+    Soft-NMS (Bodla et al. 2017): skor kandidat yang overlap dengan kandidat
+    terpilih dikalikan decay, bukan langsung dibuang
+    - linear: skor * (1 - IoU) hanya untuk IoU > iou_threshold
+    - gaussian: skor * exp(-IoU^2 / sigma) untuk semua kandidat
+    Returns: (index yang dipertahankan, skor setelah decay) urut skor menurun
+    """
+    if method not in SOFT_NMS_METHODS:
+        raise ValueError(f"Unknown soft-NMS method: {method}")
+
+    boxes = boxes_to_array(boxes)
+    remaining_scores = np.asarray(scores, dtype=np.float64).copy()
+    remaining = np.arange(len(remaining_scores))
+    areas = box_areas(boxes)
+
+    keep, kept_scores = [], []
+    while remaining.size:
+        best = int(np.argmax(remaining_scores))    # argmax mengambil index pertama saat seri
+        current, current_score = remaining[best], remaining_scores[best]
+        if current_score < score_threshold:
+            break
+        keep.append(current)
+        kept_scores.append(current_score)
+        if max_output is not None and len(keep) >= max_output:
+            break
+
+        remaining = np.delete(remaining, best)
+        remaining_scores = np.delete(remaining_scores, best)
+        overlap = _iou_one_to_many(boxes[current], boxes[remaining], areas[remaining])
+        if method == 'linear':
+            remaining_scores = np.where(overlap > iou_threshold, remaining_scores * (1 - overlap), remaining_scores)
+        else:
+            remaining_scores = remaining_scores * np.exp(-(overlap * overlap) / sigma)
+
+    return np.asarray(keep, dtype=np.intp), np.asarray(kept_scores, dtype=np.float64)
+
+
+def suppress_detections(detections, iou_threshold=NMS_IOU_THRESHOLD, max_output=None,
+                        soft=None, score_key='confidence'):
+    """
+    NMS untuk list dict deteksi dengan key 'bbox' dan score_key
+    soft: None/False = greedy NMS, 'linear'/'gaussian' = soft-NMS. Pada soft-NMS
+    skor hasil decay disimpan di 'nms_score' (confidence asli tidak diubah)
+    Returns: list deteksi terpilih, urut skor menurun
+    """
+    if not detections:
+        return []
+
+    boxes = boxes_to_array([detection['bbox'] for detection in detections])
+    scores = [detection[score_key] for detection in detections]
+
+    if not soft:
+        return [detections[index] for index in non_max_suppression(boxes, scores, iou_threshold, max_output)]
+
+    keep, decayed = soft_non_max_suppression(boxes, scores, iou_threshold, method=soft, max_output=max_output)
+    return [{**detections[index], 'nms_score': float(score)} for index, score in zip(keep, decayed)]
@@ -0,0 +1,87 @@
+"""
+Response Peak Extraction
+Top-k local maxima (atau minima untuk TM_SQDIFF*) dari response map
+cv2.matchTemplate, pengganti satu titik cv2.minMaxLoc per scale.
+
+Hasilnya sama dengan non-max suppression via cv2.dilate resolusi penuh
+(titik = nilai maksimum di window (2rx+1) x (2ry+1) di sekitarnya), tetapi
+dilate dengan kernel seukuran template ~20x lebih lambat. Karena itu:
+- response di-max-pool per sel berukuran radius; setiap local maximum pasti
+  maksimum sel-nya sendiri, jadi kandidat = satu titik per sel
+- sel dikunjungi dari nilai tertinggi; titik terbaik sel diverifikasi exact
+  terhadap window-nya dan berhenti setelah top_k peak (atau di bawah threshold)
+- plateau (titik bernilai sama dalam satu window) disaring greedy sehingga
+  jarak antar peak selalu > radius di salah satu sumbu
+- top_k=1 memakai cv2.minMaxLoc langsung (hasil dan biaya sama dengan perilaku lama)
+"""
+import cv2
+import numpy as np
+
+PEAK_WINDOW_FRACTION = 0.5      # Radius window = fraksi ukuran template per sumbu
+_FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+def peak_window(template_size, fraction=PEAK_WINDOW_FRACTION):
+    """Radius (rx, ry) window suppression dari ukuran template (w, h)"""
+    template_w, template_h = template_size
+    return max(1, int(template_w * fraction)), max(1, int(template_h * fraction))
+
+
+def _passes(value, threshold, minimize):
+    return threshold is None or (value <= threshold if minimize else value >= threshold)
+
+
+def find_response_peaks(response, top_k=1, radius=(1, 1), threshold=None, minimize=False):
+    """
+    Cari top_k peak yang tidak saling berdekatan pada response map
+
+    Args:
+        response: hasil cv2.matchTemplate (float32)
+        radius: (rx, ry), peak lain dalam |dx| <= rx dan |dy| <= ry ditekan
+        threshold: nilai minimum (maksimum jika minimize) agar peak dipakai
+        minimize: True untuk TM_SQDIFF / TM_SQDIFF_NORMED (nilai kecil = cocok)
+
+    Returns: list (x, y, value) urut dari yang paling cocok
+    """
+    if response.size == 0 or top_k <= 0:
+        return []
+
+    if top_k == 1:
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(response)
+        value, (x, y) = (min_val, min_loc) if minimize else (max_val, max_loc)
+        return [(x, y, value)] if _passes(value, threshold, minimize) else []
+
+    # Max-pool (min-pool) per sel; sisi kanan/bawah di-pad dengan nilai yang tidak pernah menang
+    radius_x, radius_y = radius
+    h, w = response.shape[:2]
+    grid_h, grid_w = -(-h // radius_y), -(-w // radius_x)
+    padded = cv2.copyMakeBorder(response, 0, grid_h * radius_y - h, 0, grid_w * radius_x - w,
+                                cv2.BORDER_CONSTANT, value=_FLOAT32_MAX if minimize else -_FLOAT32_MAX)
+    cells = padded.reshape(grid_h, radius_y, grid_w, radius_x)
+    # Reduce sumbu baris dulu (stride besar) lalu kolom: ~4x lebih cepat dari axis=(1, 3) sekaligus
+    pooled = cells.min(axis=1).min(axis=2) if minimize else cells.max(axis=1).max(axis=2)
+
+    values = pooled.ravel()
+    order = np.argsort(values if minimize else -values, kind='stable')
+
+    peaks = []
+    for index in order:
+        value = float(values[index])
+        if not _passes(value, threshold, minimize):
+            break
+        cell_y, cell_x = divmod(int(index), grid_w)
+        cell = cells[cell_y, :, cell_x, :]
+        offset_y, offset_x = np.unravel_index(cell.argmin() if minimize else cell.argmax(), cell.shape)
+        x, y = cell_x * radius_x + int(offset_x), cell_y * radius_y + int(offset_y)
+
+        # Verifikasi exact: nilai sel harus ekstrem di seluruh window-nya
+        window = response[max(y - radius_y, 0):y + radius_y + 1, max(x - radius_x, 0):x + radius_x + 1]
+        if (window.min() < value) if minimize else (window.max() > value):
+            continue
+        # Plateau: titik lain dengan nilai sama di window yang sama juga lolos
+        if any(abs(x - kept_x) <= radius_x and abs(y - kept_y) <= radius_y for kept_x, kept_y, _ in peaks):
+            continue
+        peaks.append((x, y, value))
+        if len(peaks) >= top_k:
+            break
+    return peaks
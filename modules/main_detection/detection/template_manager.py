@@ -3,10 +3,13 @@ Enhanced KTP Template System
 Template management dengan adaptive selection berdasarkan lighting conditions
 """
 import cv2
+import logging
 import numpy as np
 import os
 from typing import Dict, List, Tuple, Optional
 
+logger = logging.getLogger(__name__)
+
 class KTPTemplateManager:
     """
     Advanced template management system for KTP detection
@@ -39,7 +42,7 @@ class KTPTemplateManager:
                 if template_type == 'primary':
                     self.primary_template = template_info
         
-        print(f"✅ Loaded {len(self.templates)} templates")
+        logger.info("✅ Loaded %s templates", len(self.templates))
         
     def _load_template(self, template_path: str, template_type: str) -> Optional[Dict]:
         """Load single template with analysis"""
@@ -84,7 +87,7 @@ class KTPTemplateManager:
             }
             
         except Exception as e:
-            print(f"⚠️ Error loading template {template_path}: {e}")
+            logger.warning("⚠️ Error loading template %s: %s", template_path, e)
             return None
     
     def get_best_template_for_frame(self, frame: np.ndarray) -> Dict:
@@ -1,138 +1,134 @@
 """
 Capture and file management routes
 """
-import time
-import cv2
+import logging
 import os
-import zipfile
-import io
-from datetime import datetime
-from flask import jsonify, make_response, send_from_directory
-from core.config import capture_mode, countdown_status, cap
+import queue
+import uuid
+from flask import Response, jsonify, request, send_file, send_from_directory
+from core.config import capture_mode, countdown_status, cap, CAPTURE_DIR, CAPTURE_DEDUP_ENABLED
+from core.capture_catalog import get_capture_catalog, parse_capture_filename
+from core.capture_jobs import get_capture_job_manager
+from core.capture_store import get_blob_store, get_retention_sweeper, save_capture, wait_for_captures
+from core.capture_writer import get_capture_writer
+from core.tracing import span, trace
+from core.zip_stream import stream_zip
 from detection.main_detector import detect_face_and_ktp
 
+logger = logging.getLogger(__name__)
+
+CAPTURE_SYNC_WAIT_MAX = 10      # Detik maksimal POST /capture?wait= menahan request (client lama)
+CAPTURE_JOB_POLL_WAIT = 30      # Detik maksimal long-poll /capture_jobs/<job_id>?wait=
+
 def init_capture_routes(app):
     @app.route('/capture', methods=['POST'])
     def capture():
         global capture_mode, countdown_status
         
         if capture_mode == 'auto':
-            # Mode otomatis - menunggu deteksi keduanya (wajah dan KTP)
-            start_time = time.time()
-            timeout = 30  # 30 detik timeout
-            
-            face_img = None
-            ktp_img = None
-            ktp_face_img = None
+            # Mode otomatis - capture job berjalan di background (wajah dan KTP stabil).
+            # Default 202 + job_id tanpa menahan thread request; ?wait=<detik> (maks
+            # CAPTURE_SYNC_WAIT_MAX) untuk client lama yang butuh hasil langsung
+            logger.info("Mode otomatis: Menunggu deteksi wajah dan KTP...")
+            job = get_capture_job_manager().start_job(mode='auto')
+            wait = min(request.args.get('wait', 0, type=float), CAPTURE_SYNC_WAIT_MAX)
+            if wait <= 0 or not job.wait(wait):
+                return jsonify({
+                    'status': 'pending',
+                    'job_id': job.job_id,
+                    'status_url': f"/capture_jobs/{job.job_id}",
+                    'mode': capture_mode
+                }), 202
             
-            print("Mode otomatis: Menunggu deteksi wajah dan KTP...")
+            if job.status != 'completed':
+                return jsonify({'status': 'error', 'message': job.message})
             
-            while time.time() - start_time < timeout:
-                success, frame = cap.read()
-                if not success:
-                    continue
-                    
-                face_img, ktp_img, ktp_face_img = detect_face_and_ktp(frame)
-                
-                if face_img is not None and ktp_img is not None:
-                    print("✅ Kedua objek terdeteksi! Melakukan capture...")
-                    break
-                    
-                time.sleep(0.1)  # Small delay
-            
-            if face_img is None or ktp_img is None:
-                return jsonify({
-                    'status': 'error', 
-                    'message': 'Timeout: Tidak dapat mendeteksi wajah dan KTP dalam 30 detik'
-                })
+            result = job.result
         
         else:
             # Mode manual - langsung capture apa yang ada
-            success, frame = cap.read()
-            if not success:
-                return jsonify({'status': 'error', 'message': 'Tidak dapat mengakses kamera'})
-            
-            face_img, ktp_img, ktp_face_img = detect_face_and_ktp(frame)
-        
-        # Simpan hasil capture
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        session_id = f"CS_{timestamp[:8]}_{timestamp[9:]}"
-        user_id = f"USER_{timestamp}"
-        
-        # Buat folder untuk session
-        session_folder = f"static/captured_ktp"
-        os.makedirs(session_folder, exist_ok=True)
-        
-        captured_files = []
-        
-        # Simpan wajah jika terdeteksi
-        if face_img is not None:
-            face_filename = f"{session_id}_{user_id}_face_{timestamp}.jpg"
-            face_path = os.path.join(session_folder, face_filename)
-            cv2.imwrite(face_path, face_img)
-            captured_files.append(face_filename)
-        
-        # Simpan KTP jika terdeteksi
-        if ktp_img is not None:
-            ktp_filename = f"{session_id}_{user_id}_ktp_{timestamp}.jpg"
-            ktp_path = os.path.join(session_folder, ktp_filename)
-            cv2.imwrite(ktp_path, ktp_img)
-            captured_files.append(ktp_filename)
-        
-        # Simpan foto di KTP jika terdeteksi
-        if ktp_face_img is not None:
-            ktp_face_filename = f"{session_id}_{user_id}_ktp_face_{timestamp}.jpg"
-            ktp_face_path = os.path.join(session_folder, ktp_face_filename)
-            cv2.imwrite(ktp_face_path, ktp_face_img)
-            captured_files.append(ktp_face_filename)
-        
-        # Simpan full frame untuk referensi
-        full_filename = f"{session_id}_{user_id}_full_{timestamp}.jpg"
-        full_path = os.path.join(session_folder, full_filename)
-        success, frame = cap.read()
-        if success:
-            cv2.imwrite(full_path, frame)
-            captured_files.append(full_filename)
+            with trace(f"capture-{uuid.uuid4().hex[:12]}", stage='capture_request'):
+                with span('camera_read'):
+                    success, frame = cap.read()
+                if not success:
+                    return jsonify({'status': 'error', 'message': 'Tidak dapat mengakses kamera'})
+                
+                face_img, ktp_img, ktp_face_img = detect_face_and_ktp(frame)
+                
+                # Simpan hasil capture (penulisan ke disk lewat writer pool)
+                try:
+                    result = save_capture(face_img, ktp_img, ktp_face_img, frame)
+                except queue.Full:
+                    return jsonify({'status': 'error', 'message': 'Penyimpanan sedang sibuk, coba lagi'}), 503
+            result.update({
+                'face_detected': face_img is not None,
+                'ktp_detected': ktp_img is not None,
+                'ktp_face_detected': ktp_face_img is not None
+            })
         
         return jsonify({
             'status': 'success',
-            'session_id': session_id,
-            'captured_files': captured_files,
-            'face_detected': face_img is not None,
-            'ktp_detected': ktp_img is not None,
-            'ktp_face_detected': ktp_face_img is not None,
+            'session_id': result['session_id'],
+            'captured_files': result['captured_files'],
+            'face_detected': result['face_detected'],
+            'ktp_detected': result['ktp_detected'],
+            'ktp_face_detected': result['ktp_face_detected'],
             'mode': capture_mode
         })
 
+    @app.route('/capture_jobs', methods=['POST'])
+    def start_capture_job():
+        """Mulai auto capture job tanpa menunggu, client polling via /capture_jobs/<job_id>"""
+        job = get_capture_job_manager().start_job(mode='auto')
+        return jsonify({'status': 'pending', 'job_id': job.job_id}), 202
+
+    @app.route('/capture_jobs/<job_id>')
+    def capture_job_status(job_id):
+        """
+        Status capture job. Long-poll dengan ?wait=<detik> (maks 30)
+        untuk menunggu job selesai sebelum response dikirim.
+        """
+        job = get_capture_job_manager().get_job(job_id)
+        if job is None:
+            return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+        
+        wait = min(request.args.get('wait', 0, type=float), CAPTURE_JOB_POLL_WAIT)
+        if wait > 0:
+            job.wait(wait)
+        
+        return jsonify(job.to_dict())
+
+    @app.route('/capture_writer/stats')
+    def capture_writer_stats():
+        """Metric writer pool: kedalaman antrian, file dan bytes yang sudah durable"""
+        stats = get_capture_writer().get_stats()
+        if CAPTURE_DEDUP_ENABLED:
+            stats['dedup'] = get_blob_store().get_stats()
+        return jsonify(stats)
+
+    @app.route('/retention/stats')
+    def retention_stats():
+        """Metric retensi: backlog capture kedaluwarsa dan bytes yang sudah dibebaskan"""
+        return jsonify(get_retention_sweeper().get_stats())
+
     @app.route('/download/<session_id>')
     def download_session(session_id):
-        """Download semua file dari session sebagai ZIP"""
+        """Download semua file dari session sebagai ZIP (streaming per chunk)"""
         try:
-            session_folder = f"static/captured_ktp"
+            # Capture yang baru saja disimpan bisa masih di antrian writer
+            wait_for_captures(session_id)
             
-            # Cari semua file untuk session ini
-            session_files = []
-            if os.path.exists(session_folder):
-                for filename in os.listdir(session_folder):
-                    if filename.startswith(session_id):
-                        session_files.append(filename)
+            # Cari semua file untuk session ini lewat katalog
+            session_files = get_capture_catalog().files_for_session(session_id)
             
             if not session_files:
                 return jsonify({'error': 'No files found for this session'}), 404
             
-            # Buat ZIP file in memory
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for filename in session_files:
-                    file_path = os.path.join(session_folder, filename)
-                    if os.path.exists(file_path):
-                        zip_file.write(file_path, filename)
+            entries = [(os.path.join(CAPTURE_DIR, entry['path']), entry['filename'])
+                       for entry in session_files]
             
-            zip_buffer.seek(0)
-            
-            # Return ZIP file
-            response = make_response(zip_buffer.getvalue())
-            response.headers['Content-Type'] = 'application/zip'
+            # Return ZIP file - JPEG disimpan tanpa kompresi ulang (ZIP_STORED)
+            response = Response(stream_zip(entries), mimetype='application/zip')
             response.headers['Content-Disposition'] = f'attachment; filename={session_id}_capture.zip'
             
             return response
@@ -140,41 +136,56 @@ def init_capture_routes(app):
         except Exception as e:
             return jsonify({'error': f'Error creating download: {str(e)}'}), 500
 
+    @app.route('/download/<session_id>/<filename>')
+    def download_session_file(session_id, filename):
+        """Download satu file dari session, mendukung HTTP Range/resume"""
+        wait_for_captures(session_id)
+        entry = get_capture_catalog().get(filename)
+        if entry is None or entry['session_id'] != session_id:
+            return jsonify({'error': 'File not found'}), 404
+        
+        # conditional=True: ETag, If-Range dan Range request ditangani werkzeug
+        return send_file(os.path.join(CAPTURE_DIR, entry['path']), as_attachment=True,
+                         download_name=filename, conditional=True)
+
     @app.route('/captured_files')
     def captured_files():
-        """List semua file yang sudah di-capture"""
+        """
+        List file yang sudah di-capture (terbaru dulu) dari capture catalog
+        Query params: page, per_page, session_id, user_id, type, since, until
+        """
         try:
-            captured_folder = "static/captured_ktp"
-            files = []
-            
-            if os.path.exists(captured_folder):
-                for filename in os.listdir(captured_folder):
-                    if filename.endswith('.jpg'):
-                        file_path = os.path.join(captured_folder, filename)
-                        # Parse info dari filename
-                        parts = filename.split('_')
-                        if len(parts) >= 6:
-                            session_id = f"{parts[0]}_{parts[1]}_{parts[2]}"
-                            user_id = f"{parts[3]}_{parts[4]}"
-                            capture_type = parts[5]
-                            timestamp = parts[6].replace('.jpg', '')
-                            
-                            files.append({
-                                'filename': filename,
-                                'session_id': session_id,
-                                'user_id': user_id,
-                                'type': capture_type,
-                                'timestamp': timestamp,
-                                'size': os.path.getsize(file_path)
-                            })
-            
-            # Sort by timestamp (newest first)
-            files.sort(key=lambda x: x['timestamp'], reverse=True)
+            page = max(request.args.get('page', 1, type=int), 1)
+            per_page = min(max(request.args.get('per_page', 100, type=int), 1), 500)
+            
+            # Tanpa filter session: tunggu semua capture yang masih pending
+            wait_for_captures(request.args.get('session_id'))
+            
+            entries, total = get_capture_catalog().list_captures(
+                session_id=request.args.get('session_id'),
+                user_id=request.args.get('user_id'),
+                capture_type=request.args.get('type'),
+                since=request.args.get('since'),
+                until=request.args.get('until'),
+                limit=per_page,
+                offset=(page - 1) * per_page
+            )
+            
+            files = [{
+                'filename': entry['filename'],
+                'session_id': entry['session_id'],
+                'user_id': entry['user_id'],
+                'type': entry['type'],
+                'timestamp': entry['timestamp'],
+                'size': entry['size']
+            } for entry in entries]
             
             return jsonify({
                 'status': 'success',
                 'files': files,
-                'total': len(files)
+                'total': total,
+                'page': page,
+                'per_page': per_page
             })
             
         except Exception as e:
@@ -182,5 +193,13 @@ def init_capture_routes(app):
 
     @app.route('/static/captured_ktp/<filename>')
     def serve_captured_file(filename):
-        """Serve captured files"""
-        return send_from_directory('static/captured_ktp', filename)
+        """Serve captured files (URL lama tetap berlaku, lokasi file dari katalog)"""
+        parsed = parse_capture_filename(filename)
+        if parsed is not None:
+            wait_for_captures(parsed['session_id'])
+        entry = get_capture_catalog().get(filename)
+        if entry is not None:
+            return send_from_directory(CAPTURE_DIR, entry['path'])
+        
+        # File flat yang belum dimigrasi / belum tercatat di katalog
+        return send_from_directory(CAPTURE_DIR, filename)
@@ -1,13 +1,31 @@
 """
 Main routes for the application
 """
-import cv2
+import json
+import logging
 from flask import render_template, Response, jsonify, request
-from core.video_stream import gen_frames
-from core.config import capture_mode, countdown_status, cap
-from detection.main_detector import detect_face_and_ktp
+from core.video_stream import gen_frames, active_stream_count
+from core.config import capture_mode, countdown_status
+from core.detection_worker import get_detection_worker
+from core.capture_writer import get_capture_writer
+from core.capture_store import get_retention_sweeper
+from core.governor import get_governor
+from core.tracing import get_tracer
+from detection.cascade import get_cascade_stats
+
+logger = logging.getLogger(__name__)
 
 def init_main_routes(app):
+    tracer = get_tracer()
+    tracer.register_gauge('capture_writer_queue_depth', 'Capture files waiting to be written',
+                          lambda: get_capture_writer().get_stats()['queue_depth'])
+    tracer.register_gauge('capture_retention_backlog', 'Expired captures pending deletion',
+                          lambda: sum(root['backlog'] for root in get_retention_sweeper().get_stats().values()))
+    governor = get_governor()
+    governor.register_session_source(active_stream_count)
+    tracer.register_gauge('governor_level', 'Active performance governor level (0 = full quality)',
+                          lambda: governor.get_stats()['level'])
+
     @app.route('/')
     def index():
         return render_template('index.html')
@@ -26,43 +44,31 @@ def init_main_routes(app):
             return jsonify({'status': 'success', 'mode': capture_mode})
         return jsonify({'status': 'error', 'message': 'Invalid mode'})
 
+    def build_detection_status(result):
+        """Bentuk payload status dari hasil detection worker"""
+        return {
+            'face_detected': result['face_detected'],
+            'ktp_detected': result['ktp_detected'],
+            'both_detected': result['both_detected'],
+            'mode': capture_mode,
+            'countdown': countdown_status,
+            'threshold': 'Advanced Feature Matching'
+        }
+
     @app.route('/detection_status', methods=['GET'])
     def detection_status():
         """Endpoint untuk mendapatkan status deteksi real-time"""
-        global cap
-        
         try:
-            # Simple error handling untuk kamera
-            success, frame = cap.read()
-            if not success:
-                # Reinitialize kamera
-                cap.release()
-                cap = cv2.VideoCapture(0)
-                success, frame = cap.read()
-                if not success:
-                    return jsonify({'error': 'Kamera tidak dapat diakses'}), 500
+            # Ambil hasil terbaru dari shared detection worker (tanpa deteksi ulang)
+            worker = get_detection_worker()
+            result = worker.get_latest() or worker.wait_for_result(timeout=2)
+            if result is None:
+                return jsonify({'error': 'Kamera tidak dapat diakses'}), 500
             
-            # Detection with error handling
-            face_img, ktp_img, ktp_face_img = detect_face_and_ktp(frame)
-            
-            # Ensure we always return valid boolean values
-            face_detected = face_img is not None and len(face_img) > 0
-            ktp_detected = ktp_img is not None
-            both_detected = face_detected and ktp_detected
-            
-            status = {
-                'face_detected': face_detected,
-                'ktp_detected': ktp_detected,
-                'both_detected': both_detected,
-                'mode': capture_mode,
-                'countdown': countdown_status,
-                'threshold': 'Advanced Feature Matching'
-            }
-            
-            return jsonify(status)
+            return jsonify(build_detection_status(result))
             
         except Exception as e:
-            print(f"❌ Error in detection_status: {str(e)}")
+            logger.error("❌ Error in detection_status: %s", e)
             # Return safe default status
             return jsonify({
                 'face_detected': False,
@@ -73,3 +79,54 @@ def init_main_routes(app):
                 'threshold': 'Advanced Feature Matching',
                 'error': f'Detection error: {str(e)}'
             }), 200  # Return 200 instead of 500 to prevent browser errors
+
+    @app.route('/metrics')
+    def metrics():
+        """Latency per stage pipeline deteksi dalam format Prometheus"""
+        return Response(tracer.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/metrics/summary')
+    def metrics_summary():
+        """Ringkasan latency per stage (p50/p95/p99), trace frame terakhir dan early exit cascade dalam JSON"""
+        return jsonify({
+            'stages': tracer.get_stats(),
+            'recent_traces': tracer.recent_traces(),
+            'cascades': get_cascade_stats()
+        })
+
+    @app.route('/governor/stats')
+    def governor_stats():
+        """Profil performa aktif, pressure per sinyal dan jumlah perpindahan level"""
+        return jsonify({'status': 'success', 'governor': governor.get_stats(),
+                        'profile': governor.current_profile()})
+
+    @app.route('/detection_events')
+    def detection_events():
+        """
+        Server-Sent Events: push status deteksi setiap kali state berubah.
+        Maksimal satu event per hasil baru dari detection worker.
+        """
+        def event_stream():
+            worker = get_detection_worker()
+            last_sequence = 0
+            last_status = None
+            
+            while True:
+                result = worker.wait_for_result(last_sequence, timeout=15)
+                if result is None:
+                    # Keep-alive comment agar koneksi tidak di-drop proxy
+                    yield ': keep-alive\n\n'
+                    continue
+                
+                last_sequence = result['sequence']
+                status = build_detection_status(result)
+                if status == last_status:
+                    continue
+                
+                last_status = status
+                yield f"id: {last_sequence}\ndata: {json.dumps(status)}\n\n"
+        
+        response = Response(event_stream(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
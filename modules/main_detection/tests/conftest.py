@@ -0,0 +1,8 @@
+"""
+Test kernel numerik deteksi (tanpa kamera, template atau core.config)
+Jalankan dari modules/main_detection: python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,100 @@
+"""BlobStore: dedup exact/near-duplicate, GC blob tanpa referensi, rollback saat writer penuh"""
+import os
+import queue
+import time
+import numpy as np
+import pytest
+from core.blob_store import BlobStore
+from core.capture_writer import CaptureWriter
+
+GRACE = 60
+
+
+def make_image(seed, noise=0):
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, (60, 90, 3), dtype=np.uint8)
+    if noise:
+        image = np.clip(image.astype(np.int16) + rng.integers(-noise, noise + 1, image.shape), 0, 255).astype(np.uint8)
+    return image
+
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def blob_files(root):
+    return sorted(os.path.join(dirpath, name) for dirpath, _, names in os.walk(root) for name in names)
+
+
+def test_exact_and_near_duplicates_share_one_blob(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    image = make_image(0)
+    first = store.store(b'first', str(tmp_path / 'a' / 'face.jpg'), image=image, group='face')
+    exact = store.store(b'first', str(tmp_path / 'b' / 'face.jpg'))
+    near = store.store(b'retake', str(tmp_path / 'c' / 'face.jpg'), image=make_image(0, noise=2), group='face')
+    other = store.store(b'other', str(tmp_path / 'd' / 'face.jpg'), image=make_image(1), group='face')
+
+    assert [result['status'] for result in (first, exact, near, other)] == ['new', 'exact', 'near', 'new']
+    assert first['blob'] == exact['blob'] == near['blob'] != other['blob']
+    assert os.stat(first['blob']).st_nlink == 4
+    assert (tmp_path / 'c' / 'face.jpg').read_bytes() == b'first'
+
+    stats = store.get_stats()
+    assert (stats['new_blobs'], stats['exact_duplicates'], stats['near_duplicates']) == (2, 1, 1)
+    assert stats['bytes_written'] == len(b'first') + len(b'other')
+
+
+def test_gc_removes_only_old_unreferenced_blobs(tmp_path):
+    root = tmp_path / 'blobs'
+    store = BlobStore(str(root))
+    kept = store.store(b'kept', str(tmp_path / 's1' / 'ktp.jpg'))['blob']
+    orphan = store.store(b'orphan', str(tmp_path / 's2' / 'ktp.jpg'))['blob']
+    young = store.store(b'young', str(tmp_path / 's3' / 'ktp.jpg'))['blob']
+    for blob in (kept, orphan):
+        age(blob, GRACE + 1)
+    os.remove(tmp_path / 's2' / 'ktp.jpg')     # Capture dihapus retensi
+    os.remove(tmp_path / 's3' / 'ktp.jpg')     # Orphan tapi masih dalam grace
+
+    assert store.gc(GRACE) == (1, len(b'orphan'))
+    assert blob_files(root) == sorted([kept, young])
+    assert store.get_stats()['gc_removed'] == 1
+
+    os.remove(tmp_path / 's1' / 'ktp.jpg')
+    age(young, GRACE + 1)
+    assert store.gc(GRACE) == (2, len(b'kept') + len(b'young'))
+    assert blob_files(root) == []
+
+
+def test_gc_forgets_removed_blob_for_near_duplicates(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    image = make_image(2)
+    target = tmp_path / 's1' / 'face.jpg'
+    blob = store.store(b'face', str(target), image=image, group='face')['blob']
+    os.remove(target)
+    age(blob, GRACE + 1)
+    assert store.gc(GRACE)[0] == 1
+
+    # Retake mirip setelah GC harus menulis blob baru, bukan link ke blob yang sudah dihapus
+    result = store.store(b'face-2', str(tmp_path / 's2' / 'face.jpg'), image=image, group='face')
+    assert result['status'] == 'new'
+    assert (tmp_path / 's2' / 'face.jpg').read_bytes() == b'face-2'
+
+
+def test_writer_full_rolls_back_stats_and_near_duplicate_entry(tmp_path):
+    writer = CaptureWriter(num_threads=0, max_queue=1, submit_timeout=0.01)
+    writer.submit(str(tmp_path / 'filler'), b'')
+    store = BlobStore(str(tmp_path / 'blobs'), writer=writer)
+    image = make_image(3)
+
+    with pytest.raises(queue.Full):
+        store.store(b'face', str(tmp_path / 's1' / 'face.jpg'), image=image, group='face')
+
+    stats = store.get_stats()
+    assert (stats['new_blobs'], stats['bytes_written'], stats['pending_blobs']) == (0, 0, 0)
+
+    # Retake setelah antrian lega tidak boleh dianggap near-duplicate dari blob yang tidak pernah ditulis
+    store.writer = None
+    result = store.store(b'face', str(tmp_path / 's2' / 'face.jpg'), image=image, group='face')
+    assert result['status'] == 'new'
+    assert (tmp_path / 's2' / 'face.jpg').read_bytes() == b'face'
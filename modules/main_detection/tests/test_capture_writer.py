@@ -0,0 +1,108 @@
+"""CaptureWriter: callback durability, error path, backpressure, flush dan PendingWrites per capture"""
+import os
+import queue
+import threading
+import pytest
+from core.capture_writer import CaptureWriter, PendingWrites
+
+
+class Recorder:
+    """on_durable yang mencatat (path, error, isi file saat callback dipanggil)"""
+
+    def __init__(self, expected):
+        self.calls = []
+        self.expected = expected
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, path, error):
+        content = None
+        if error is None:
+            with open(path, 'rb') as handle:
+                content = handle.read()
+        with self._lock:
+            self.calls.append((path, error, content))
+            if len(self.calls) >= self.expected:
+                self.done.set()
+
+
+def test_callback_fires_after_file_is_complete(tmp_path):
+    writer = CaptureWriter(num_threads=2, batch_size=3)
+    payloads = {str(tmp_path / 'a' / f'{index}.jpg'): os.urandom(1000 + index) for index in range(10)}
+    recorder = Recorder(len(payloads))
+    for path, data in payloads.items():
+        writer.submit(path, data, recorder)
+
+    assert writer.flush(timeout=5)
+    assert recorder.done.wait(1)
+    assert sorted(call[0] for call in recorder.calls) == sorted(payloads)
+    for path, error, content in recorder.calls:
+        assert error is None
+        assert content == payloads[path]
+
+    stats = writer.get_stats()
+    assert stats['written'] == stats['submitted'] == 10
+    assert stats['bytes_written'] == sum(len(data) for data in payloads.values())
+    assert stats['errors'] == 0
+    assert not [name for name in os.listdir(tmp_path / 'a') if name.endswith('.tmp')]
+
+
+def test_write_errors_reach_callback_without_leaving_temp_files(tmp_path):
+    blocker = tmp_path / 'blocker'
+    blocker.write_bytes(b'')                    # makedirs gagal: parent adalah file
+    target_dir = tmp_path / 'target'
+    (target_dir / 'taken.jpg').mkdir(parents=True)  # os.replace gagal: path final direktori
+
+    writer = CaptureWriter(num_threads=1)
+    good = str(target_dir / 'ok.jpg')
+    bad_paths = [str(blocker / 'x.jpg'), str(target_dir / 'taken.jpg')]
+    recorder = Recorder(3)
+    for path in bad_paths + [good]:
+        writer.submit(path, b'data', recorder)
+
+    assert writer.flush(timeout=5)
+    assert recorder.done.wait(1)
+    results = {path: error for path, error, _ in recorder.calls}
+    assert results[good] is None
+    assert all(isinstance(results[path], OSError) for path in bad_paths)
+    assert writer.get_stats()['errors'] == 2
+    assert sorted(os.listdir(target_dir)) == ['ok.jpg', 'taken.jpg']
+
+
+def test_full_queue_rejects_after_timeout():
+    writer = CaptureWriter(num_threads=0, max_queue=1, submit_timeout=0.05)
+    writer.submit('unused-1', b'')
+    with pytest.raises(queue.Full):
+        writer.submit('unused-2', b'')
+
+    stats = writer.get_stats()
+    assert stats['submitted'] == 1
+    assert stats['rejected'] == 1
+    assert stats['queue_depth'] == 1
+    assert writer.flush(timeout=0.05) is False
+
+
+def test_pending_writes_wait_only_for_their_own_key(tmp_path):
+    writer = CaptureWriter(num_threads=0)
+    pending = PendingWrites(writer)
+    pending.submit('capture-a', str(tmp_path / 'a.jpg'), b'a')
+    pending.submit('capture-b', str(tmp_path / 'b.jpg'), b'b')
+
+    # Tanpa worker: keduanya belum durable, key lain tidak pernah menunggu
+    assert pending.wait('capture-a', timeout=0.05) is False
+    assert pending.wait('capture-c', timeout=0)
+
+    # Worker hanya menyelesaikan request pertama (capture-a)
+    writer._write_batch([writer._queue.get_nowait()])
+    assert pending.wait('capture-a', timeout=1)
+    assert (tmp_path / 'a.jpg').read_bytes() == b'a'
+    assert pending.wait('capture-b', timeout=0.05) is False
+
+
+def test_pending_writes_release_key_when_submit_fails(tmp_path):
+    writer = CaptureWriter(num_threads=0, max_queue=1, submit_timeout=0.01)
+    pending = PendingWrites(writer)
+    pending.submit('capture-a', str(tmp_path / 'a.jpg'), b'a')
+    with pytest.raises(queue.Full):
+        pending.submit('capture-b', str(tmp_path / 'b.jpg'), b'b')
+    assert pending.wait('capture-b', timeout=0)
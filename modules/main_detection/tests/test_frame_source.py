@@ -0,0 +1,76 @@
+"""Frame source: folder gambar (file rusak, cache LRU) dan reconnect network stream"""
+import threading
+import time
+import cv2
+import numpy as np
+from core.frame_source import ImageDirectorySource, NetworkStreamSource, open_frame_source
+
+
+def write_images(folder, count):
+    for index in range(count):
+        cv2.imwrite(str(folder / f'{index:03d}.png'), np.full((8, 8, 3), index, np.uint8))
+
+
+def read_values(source, count):
+    values = []
+    for _ in range(count):
+        success, frame = source.read()
+        values.append(int(frame[0, 0, 0]) if success else None)
+    return values
+
+
+def test_unreadable_image_is_skipped(tmp_path):
+    write_images(tmp_path, 3)
+    (tmp_path / '001.png').write_bytes(b'not an image')
+
+    source = ImageDirectorySource(str(tmp_path), pace='fast')
+    assert read_values(source, 5) == [0, 2, 0, 2, 0]
+    assert len(source.paths) == 2
+
+    once = ImageDirectorySource(str(tmp_path), pace='fast', loop=False)
+    assert read_values(once, 3) == [0, 2, None]
+
+
+def test_all_images_unreadable_ends_stream(tmp_path):
+    (tmp_path / 'a.jpg').write_bytes(b'')
+    source = ImageDirectorySource(str(tmp_path), pace='fast')
+    assert source.read() == (False, None)
+
+
+def test_image_cache_is_bounded_and_opt_in(tmp_path):
+    write_images(tmp_path, 6)
+
+    uncached = open_frame_source(f'images:{tmp_path}', pace='fast')
+    read_values(uncached, 12)
+    assert len(uncached.cache) == 0
+
+    cached = open_frame_source(f'images:{tmp_path}?cache=4', pace='fast')
+    assert read_values(cached, 12) == [index % 6 for index in range(12)]
+    assert list(cached.cache) == [str(tmp_path / f'{index:03d}.png') for index in (2, 3, 4, 5)]
+
+    # Cache berisi frame asli; read() mengembalikan salinan
+    success, frame = cached.read()
+    frame[:] = 255
+    assert int(cached.cache[str(tmp_path / '000.png')][0, 0, 0]) == 0
+
+
+def test_stream_reconnect_does_not_block_readers(tmp_path):
+    source = NetworkStreamSource(str(tmp_path / 'missing.mjpg'), reconnect_delay=0.3)
+    try:
+        start = time.monotonic()
+        results = []
+        readers = [threading.Thread(target=lambda: results.append(source.read())) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join()
+        assert results == [(False, None)] * 4
+        assert time.monotonic() - start < 0.2
+
+        deadline = time.monotonic() + 5
+        while source.reconnects < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert source.reconnects == 1
+        assert source.read() == (False, None)     # Masih gagal: reconnect berikutnya dijadwalkan
+    finally:
+        source.release()
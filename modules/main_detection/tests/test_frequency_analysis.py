@@ -0,0 +1,62 @@
+"""Energi pita rfft2 + bobot kolom vs fft2 + fftshift + mask radial penuh"""
+import numpy as np
+import pytest
+from detection.frequency_analysis import (UNBOUNDED, band_count, band_sum, high_frequency_ratio,
+                                          magnitude_spectrum, radial_band_energies, total_sum)
+
+SHAPES = [(80, 128), (81, 127), (64, 64), (37, 52), (50, 1), (1, 9)]
+
+
+def full_spectrum(image):
+    return np.abs(np.fft.fftshift(np.fft.fft2(image.astype(np.float64))))
+
+
+def radius_sq(shape):
+    h, w = shape
+    y, x = np.ogrid[:h, :w]
+    return (y - h // 2) ** 2 + (x - w // 2) ** 2
+
+
+def full_mask(shape, low_sq=UNBOUNDED, high_sq=None):
+    r2 = radius_sq(shape)
+    mask = r2 > low_sq
+    if high_sq is not None:
+        mask &= r2 <= high_sq
+    return mask
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_band_sum_matches_full_fft(shape):
+    image = np.random.default_rng(sum(shape)).integers(0, 256, shape).astype(np.uint8)
+    half = magnitude_spectrum(image)
+    full = full_spectrum(image)
+    for low_sq, high_sq in [(UNBOUNDED, 0), (UNBOUNDED, 25), (25, 100), (100, None), (UNBOUNDED, None)]:
+        mask = full_mask(shape, low_sq, high_sq)
+        assert band_sum(half, shape, low_sq, high_sq) == pytest.approx(float(np.sum(full * mask)), rel=1e-5, abs=1e-3)
+        assert band_count(shape, low_sq, high_sq) == float(mask.sum())
+    assert total_sum(half, shape) == pytest.approx(float(full.sum()), rel=1e-5)
+
+
+@pytest.mark.parametrize('shape', [(80, 128), (81, 127), (45, 60)])
+def test_radial_band_energies_match_reference(shape):
+    h, w = shape
+    image = np.random.default_rng(h * w).integers(0, 256, shape).astype(np.uint8)
+    log_spectrum = np.log(full_spectrum(image) + 1)
+    low_mask = radius_sq(shape) <= (min(h, w) // 8) ** 2
+    mid_mask = (radius_sq(shape) <= (min(h, w) // 4) ** 2) & ~low_mask
+    high_mask = ~(low_mask | mid_mask)
+
+    energies = radial_band_energies(image)
+    assert energies['low'] == pytest.approx(float(np.sum(log_spectrum * low_mask)), rel=1e-5)
+    assert energies['mid'] == pytest.approx(float(np.sum(log_spectrum * mid_mask)), rel=1e-5)
+    assert energies['high'] == pytest.approx(float(np.sum(log_spectrum * high_mask)), rel=1e-5)
+    assert energies['low_variance'] == pytest.approx(float(np.var(log_spectrum * low_mask)), rel=1e-4)
+    assert energies['mid_variance'] == pytest.approx(float(np.var(log_spectrum * mid_mask)), rel=1e-4)
+
+
+def test_high_frequency_ratio_matches_reference():
+    image = np.random.default_rng(7).integers(0, 256, (60, 90)).astype(np.uint8)
+    full = full_spectrum(image)
+    high = radius_sq(image.shape) > (min(image.shape) // 4) ** 2
+    expected = np.sum(full * high) / (np.sum(full) + 1e-7)
+    assert high_frequency_ratio(image) == pytest.approx(float(expected), rel=1e-5)
@@ -0,0 +1,87 @@
+"""PerformanceGovernor: hysteresis level dan pemulihan setelah sinyal berhenti dilaporkan"""
+from core.governor import (DEGRADE_DWELL, EVALUATE_INTERVAL, RECOVER_DWELL, SIGNAL_STALE_AFTER,
+                           PerformanceGovernor)
+from core.tracing import Tracer
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_governor(clock):
+    tracer = Tracer()
+    return PerformanceGovernor(cpu_source=None, tracer=tracer, clock=clock), tracer
+
+
+def run(governor, clock, seconds, report=None):
+    """Majukan waktu per EVALUATE_INTERVAL; report(governor) dipanggil sebelum tiap evaluasi"""
+    levels = []
+    for _ in range(int(seconds / EVALUATE_INTERVAL)):
+        clock.now += EVALUATE_INTERVAL
+        if report:
+            report(governor)
+        levels.append(governor.current_profile()['level'])
+    return levels
+
+
+def test_degrades_one_level_per_dwell():
+    clock = FakeClock()
+    governor, _ = make_governor(clock)
+    levels = run(governor, clock, DEGRADE_DWELL * 3, lambda g: g.report('queue_lag', 2.0))
+
+    assert levels[0] == 0
+    assert levels[-1] == len(governor.profiles) - 1
+    # Tidak pernah lompat lebih dari satu level per evaluasi
+    assert all(b - a in (0, 1) for a, b in zip(levels, levels[1:]))
+    assert levels.index(2) - levels.index(1) >= DEGRADE_DWELL / EVALUATE_INTERVAL
+
+
+def test_pressure_between_thresholds_holds_level():
+    clock = FakeClock()
+    governor, _ = make_governor(clock)
+    run(governor, clock, DEGRADE_DWELL * 2, lambda g: g.report('queue_lag', 2.0))
+    level = governor.current_profile()['level']
+    assert level > 0
+
+    # 0.4 detik = pressure 0.8: di antara RECOVER_PRESSURE dan DEGRADE_PRESSURE
+    levels = run(governor, clock, RECOVER_DWELL * 3, lambda g: g.report('queue_lag', 0.4))
+    assert set(levels[-RECOVER_DWELL:]) == {level}
+
+
+def test_recovers_when_queue_lag_reports_stop():
+    clock = FakeClock()
+    governor, _ = make_governor(clock)
+    run(governor, clock, DEGRADE_DWELL * 3, lambda g: g.report('queue_lag', 2.0))
+    assert governor.current_profile()['level'] == 2
+
+    # Semua viewer disconnect: tidak ada sample queue_lag lagi
+    levels = run(governor, clock, RECOVER_DWELL * 4)
+    assert levels[-1] == 0
+    assert all(a - b in (0, 1) for a, b in zip(levels, levels[1:]))
+
+    clock.now += SIGNAL_STALE_AFTER
+    assert 'queue_lag' not in governor.get_stats()['signals']
+
+
+def test_recovers_when_stage_samples_stop():
+    clock = FakeClock()
+    governor, tracer = make_governor(clock)
+    run(governor, clock, DEGRADE_DWELL * 3, lambda g: tracer.observe('frame_total', 1.0))
+    assert governor.current_profile()['level'] == 2
+    assert governor.get_stats()['pressure']['stage:frame_total'] >= 1.0
+
+    levels = run(governor, clock, RECOVER_DWELL * 4)
+    assert levels[-1] == 0
+
+
+def test_fresh_samples_are_not_decayed():
+    clock = FakeClock()
+    governor, _ = make_governor(clock)
+    governor.report('queue_lag', 1.0)
+    clock.now += 1.0
+    governor.evaluate()
+    assert governor.get_stats()['pressure']['queue_lag'] == 2.0
@@ -0,0 +1,87 @@
+"""IoU/NMS tervektorisasi vs loop per pasangan (perilaku filter_and_rank_detections lama)"""
+import numpy as np
+import pytest
+from detection.nms import (iou_matrix, non_max_suppression, soft_non_max_suppression,
+                           suppress_detections)
+
+
+def naive_iou(bbox1, bbox2):
+    x1, y1, w1, h1 = bbox1
+    x2, y2, w2, h2 = bbox2
+    inter_x1, inter_y1 = max(x1, x2), max(y1, y2)
+    inter_x2, inter_y2 = min(x1 + w1, x2 + w2), min(y1 + h1, y2 + h2)
+    if inter_x2 <= inter_x1 or inter_y2 <= inter_y1:
+        return 0.0
+    inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
+    union_area = w1 * h1 + w2 * h2 - inter_area
+    return 0.0 if union_area == 0 else inter_area / union_area
+
+
+def naive_nms(boxes, scores, threshold=0.5):
+    order = sorted(range(len(boxes)), key=lambda index: scores[index], reverse=True)
+    kept = []
+    for index in order:
+        if all(naive_iou(boxes[index], boxes[other]) <= threshold for other in kept):
+            kept.append(index)
+    return kept
+
+
+def random_boxes(rng, count):
+    # Ukuran 0 ikut diuji (union 0 / tanpa irisan); skor dibulatkan agar ada seri
+    boxes = [tuple(int(value) for value in row) for row in
+             np.column_stack([rng.integers(0, 60, (count, 2)), rng.integers(0, 40, (count, 2))])]
+    scores = [round(float(score), 2) for score in rng.random(count)]
+    return boxes, scores
+
+
+def test_iou_matrix_matches_pairwise_loop():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        boxes, _ = random_boxes(rng, int(rng.integers(1, 25)))
+        matrix = iou_matrix(boxes)
+        expected = [[naive_iou(a, b) for b in boxes] for a in boxes]
+        np.testing.assert_allclose(matrix, expected, rtol=0, atol=1e-12)
+
+
+def test_iou_matrix_rectangular():
+    matrix = iou_matrix([(0, 0, 10, 10)], [(5, 0, 10, 10), (20, 20, 5, 5)])
+    assert matrix.shape == (1, 2)
+    assert matrix[0, 0] == pytest.approx(50 / 150)
+    assert matrix[0, 1] == 0.0
+
+
+def test_non_max_suppression_matches_greedy_loop():
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        boxes, scores = random_boxes(rng, int(rng.integers(0, 40)))
+        assert list(non_max_suppression(boxes, scores)) == naive_nms(boxes, scores)
+        assert list(non_max_suppression(boxes, scores, max_output=3)) == naive_nms(boxes, scores)[:3]
+
+
+def test_soft_nms_gaussian_decays_overlapping_scores():
+    boxes = [(0, 0, 10, 10), (0, 0, 10, 10), (50, 50, 10, 10)]
+    keep, scores = soft_non_max_suppression(boxes, [0.9, 0.8, 0.7], sigma=0.5, score_threshold=0.0)
+    assert list(keep) == [0, 2, 1]
+    np.testing.assert_allclose(scores, [0.9, 0.7, 0.8 * np.exp(-1 / 0.5)])
+
+
+def test_soft_nms_linear_only_decays_above_threshold():
+    boxes = [(0, 0, 10, 10), (5, 0, 10, 10), (1, 0, 10, 10)]
+    keep, scores = soft_non_max_suppression(boxes, [0.9, 0.8, 0.7], method='linear', score_threshold=0.0)
+    overlap = naive_iou(boxes[0], boxes[2])
+    assert list(keep) == [0, 1, 2]
+    np.testing.assert_allclose(scores, [0.9, 0.8, 0.7 * (1 - overlap)])
+
+
+def test_soft_nms_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        soft_non_max_suppression([(0, 0, 1, 1)], [1.0], method='box')
+
+
+def test_suppress_detections_soft_keeps_confidence():
+    detections = [{'bbox': (0, 0, 10, 10), 'confidence': 0.9},
+                  {'bbox': (1, 1, 10, 10), 'confidence': 0.8}]
+    result = suppress_detections(detections, soft='gaussian')
+    assert [detection['confidence'] for detection in result] == [0.9, 0.8]
+    assert result[1]['nms_score'] < 0.8
+    assert 'nms_score' not in detections[1]
@@ -0,0 +1,87 @@
+"""find_response_peaks vs cv2.minMaxLoc dan non-max suppression exact (cv2.dilate resolusi penuh)"""
+import cv2
+import numpy as np
+from detection.response_peaks import find_response_peaks, peak_window
+
+
+def exact_peaks(response, top_k, radius, minimize=False):
+    """Referensi: dilate/erode dengan kernel (2r+1) penuh lalu greedy per titik"""
+    radius_x, radius_y = radius
+    kernel = np.ones((2 * radius_y + 1, 2 * radius_x + 1), np.uint8)
+    extreme = cv2.erode(response, kernel) if minimize else cv2.dilate(response, kernel)
+    ys, xs = np.nonzero(response == extreme)
+    values = response[ys, xs]
+    peaks = []
+    for index in np.argsort(values if minimize else -values, kind='stable'):
+        x, y = int(xs[index]), int(ys[index])
+        if any(abs(x - kept_x) <= radius_x and abs(y - kept_y) <= radius_y for kept_x, kept_y, _ in peaks):
+            continue
+        peaks.append((x, y, float(values[index])))
+        if len(peaks) >= top_k:
+            break
+    return peaks
+
+
+def smooth_map(rng, height, width, sigma):
+    return cv2.GaussianBlur(rng.random((height, width)).astype(np.float32), (0, 0), sigma)
+
+
+def blob_map(centers, height, width, sigma=4.0):
+    ys, xs = np.mgrid[0:height, 0:width]
+    response = np.zeros((height, width), np.float32)
+    for (x, y), amplitude in centers:
+        response += amplitude * np.exp(-((xs - x) ** 2 + (ys - y) ** 2) / (2 * sigma ** 2)).astype(np.float32)
+    return response
+
+
+def test_top1_equals_min_max_loc():
+    rng = np.random.default_rng(0)
+    for trial in range(40):
+        response = smooth_map(rng, int(rng.integers(20, 300)), int(rng.integers(20, 300)), 3.0)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(response)
+        assert find_response_peaks(response, 1, (5, 5)) == [(max_loc[0], max_loc[1], max_val)]
+        assert find_response_peaks(response, 1, (5, 5), minimize=True) == [(min_loc[0], min_loc[1], min_val)]
+
+
+def test_threshold_filters_peaks():
+    response = blob_map([((20, 20), 0.9), ((80, 20), 0.5)], 50, 120)
+    assert [peak[:2] for peak in find_response_peaks(response, 3, (10, 10), threshold=0.6)] == [(20, 20)]
+    assert find_response_peaks(response, 1, (10, 10), threshold=0.95) == []
+
+
+def test_separated_blobs_match_exact_dilation():
+    centers = [((30, 25), 0.9), ((120, 30), 0.8), ((60, 110), 0.7), ((150, 120), 0.6)]
+    response = blob_map(centers, 160, 200)
+    radius = (20, 20)
+    peaks = find_response_peaks(response, 4, radius)
+    assert peaks == exact_peaks(response, 4, radius)
+    assert [peak[:2] for peak in peaks] == [center for center, _ in centers]
+
+    inverted = 1 - response
+    assert find_response_peaks(inverted, 4, radius, minimize=True) == exact_peaks(inverted, 4, radius, minimize=True)
+
+
+def test_peaks_are_separated_and_read_from_response():
+    rng = np.random.default_rng(1)
+    for trial in range(60):
+        response = smooth_map(rng, int(rng.integers(40, 400)), int(rng.integers(40, 500)), float(rng.uniform(1, 10)))
+        radius = (int(rng.integers(1, 50)), int(rng.integers(1, 40)))
+        minimize = bool(trial % 2)
+        peaks = find_response_peaks(response, 5, radius, minimize=minimize)
+        extreme = response.min() if minimize else response.max()
+        assert peaks[0][2] == extreme
+        for index, (x, y, value) in enumerate(peaks):
+            assert response[y, x] == value
+            for other_x, other_y, _ in peaks[index + 1:]:
+                assert abs(x - other_x) > radius[0] or abs(y - other_y) > radius[1]
+
+
+def test_pooled_grid_matches_exact_dilation_on_seeded_maps():
+    rng = np.random.default_rng(2)
+    for trial in range(100):
+        response = smooth_map(rng, int(rng.integers(50, 400)), int(rng.integers(50, 500)), float(rng.uniform(2, 12)))
+        radius = peak_window((int(rng.integers(20, 200)), int(rng.integers(12, 120))))
+        minimize = bool(trial % 2)
+        top_k = int(rng.integers(2, 6))
+        assert find_response_peaks(response, top_k, radius, minimize=minimize) == \
+            exact_peaks(response, top_k, radius, minimize=minimize)
@@ -0,0 +1,115 @@
+"""RetentionSweeper: penghapusan capture kedaluwarsa, callback katalog dan metric indeks"""
+import os
+import random
+import time
+from core.retention import RetentionRoot, RetentionSweeper
+
+MAX_AGE = 100
+
+
+def write_file(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as handle:
+        handle.write(b'x' * size)
+    return str(path)
+
+
+def make_sweeper(root, **kwargs):
+    return RetentionSweeper([root], batch_pause=0, **kwargs)
+
+
+def test_sweep_deletes_only_expired_files(tmp_path):
+    deleted_batches = []
+    root = RetentionRoot('captures', str(tmp_path), MAX_AGE, extensions=('.jpg',), on_delete=deleted_batches.append)
+    sweeper = make_sweeper(root, batch_size=2)
+
+    now = time.time()
+    old = [write_file(tmp_path / '2024' / '01' / f'{index}' / 'old.jpg', 10 + index) for index in range(5)]
+    fresh = write_file(tmp_path / 'fresh' / 'new.jpg', 7)
+    for path in old:
+        sweeper.track('captures', path, created_at=now - MAX_AGE - 1)
+    sweeper.track('captures', fresh, created_at=now)
+    sweeper.track('captures', write_file(tmp_path / 'notes.txt', 3))     # Ekstensi lain diabaikan
+
+    sweeper._sweep(root)
+
+    assert all(not os.path.exists(path) for path in old)
+    assert os.path.exists(fresh)
+    assert not os.path.exists(tmp_path / '2024')                          # Parent kosong ikut dihapus
+    assert sorted(path for batch in deleted_batches for path in batch) == sorted(old)
+    assert max(len(batch) for batch in deleted_batches) == 2
+
+    stats = sweeper.get_stats()['captures']
+    assert stats['deleted'] == 5
+    assert stats['bytes_reclaimed'] == sum(10 + index for index in range(5))
+    assert stats['indexed'] == 1
+    assert stats['indexed_bytes'] == 7
+    assert stats['backlog'] == 0
+
+
+def test_directory_unit_scans_capture_folders_at_any_depth(tmp_path):
+    root = RetentionRoot('sessions', str(tmp_path), MAX_AGE, unit='directory')
+    sweeper = make_sweeper(root)
+
+    old_flat = tmp_path / 'CS_old'
+    old_layout = tmp_path / '2024' / '01' / '02' / 'ab' / 'CS_layout'
+    fresh = tmp_path / 'CS_fresh'
+    write_file(old_flat / 'face.jpg', 5)
+    write_file(old_layout / 'ktp.jpg', 6)
+    write_file(fresh / 'face.jpg', 4)
+    expired_at = time.time() - MAX_AGE - 10
+    for directory in (old_flat, old_layout):
+        os.utime(directory, (expired_at, expired_at))
+
+    sweeper._scan(root)
+    stats = sweeper.get_stats()['sessions']
+    assert stats['indexed'] == 3
+    assert stats['indexed_bytes'] == 15
+    assert stats['backlog'] == 2
+
+    sweeper._sweep(root)
+    assert not old_flat.exists() and not (tmp_path / '2024').exists()
+    assert fresh.exists()
+    stats = sweeper.get_stats()['sessions']
+    assert (stats['deleted'], stats['bytes_reclaimed'], stats['backlog']) == (2, 11, 0)
+
+
+def test_background_thread_sweeps_and_runs_tasks(tmp_path):
+    ran = []
+    root = RetentionRoot('captures', str(tmp_path), MAX_AGE)
+    path = write_file(tmp_path / 'old.jpg', 1)
+    expired_at = time.time() - MAX_AGE - 1
+    os.utime(path, (expired_at, expired_at))
+
+    sweeper = make_sweeper(root, tasks=[lambda: ran.append(True)])
+    sweeper.start()
+    try:
+        deadline = time.time() + 5
+        while not ran and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        sweeper.stop()
+
+    assert ran
+    assert not os.path.exists(path)
+
+
+def test_index_counters_match_heap_contents(tmp_path):
+    root = RetentionRoot('captures', str(tmp_path), MAX_AGE)
+    sweeper = make_sweeper(root)
+    rng = random.Random(3)
+    now = time.time()
+    for index in range(500):
+        # Tidak ada item dalam 1 detik dari cutoff sehingga backlog bisa dibandingkan exact
+        offset = rng.uniform(1, MAX_AGE) * rng.choice((-1, 1))
+        sweeper.track('captures', str(tmp_path / f'{index}.jpg'), created_at=now - MAX_AGE + offset,
+                      size=rng.randint(1, 1000))
+
+    for _ in range(3):
+        stats = sweeper.get_stats()['captures']
+        assert stats['indexed'] == len(root.heap)
+        assert stats['indexed_bytes'] == sum(size for _, _, size in root.heap)
+        assert stats['backlog'] == sum(1 for created_at, _, _ in root.heap if created_at < now - MAX_AGE)
+        sweeper._sweep(root)     # File tidak ada di disk: dianggap sudah terhapus
+
+    assert sweeper.get_stats()['captures']['backlog'] == 0
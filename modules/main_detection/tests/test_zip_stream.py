@@ -0,0 +1,38 @@
+"""stream_zip: arsip hasil streaming identik isinya dengan file sumber, memori per chunk terbatas"""
+import io
+import os
+import zipfile
+from core.zip_stream import stream_zip
+
+CHUNK = 4096
+
+
+def test_streamed_archive_round_trips(tmp_path):
+    contents = {
+        'face.jpg': os.urandom(3 * CHUNK + 17),
+        'ktp.JPG': os.urandom(10),
+        'metadata.json': b'{"session": "CS_1"}' * 500,
+        'empty.jpg': b''
+    }
+    for name, data in contents.items():
+        (tmp_path / name).write_bytes(data)
+    entries = [(str(tmp_path / name), name) for name in contents] + [(str(tmp_path / 'missing.jpg'), 'missing.jpg')]
+
+    chunks = list(stream_zip(entries, chunk_size=CHUNK))
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+
+    assert archive.testzip() is None
+    assert sorted(archive.namelist()) == sorted(contents)
+    for name, data in contents.items():
+        assert archive.read(name) == data
+    compress = {info.filename: info.compress_type for info in archive.infolist()}
+    assert compress['face.jpg'] == compress['ktp.JPG'] == zipfile.ZIP_STORED
+    assert compress['metadata.json'] == zipfile.ZIP_DEFLATED
+
+    # Tidak ada chunk yang memuat seluruh file besar sekaligus
+    assert max(len(chunk) for chunk in chunks) < len(contents['face.jpg'])
+
+
+def test_empty_session_is_valid_archive():
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_zip([]))))
+    assert archive.namelist() == []
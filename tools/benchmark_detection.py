@@ -0,0 +1,386 @@
+"""
+Detection Benchmark Suite
+Replay corpus frame (folder gambar atau file video) ke setiap detector dan
+simpan hasilnya sebagai artifact JSON yang bisa dibandingkan antar commit.
+
+Per detector dilaporkan:
+- latency per frame dan per stage (p50/p95/p99, dari core.tracing)
+- throughput (frame/detik)
+- peak RSS dan kenaikan RSS selama detector berjalan; setiap detector dijalankan
+  di subprocess sendiri (kecuali --no-isolate) karena ru_maxrss adalah high-water
+  mark seumur proses dan akan menutupi regresi memori detector berikutnya
+- precision/recall terhadap labels file (IoU >= 0.5 dengan bbox berlabel)
+
+Labels file (JSON), key = nama file (corpus folder) atau index frame 6 digit (video):
+    {"frames": {"scene_0001.jpg": {"ktp": [x, y, w, h], "face": [x, y, w, h]},
+                "scene_0002.jpg": {"ktp": null, "face": null}}}
+
+Usage:
+    python tools/benchmark_detection.py <corpus> [--labels labels.json] [--output result.json]
+        [--detectors ktp_detector,template_based:fast,...] [--max-frames N] [--warmup N]
+        [--compare baseline.json] [--tolerance 0.10] [--no-isolate]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPT_PATH = os.path.abspath(__file__)
+REPO_DIR = os.path.dirname(os.path.dirname(SCRIPT_PATH))
+MAIN_DETECTION_DIR = os.path.join(REPO_DIR, 'modules', 'main_detection')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+IOU_THRESHOLD = 0.5
+DEFAULT_WARMUP = 3
+DEFAULT_TOLERANCE = 0.10    # Regresi jika p95/throughput memburuk > 10% atau precision/recall turun > 0.02
+ACCURACY_TOLERANCE = 0.02
+
+DETECTOR_NAMES = (
+    'ktp_detector',
+    'ktp_detector_fast',
+    'ktp_detector_advanced',
+    'template_based:fast',
+    'template_based:thorough',
+    'template_based:adaptive',
+    'face'
+)
+
+
+# === Corpus ===
+
+def load_corpus(path, max_frames=None):
+    """Returns: list (key, frame) dalam urutan replay"""
+    import cv2
+
+    frames = []
+    if os.path.isdir(path):
+        names = sorted(name for name in os.listdir(path) if name.lower().endswith(IMAGE_EXTENSIONS))
+        for name in names[:max_frames]:
+            frame = cv2.imread(os.path.join(path, name))
+            if frame is not None:
+                frames.append((name, frame))
+    else:
+        capture = cv2.VideoCapture(path)
+        index = 0
+        while max_frames is None or index < max_frames:
+            success, frame = capture.read()
+            if not success:
+                break
+            frames.append((f"{index:06d}", frame))
+            index += 1
+        capture.release()
+    return frames
+
+
+def load_labels(path):
+    if not path:
+        return None
+    with open(path) as handle:
+        data = json.load(handle)
+    return data.get('frames', data)
+
+
+# === Detector adapters: frame -> (ktp bbox | None, face bbox | None) ===
+
+def build_detectors(names):
+    detectors = {}
+    for name in names:
+        if name == 'ktp_detector':
+            from detection.main_detector import select_ktp_candidate
+
+            def run(frame):
+                candidate, _ = select_ktp_candidate(frame)
+                return (tuple(candidate[:4]) if candidate else None), None
+        elif name == 'ktp_detector_fast':
+            from detection.ktp_detector_fast import detect_ktp_in_frame
+
+            def run(frame):
+                detected, _, result = detect_ktp_in_frame(frame)
+                return (tuple(result['region'][:4]) if detected and result else None), None
+        elif name == 'ktp_detector_advanced':
+            from detection.ktp_detector_advanced import (detect_ktp_candidates_by_color_and_shape,
+                                                         verify_ktp_candidate_by_advanced_matching)
+
+            def run(frame):
+                best, best_score = None, 0.0
+                for candidate in detect_ktp_candidates_by_color_and_shape(frame):
+                    score, _ = verify_ktp_candidate_by_advanced_matching(frame, candidate)
+                    if score > best_score:
+                        best, best_score = candidate, score
+                return (tuple(best[:4]) if best else None), None
+        elif name.startswith('template_based:'):
+            from detection.ktp_detector_template_based import detect_ktp_template_based
+            mode = name.split(':', 1)[1]
+
+            def run(frame, mode=mode):
+                detections = detect_ktp_template_based(frame, performance_mode=mode)
+                return (tuple(detections[0]['bbox']) if detections else None), None
+        elif name == 'face':
+            from detection.face_detector import locate_face
+
+            def run(frame):
+                located = locate_face(frame)
+                return None, (located[0] if located else None)
+        else:
+            raise ValueError(f"Unknown detector: {name}")
+        detectors[name] = run
+    return detectors
+
+
+# === Metrics ===
+
+def iou(box_a, box_b):
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = inter_w * inter_h
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def accuracy_metrics(predictions, labels, target):
+    """predictions: {key: bbox|None}; target: 'ktp' atau 'face'"""
+    tp = fp = fn = 0
+    ious = []
+    for key, predicted in predictions.items():
+        label = labels.get(key)
+        if label is None or target not in label:
+            # Frame tanpa label untuk target ini (misalnya scene sintetis tanpa wajah)
+            continue
+        truth = label.get(target)
+        if predicted is not None and truth is not None:
+            overlap = iou(predicted, truth)
+            if overlap >= IOU_THRESHOLD:
+                tp += 1
+                ious.append(overlap)
+            else:
+                fp += 1
+                fn += 1
+        elif predicted is not None:
+            fp += 1
+        elif truth is not None:
+            fn += 1
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        'target': target,
+        'tp': tp,
+        'fp': fp,
+        'fn': fn,
+        'precision': round(precision, 4),
+        'recall': round(recall, 4),
+        'f1': round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        'mean_iou': round(sum(ious) / len(ious), 4) if ious else 0.0
+    }
+
+
+def peak_rss_mb():
+    """Peak RSS proses (MB); None jika modul resource tidak tersedia (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def run_detector(name, run, frames, labels, warmup, tracer):
+    rss_before = peak_rss_mb()
+    for _, frame in frames[:warmup]:
+        run(frame)
+    tracer.reset()
+
+    latencies = []
+    predictions = {}
+    started = time.perf_counter()
+    for key, frame in frames:
+        frame_start = time.perf_counter()
+        ktp_box, face_box = run(frame)
+        latencies.append((time.perf_counter() - frame_start) * 1000)
+        predictions[key] = face_box if name == 'face' else ktp_box
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    peak_rss = peak_rss_mb()
+    result = {
+        'frames': len(frames),
+        'throughput_fps': round(len(frames) / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            'p50': round(percentile(latencies, 0.5), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(latencies[-1], 3) if latencies else 0.0
+        },
+        'stages': tracer.get_stats(),
+        'rss_before_mb': rss_before,
+        'peak_rss_mb': peak_rss,
+        'rss_delta_mb': round(peak_rss - rss_before, 1) if peak_rss is not None else None,
+        'detections': sum(1 for box in predictions.values() if box is not None)
+    }
+    if labels is not None:
+        result['accuracy'] = accuracy_metrics(predictions, labels, 'face' if name == 'face' else 'ktp')
+    return result
+
+
+def run_isolated(name, corpus, labels_path, max_frames, warmup):
+    """Jalankan satu detector di subprocess agar peak RSS hanya milik detector itu"""
+    fd, output = tempfile.mkstemp(prefix=f'benchmark_{name.replace(":", "_")}_', suffix='.json')
+    os.close(fd)
+    command = [sys.executable, SCRIPT_PATH, corpus, '--detectors', name, '--output', output,
+               '--warmup', str(warmup), '--no-isolate']
+    if labels_path:
+        command += ['--labels', labels_path]
+    if max_frames:
+        command += ['--max-frames', str(max_frames)]
+
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{name} benchmark failed:\n{completed.stdout}{completed.stderr}")
+        with open(output) as handle:
+            return json.load(handle)['detectors'][name]
+    finally:
+        os.remove(output)
+
+
+# === Comparison ===
+
+def compare_results(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """Returns: list pesan regresi (kosong jika tidak ada)"""
+    regressions = []
+    for name, result in current['detectors'].items():
+        base = baseline.get('detectors', {}).get(name)
+        if base is None:
+            continue
+        base_p95 = base['latency_ms']['p95']
+        if base_p95 > 0 and result['latency_ms']['p95'] > base_p95 * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base_p95:.1f}ms -> {result['latency_ms']['p95']:.1f}ms")
+        base_fps = base['throughput_fps']
+        if base_fps > 0 and result['throughput_fps'] < base_fps * (1 - tolerance):
+            regressions.append(f"{name}: throughput {base_fps:.1f} -> {result['throughput_fps']:.1f} fps")
+        if 'accuracy' in base and 'accuracy' in result:
+            for metric in ('precision', 'recall'):
+                if result['accuracy'][metric] < base['accuracy'][metric] - ACCURACY_TOLERANCE:
+                    regressions.append(f"{name}: {metric} {base['accuracy'][metric]:.3f} -> "
+                                       f"{result['accuracy'][metric]:.3f}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark detector KTP/wajah pada corpus frame')
+    parser.add_argument('corpus', help='Folder gambar atau file video')
+    parser.add_argument('--labels', help='Labels JSON untuk precision/recall')
+    parser.add_argument('--output', help='Path artifact JSON (default: benchmark_<timestamp>.json)')
+    parser.add_argument('--detectors', default=','.join(DETECTOR_NAMES))
+    parser.add_argument('--max-frames', type=int)
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP)
+    parser.add_argument('--compare', help='Artifact baseline untuk deteksi regresi')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--no-isolate', dest='isolate', action='store_false',
+                        help='Jalankan semua detector di satu proses (peak RSS tidak per detector)')
+    args = parser.parse_args()
+
+    corpus = os.path.abspath(args.corpus)
+    labels_path = os.path.abspath(args.labels) if args.labels else None
+    output = os.path.abspath(args.output or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    compare = os.path.abspath(args.compare) if args.compare else None
+
+    # Modul deteksi memakai path relatif terhadap modules/main_detection
+    sys.path.insert(0, MAIN_DETECTION_DIR)
+    os.chdir(MAIN_DETECTION_DIR)
+
+    import cv2
+    from core.config import load_ktp_template
+    from core.governor import get_governor
+    from core.tracing import get_tracer
+
+    load_ktp_template()
+    # Profil governor dikunci agar hasil tidak bergantung pada beban mesin saat benchmark
+    get_governor().pin(0)
+
+    frames = load_corpus(corpus, args.max_frames)
+    if not frames:
+        print(f"❌ No frames found in {corpus}")
+        sys.exit(1)
+    labels = load_labels(labels_path)
+
+    names = [name.strip() for name in args.detectors.split(',') if name.strip()]
+    isolate = args.isolate and len(names) > 1
+    detectors = None if isolate else build_detectors(names)
+    tracer = get_tracer()
+
+    print(f"🏁 Benchmarking {len(names)} detector(s) on {len(frames)} frames from {corpus}")
+    results = {}
+    for name in names:
+        if isolate:
+            results[name] = run_isolated(name, corpus, labels_path, args.max_frames, args.warmup)
+        else:
+            results[name] = run_detector(name, detectors[name], frames, labels, args.warmup, tracer)
+        summary = results[name]
+        line = (f"   {name:<26} p50 {summary['latency_ms']['p50']:8.2f}ms  "
+                f"p95 {summary['latency_ms']['p95']:8.2f}ms  {summary['throughput_fps']:7.2f} fps")
+        if 'accuracy' in summary:
+            line += f"  P {summary['accuracy']['precision']:.3f}  R {summary['accuracy']['recall']:.3f}"
+        print(line)
+
+    height, width = frames[0][1].shape[:2]
+    artifact = {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'corpus': corpus,
+            'labels': labels_path,
+            'frames': len(frames),
+            'frame_size': [width, height],
+            'warmup': args.warmup,
+            'isolated': isolate
+        },
+        'detectors': results
+    }
+
+    with open(output, 'w') as handle:
+        json.dump(artifact, handle, indent=2)
+    print(f"💾 Results saved to {output}")
+
+    if compare:
+        with open(compare) as handle:
+            baseline = json.load(handle)
+        regressions = compare_results(baseline, artifact, args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) vs {compare}:")
+            for message in regressions:
+                print(f"   {message}")
+            sys.exit(1)
+        print(f"✅ No regressions vs {compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+Synthetic KTP Scene Generator
+Komposit template KTP (template_ktp.png dan varian brightness) ke background
+acak dengan perspective, scale, rotasi, blur, lighting, noise dan artefak JPEG,
+plus kartu biru pengecoh. Setiap frame punya ground-truth bbox sehingga bisa
+dipakai benchmark_detection.py (precision/recall) dan load test tanpa kamera.
+
+Frame ke-i hanya bergantung pada (seed, i): hasil bisa direproduksi dan
+di-generate secara streaming tanpa menyimpan ke disk.
+
+    from generate_ktp_scenes import SceneGenerator
+    generator = SceneGenerator(seed=42)
+    for key, frame, label in generator.stream(count=100):
+        ...
+
+Usage:
+    python tools/generate_ktp_scenes.py <output_dir> [--count 200] [--seed 42]
+        [--width 640] [--height 480] [--backgrounds <folder>] [--video scenes.mp4]
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+import cv2
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS_DIR = os.path.join(REPO_DIR, 'assets')
+
+TEMPLATE_FILES = (
+    'template_ktp.png',
+    'template_brightness_+30.png',
+    'template_brightness_+15.png',
+    'template_brightness_+0.png',
+    'template_brightness_-15.png',
+    'template_brightness_-30.png'
+)
+
+# Scene settings
+KTP_PROBABILITY = 0.8           # Frame tanpa KTP menguji false positive
+CARD_WIDTH_RANGE = (0.25, 0.7)  # Lebar kartu relatif terhadap lebar frame
+MAX_ROTATION = 15               # Derajat
+MAX_PERSPECTIVE = 0.08          # Geser sudut maksimal relatif terhadap ukuran kartu
+MAX_DISTRACTORS = 2
+JPEG_QUALITY_RANGE = (35, 95)
+KTP_ASPECT = 85.6 / 53.98
+
+
+class SceneGenerator:
+    """Generator frame sintetis dengan label {'ktp': bbox|None, 'distractors': [bbox, ...]}"""
+
+    def __init__(self, assets_dir=ASSETS_DIR, width=640, height=480, seed=0,
+                 backgrounds_dir=None, ktp_probability=KTP_PROBABILITY, max_distractors=MAX_DISTRACTORS):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.ktp_probability = ktp_probability
+        self.max_distractors = max_distractors
+
+        self.templates = []
+        for filename in TEMPLATE_FILES:
+            template = cv2.imread(os.path.join(assets_dir, filename))
+            if template is not None:
+                self.templates.append((filename, template))
+        if not self.templates:
+            raise FileNotFoundError(f"No KTP templates found in {assets_dir}")
+
+        self.backgrounds = []
+        if backgrounds_dir:
+            for name in sorted(os.listdir(backgrounds_dir)):
+                image = cv2.imread(os.path.join(backgrounds_dir, name))
+                if image is not None:
+                    self.backgrounds.append(cv2.resize(image, (width, height)))
+
+    # === Public API ===
+
+    def scene(self, index):
+        """Generate frame ke-index. Returns: (frame BGR, label dict)"""
+        rng = np.random.default_rng([self.seed, index])
+        frame = self._background(rng)
+        occupied = []
+        label = {'ktp': None, 'template': None, 'distractors': []}
+
+        if rng.random() < self.ktp_probability:
+            filename, template = self.templates[rng.integers(len(self.templates))]
+            bbox = self._place_card(frame, template, rng, occupied)
+            if bbox is not None:
+                label['ktp'] = bbox
+                label['template'] = filename
+                occupied.append(bbox)
+
+        for _ in range(rng.integers(0, self.max_distractors + 1)):
+            card = self._distractor_card(rng)
+            bbox = self._place_card(frame, card, rng, occupied)
+            if bbox is not None:
+                label['distractors'].append(bbox)
+                occupied.append(bbox)
+
+        frame = self._apply_lighting(frame, rng)
+        frame = self._apply_blur(frame, rng)
+        frame = self._apply_noise(frame, rng)
+        frame = self._apply_jpeg(frame, rng)
+        return frame, label
+
+    def stream(self, count=None, start=0):
+        """Yield (key, frame, label) tanpa batas (count=None) atau sebanyak count frame"""
+        index = start
+        while count is None or index < start + count:
+            frame, label = self.scene(index)
+            yield f"scene_{index:06d}.jpg", frame, label
+            index += 1
+
+    def stream_jpeg(self, count=None, start=0, quality=90):
+        """Seperti stream() tetapi frame sudah di-encode JPEG (untuk client load test)"""
+        for key, frame, label in self.stream(count, start):
+            success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if success:
+                yield key, buffer.tobytes(), label
+
+    # === Scene building ===
+
+    def _background(self, rng):
+        if self.backgrounds and rng.random() < 0.7:
+            background = self.backgrounds[rng.integers(len(self.backgrounds))].copy()
+            if rng.random() < 0.5:
+                background = cv2.flip(background, 1)
+            return background
+
+        # Background prosedural: gradien warna + tekstur meja + bentuk acak
+        top = rng.integers(30, 220, 3)
+        bottom = rng.integers(30, 220, 3)
+        ramp = np.linspace(0.0, 1.0, self.height)[:, None, None]
+        frame = (top * (1 - ramp) + bottom * ramp).repeat(self.width, axis=1)
+
+        grain = cv2.resize(rng.normal(0, 12, (self.height // 8, self.width // 8)).astype(np.float32),
+                           (self.width, self.height), interpolation=cv2.INTER_CUBIC)
+        frame = np.clip(frame + grain[:, :, None], 0, 255).astype(np.uint8)
+
+        for _ in range(rng.integers(2, 8)):
+            color = tuple(int(value) for value in rng.integers(0, 256, 3))
+            x1, y1 = int(rng.integers(0, self.width)), int(rng.integers(0, self.height))
+            x2, y2 = int(rng.integers(0, self.width)), int(rng.integers(0, self.height))
+            if rng.random() < 0.5:
+                cv2.rectangle(frame, (x1, y1), (x2, y2), color, -1 if rng.random() < 0.5 else 3)
+            else:
+                cv2.line(frame, (x1, y1), (x2, y2), color, int(rng.integers(1, 6)))
+        return frame
+
+    def _distractor_card(self, rng):
+        """Kartu biru bukan KTP (kartu ATM/member): biru solid, strip, teks palsu"""
+        width = 320
+        aspect = rng.uniform(1.2, 2.2) if rng.random() < 0.5 else KTP_ASPECT
+        height = int(width / aspect)
+        hue = int(rng.integers(95, 130))
+        hsv = np.zeros((height, width, 3), dtype=np.uint8)
+        hsv[:, :] = (hue, int(rng.integers(120, 255)), int(rng.integers(120, 240)))
+        card = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+
+        stripe_y = int(height * rng.uniform(0.15, 0.6))
+        cv2.rectangle(card, (0, stripe_y), (width, stripe_y + height // 8),
+                      tuple(int(value) for value in rng.integers(0, 256, 3)), -1)
+        for line in range(int(rng.integers(1, 4))):
+            y = int(height * (0.7 + line * 0.1))
+            cv2.rectangle(card, (int(width * 0.08), y),
+                          (int(width * rng.uniform(0.3, 0.8)), y + 4), (255, 255, 255), -1)
+        return card
+
+    def _place_card(self, frame, card, rng, occupied):
+        """
+        Warp kartu ke frame dengan scale, rotasi dan perspective acak.
+        Returns: bbox (x, y, w, h) area kartu di frame, atau None jika tidak muat
+        """
+        card_h, card_w = card.shape[:2]
+        for _ in range(10):
+            target_w = self.width * rng.uniform(*CARD_WIDTH_RANGE)
+            target_h = target_w * card_h / card_w
+            center = np.array([rng.uniform(target_w / 2, self.width - target_w / 2),
+                               rng.uniform(target_h / 2, self.height - target_h / 2)])
+
+            half = np.array([[-target_w, -target_h], [target_w, -target_h],
+                             [target_w, target_h], [-target_w, target_h]]) / 2
+            angle = np.deg2rad(rng.uniform(-MAX_ROTATION, MAX_ROTATION))
+            rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+            jitter = rng.uniform(-MAX_PERSPECTIVE, MAX_PERSPECTIVE, (4, 2)) * [target_w, target_h]
+            corners = half @ rotation.T + jitter + center
+
+            x1, y1 = np.floor(corners.min(axis=0)).astype(int)
+            x2, y2 = np.ceil(corners.max(axis=0)).astype(int)
+            if x1 < 0 or y1 < 0 or x2 > self.width or y2 > self.height:
+                continue
+            bbox = (int(x1), int(y1), int(x2 - x1), int(y2 - y1))
+            if any(_overlap_ratio(bbox, other) > 0.2 for other in occupied):
+                continue
+
+            source = np.float32([[0, 0], [card_w, 0], [card_w, card_h], [0, card_h]])
+            matrix = cv2.getPerspectiveTransform(source, np.float32(corners))
+            warped = cv2.warpPerspective(card, matrix, (self.width, self.height))
+            mask = cv2.warpPerspective(np.full((card_h, card_w), 255, np.uint8), matrix,
+                                       (self.width, self.height))
+            frame[mask > 127] = warped[mask > 127]
+            return bbox
+        return None
+
+    # === Degradations ===
+
+    def _apply_lighting(self, frame, rng):
+        gain = rng.uniform(0.6, 1.35)
+        bias = rng.uniform(-30, 30)
+        # Iluminasi tidak merata (sumber cahaya dari satu sisi)
+        xs = np.linspace(-1, 1, self.width)[None, :]
+        ys = np.linspace(-1, 1, self.height)[:, None]
+        direction = rng.uniform(-1, 1, 2)
+        falloff = 1 + rng.uniform(0, 0.35) * (xs * direction[0] + ys * direction[1]) / 2
+        lit = frame.astype(np.float32) * gain * falloff[:, :, None] + bias
+        return np.clip(lit, 0, 255).astype(np.uint8)
+
+    def _apply_blur(self, frame, rng):
+        choice = rng.random()
+        if choice < 0.3:
+            size = int(rng.choice([3, 5, 7]))
+            return cv2.GaussianBlur(frame, (size, size), 0)
+        if choice < 0.5:
+            # Motion blur horizontal/vertikal
+            size = int(rng.integers(3, 12))
+            kernel = np.zeros((size, size), np.float32)
+            if rng.random() < 0.5:
+                kernel[size // 2, :] = 1.0 / size
+            else:
+                kernel[:, size // 2] = 1.0 / size
+            return cv2.filter2D(frame, -1, kernel)
+        return frame
+
+    def _apply_noise(self, frame, rng):
+        sigma = rng.uniform(0, 10)
+        if sigma < 1:
+            return frame
+        noise = rng.normal(0, sigma, frame.shape)
+        return np.clip(frame.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+
+    def _apply_jpeg(self, frame, rng):
+        quality = int(rng.integers(*JPEG_QUALITY_RANGE))
+        success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return cv2.imdecode(buffer, cv2.IMREAD_COLOR) if success else frame
+
+
+def _overlap_ratio(box_a, box_b):
+    """Intersection dibagi luas box terkecil"""
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    smaller = min(aw * ah, bw * bh)
+    return inter_w * inter_h / smaller if smaller > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate scene KTP sintetis dengan ground-truth bbox')
+    parser.add_argument('output_dir')
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--backgrounds', help='Folder foto background (opsional)')
+    parser.add_argument('--video', help='Tulis juga sebagai file video (mp4) untuk replay')
+    parser.add_argument('--fps', type=float, default=15)
+    args = parser.parse_args()
+
+    generator = SceneGenerator(width=args.width, height=args.height, seed=args.seed,
+                               backgrounds_dir=args.backgrounds)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    writer = None
+    if args.video:
+        writer = cv2.VideoWriter(args.video, cv2.VideoWriter_fourcc(*'mp4v'), args.fps,
+                                 (args.width, args.height))
+
+    frames = {}
+    video_frames = {}
+    for index, (key, frame, label) in enumerate(generator.stream(args.count)):
+        cv2.imwrite(os.path.join(args.output_dir, key), frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        frames[key] = label
+        if writer is not None:
+            writer.write(frame)
+            video_frames[f"{index:06d}"] = label
+        if (index + 1) % 50 == 0:
+            print(f"   {index + 1}/{args.count} scenes")
+
+    meta = {
+        'generator': 'generate_ktp_scenes',
+        'created_at': datetime.now().isoformat(),
+        'seed': args.seed,
+        'count': args.count,
+        'frame_size': [args.width, args.height]
+    }
+    labels_path = os.path.join(args.output_dir, 'labels.json')
+    with open(labels_path, 'w') as handle:
+        json.dump({'meta': meta, 'frames': frames}, handle, indent=1)
+
+    if writer is not None:
+        writer.release()
+        # Key video = index frame 6 digit (format yang dibaca benchmark_detection.py)
+        with open(os.path.splitext(args.video)[0] + '_labels.json', 'w') as handle:
+            json.dump({'meta': meta, 'frames': video_frames}, handle, indent=1)
+
+    with_ktp = sum(1 for label in frames.values() if label['ktp'])
+    print(f"✅ {args.count} scenes ({with_ktp} with KTP) written to {args.output_dir}")
+    print(f"   Labels: {labels_path}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
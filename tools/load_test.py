@@ -0,0 +1,708 @@
+"""
+Load Test Kiosk & Jitsi
+Simulasikan N kiosk dan M participant Jitsi remote secara bersamaan terhadap
+app lokal dan jitsi bridge, lalu laporkan latency (p50/p95/p99), error rate,
+FPS yang diterima per viewer, CPU server dan kapasitas per core untuk sizing.
+
+Kiosk (main app, default http://localhost:8080), per kiosk:
+- viewer /video_feed (MJPEG): frame yang diterima dihitung -> FPS per viewer
+- poll GET /detection_status setiap --status-interval detik
+- POST /capture setiap --capture-interval detik (0 = tidak capture); mode auto
+  mengembalikan 202 + job_id lalu di-long-poll lewat /capture_jobs/<job_id> (endpoint capture_job)
+
+Participant (jitsi bridge, default http://localhost:5001), --participant-mode:
+- http      POST /api/process_capture_binary (JPEG biner) pada --participant-fps
+- json      POST /api/process_capture (base64), jalur legacy
+- socketio  namespace /stream (start_stream + frame biner); latency dari
+            detection_result. Butuh paket python-socketio (client)
+
+Server harus memakai replay frame source agar tidak butuh kamera, misalnya:
+    FRAME_SOURCE=synthetic:42 python modules/main_detection/app.py
+    FRAME_SOURCE=synthetic:42 python modules/jitsi_system/jitsi_bridge.py
+atau biarkan tool ini menjalankan keduanya (--launch app,bridge). CPU server
+diukur dari process tree server (psutil jika ada, /proc di Linux); untuk server
+yang dijalankan sendiri berikan --server-pid app=<pid> --server-pid bridge=<pid>.
+
+Kapasitas per core = viewer/participant efektif (FPS tercapai / FPS target,
+maksimal 1 per client) dibagi core CPU yang dipakai server rata-rata.
+
+Usage:
+    python tools/load_test.py --kiosks 4 --participants 8 --duration 60
+        [--launch app,bridge] [--frame-source synthetic:42] [--frames bench/scenes]
+        [--participant-mode http|json|socketio] [--output load_result.json]
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+
+from benchmark_detection import git_commit, percentile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_SCRIPTS = {
+    'app': os.path.join(REPO_DIR, 'modules', 'main_detection', 'app.py'),
+    'bridge': os.path.join(REPO_DIR, 'modules', 'jitsi_system', 'jitsi_bridge.py')
+}
+READY_PATHS = {'app': '/detection_status', 'bridge': '/api/health'}
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg')
+PARTICIPANT_MODES = ('http', 'json', 'socketio')
+MJPEG_BOUNDARY = b'--frame'
+MJPEG_CHUNK = 64 * 1024
+REQUEST_TIMEOUT = 30            # Detik; long-poll /capture_jobs menunggu sampai CAPTURE_JOB_WAIT
+CAPTURE_JOB_WAIT = 25           # Detik ?wait= per long-poll status capture job
+RECONNECT_DELAY = 1.0
+CPU_SAMPLE_INTERVAL = 1.0
+STARTUP_TIMEOUT = 180           # Detik; load MediaPipe + template bisa lambat
+DEFAULT_SCENE_COUNT = 60
+
+
+# === Hasil ===
+
+class Recorder:
+    """Kumpulkan latency dan error per endpoint dari banyak thread client"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)     # endpoint -> detik
+        self.requests = defaultdict(int)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self.clients = {}                       # nama client -> counter
+
+    def record(self, endpoint, seconds=None, error=None):
+        with self._lock:
+            self.requests[endpoint] += 1
+            if error is not None:
+                self.errors[endpoint][error] += 1
+            elif seconds is not None:
+                self.latencies[endpoint].append(seconds)
+
+    def client(self, name, **counters):
+        with self._lock:
+            entry = self.clients.setdefault(name, defaultdict(float))
+            for key, value in counters.items():
+                entry[key] += value
+
+    def endpoint_summary(self):
+        with self._lock:
+            summary = {}
+            for endpoint in sorted(self.requests):
+                latencies = sorted(self.latencies[endpoint])
+                errors = sum(self.errors[endpoint].values())
+                summary[endpoint] = {
+                    'requests': self.requests[endpoint],
+                    'errors': errors,
+                    'error_rate': round(errors / self.requests[endpoint], 4),
+                    'errors_by_kind': dict(self.errors[endpoint]),
+                    'latency_ms': {
+                        'p50': round(percentile(latencies, 0.5) * 1000, 2),
+                        'p95': round(percentile(latencies, 0.95) * 1000, 2),
+                        'p99': round(percentile(latencies, 0.99) * 1000, 2),
+                        'max': round(latencies[-1] * 1000, 2) if latencies else 0.0
+                    }
+                }
+            return summary
+
+
+def error_kind(exc):
+    if isinstance(exc, requests.Timeout):
+        return 'timeout'
+    if isinstance(exc, requests.ConnectionError):
+        return 'connection'
+    return type(exc).__name__
+
+
+def timed_request(recorder, endpoint, session, method, url, ok=None, **kwargs):
+    """
+    Jalankan satu request dan catat latency; ok(response) menentukan sukses
+    Returns: response jika sukses, None jika error
+    """
+    started = time.perf_counter()
+    try:
+        response = session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+    except requests.RequestException as exc:
+        recorder.record(endpoint, error=error_kind(exc))
+        return None
+
+    elapsed = time.perf_counter() - started
+    if response.status_code >= 400:
+        recorder.record(endpoint, error=f"http_{response.status_code}")
+        return None
+    if ok is not None and not ok(response):
+        recorder.record(endpoint, error='status_error')
+        return None
+    recorder.record(endpoint, elapsed)
+    return response
+
+
+def json_success(response):
+    try:
+        return response.json().get('status') == 'success'
+    except ValueError:
+        return False
+
+
+def capture_accepted(response):
+    """POST /capture: hasil langsung (mode manual) atau 202 + job_id (mode auto)"""
+    return response.status_code == 202 or json_success(response)
+
+
+def capture_job_polled(response):
+    try:
+        return response.json().get('status') in ('pending', 'completed')
+    except ValueError:
+        return False
+
+
+def await_capture_job(recorder, session, base_url, job_id, stop):
+    """Long-poll capture job mode auto sampai selesai; Returns response jika completed"""
+    while not stop.is_set():
+        response = timed_request(recorder, 'capture_job', session, 'GET', f"{base_url}/capture_jobs/{job_id}",
+                                 ok=capture_job_polled, params={'wait': CAPTURE_JOB_WAIT})
+        if response is None or response.json()['status'] == 'completed':
+            return response
+    return None
+
+
+def sleep_until(deadline, stop):
+    """Tunggu sampai deadline (monotonic) atau stop di-set"""
+    remaining = deadline - time.monotonic()
+    if remaining > 0:
+        stop.wait(remaining)
+
+
+# === Kiosk ===
+
+def run_video_viewer(name, base_url, recorder, stop):
+    """Baca stream MJPEG /video_feed dan hitung frame dari boundary multipart"""
+    session = requests.Session()
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            with session.get(f"{base_url}/video_feed", stream=True, timeout=(5, 10)) as response:
+                if response.status_code != 200:
+                    recorder.record('video_feed', error=f"http_{response.status_code}")
+                    stop.wait(RECONNECT_DELAY)
+                    continue
+
+                tail = b''
+                first_frame_at = None
+                last_frame_at = None
+                for chunk in response.iter_content(MJPEG_CHUNK):
+                    if stop.is_set():
+                        break
+                    data = tail + chunk
+                    frames = data.count(MJPEG_BOUNDARY)
+                    # Simpan ekor agar boundary yang terpotong antar chunk tetap terhitung
+                    tail = data[-(len(MJPEG_BOUNDARY) - 1):]
+                    if not frames:
+                        continue
+
+                    now = time.perf_counter()
+                    if first_frame_at is None:
+                        first_frame_at = now
+                        recorder.record('video_feed', now - started)
+                    else:
+                        recorder.record('video_feed_frame_interval', (now - last_frame_at) / frames)
+                    last_frame_at = now
+                    recorder.client(name, frames=frames)
+                if first_frame_at is not None and last_frame_at > first_frame_at:
+                    recorder.client(name, stream_seconds=last_frame_at - first_frame_at)
+        except requests.RequestException as exc:
+            if stop.is_set():
+                break
+            recorder.record('video_feed', error=error_kind(exc))
+            recorder.client(name, reconnects=1)
+            stop.wait(RECONNECT_DELAY)
+
+
+def run_kiosk(index, args, recorder, stop):
+    name = f"kiosk-{index}"
+    viewer = threading.Thread(target=run_video_viewer, args=(name, args.app_url, recorder, stop),
+                              daemon=True)
+    viewer.start()
+
+    session = requests.Session()
+    now = time.monotonic()
+    next_status = now
+    next_capture = now + args.capture_interval if args.capture_interval else None
+
+    while not stop.is_set():
+        now = time.monotonic()
+        if now >= next_status:
+            timed_request(recorder, 'detection_status', session, 'GET', f"{args.app_url}/detection_status")
+            next_status = now + args.status_interval
+        if next_capture is not None and now >= next_capture:
+            response = timed_request(recorder, 'capture', session, 'POST', f"{args.app_url}/capture",
+                                     ok=capture_accepted)
+            if response is not None and response.status_code == 202:
+                response = await_capture_job(recorder, session, args.app_url, response.json()['job_id'], stop)
+            if response is not None:
+                recorder.client(name, captures=1)
+            next_capture = time.monotonic() + args.capture_interval
+        sleep_until(min(next_status, next_capture or next_status), stop)
+
+    viewer.join(timeout=15)
+
+
+# === Participant ===
+
+def load_frames(args):
+    """JPEG bytes untuk participant: folder --frames, atau scene sintetis"""
+    if args.frames:
+        names = sorted(name for name in os.listdir(args.frames) if name.lower().endswith(IMAGE_EXTENSIONS))
+        frames = []
+        for name in names[:args.scene_count]:
+            with open(os.path.join(args.frames, name), 'rb') as handle:
+                frames.append(handle.read())
+        return frames
+
+    from generate_ktp_scenes import SceneGenerator
+    generator = SceneGenerator(seed=args.seed)
+    return [data for _, data, _ in generator.stream_jpeg(args.scene_count)]
+
+
+def run_participant_http(index, args, frames, recorder, stop):
+    name = f"participant-{index}"
+    session_id = f"loadtest-{uuid.uuid4().hex[:8]}"
+    participant_id = f"participant_{index}"
+    session = requests.Session()
+    timed_request(recorder, 'start_session', session, 'POST', f"{args.bridge_url}/api/start_session",
+                  ok=json_success, json={'session_id': session_id, 'participants': [participant_id]})
+
+    interval = 1.0 / args.participant_fps
+    position = index
+    next_due = time.monotonic()
+    started = time.monotonic()
+    while not stop.is_set():
+        data = frames[position % len(frames)]
+        position += 1
+
+        if args.participant_mode == 'http':
+            response = timed_request(
+                recorder, 'process_capture_binary', session, 'POST',
+                f"{args.bridge_url}/api/process_capture_binary", ok=json_success, data=data,
+                headers={
+                    'Content-Type': 'image/jpeg',
+                    'X-Session-Id': session_id,
+                    'X-Participant-Id': participant_id,
+                    'X-Response-Mode': args.response_mode
+                })
+        else:
+            response = timed_request(
+                recorder, 'process_capture', session, 'POST',
+                f"{args.bridge_url}/api/process_capture", ok=json_success,
+                json={
+                    'session_id': session_id,
+                    'participant_id': participant_id,
+                    'image_data': base64.b64encode(data).decode('ascii'),
+                    'capture_mode': 'auto',
+                    'timestamp': datetime.now().isoformat(),
+                    'response_mode': args.response_mode
+                })
+        recorder.client(name, sent=1, results=1 if response is not None else 0)
+
+        # Request lambat tidak dikejar: client sinkron tertinggal seperti browser sungguhan
+        next_due = max(next_due + interval, time.monotonic())
+        sleep_until(next_due, stop)
+    recorder.client(name, stream_seconds=time.monotonic() - started)
+
+
+def run_participant_socketio(index, args, frames, recorder, stop):
+    import socketio
+
+    name = f"participant-{index}"
+    client = socketio.Client(reconnection=False)
+    namespace = '/stream'
+    started_at = {}
+
+    @client.on('stream_started', namespace=namespace)
+    def on_started(data):
+        started_at['time'] = time.monotonic()
+
+    @client.on('detection_result', namespace=namespace)
+    def on_result(data):
+        if 'error' in data:
+            recorder.record('stream_result', error='detection_error')
+        else:
+            recorder.record('stream_result', data.get('latency_ms', 0.0) / 1000)
+        recorder.client(name, results=1)
+
+    @client.on('stream_error', namespace=namespace)
+    def on_error(data):
+        recorder.record('stream_frame', error=data.get('message', 'stream_error'))
+
+    connect_started = time.perf_counter()
+    try:
+        client.connect(args.bridge_url, namespaces=[namespace], wait_timeout=10)
+    except Exception as exc:
+        recorder.record('stream_connect', error=type(exc).__name__)
+        return
+    recorder.record('stream_connect', time.perf_counter() - connect_started)
+
+    client.emit('start_stream', {
+        'session_id': f"loadtest-{uuid.uuid4().hex[:8]}",
+        'participant_id': f"participant_{index}",
+        'max_fps': args.participant_fps,
+        'reduce': args.reduce
+    }, namespace=namespace)
+
+    interval = 1.0 / args.participant_fps
+    position = index
+    next_due = time.monotonic()
+    try:
+        while not stop.is_set() and client.connected:
+            client.emit('frame', frames[position % len(frames)], namespace=namespace)
+            recorder.client(name, sent=1)
+            position += 1
+            next_due = max(next_due + interval, time.monotonic())
+            sleep_until(next_due, stop)
+        client.emit('stop_stream', {}, namespace=namespace)
+    finally:
+        if 'time' in started_at:
+            recorder.client(name, stream_seconds=time.monotonic() - started_at['time'])
+        client.disconnect()
+
+
+# === Server ===
+
+def launch_servers(roles, args, log_dir):
+    """Jalankan app/bridge dengan replay frame source; Returns: {role: Popen}"""
+    env = dict(os.environ, FRAME_SOURCE=args.frame_source, FRAME_SOURCE_PACE='realtime',
+               LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'))
+    processes = {}
+    for role in roles:
+        script = SERVER_SCRIPTS[role]
+        log_path = os.path.join(log_dir, f"load_test_{role}.log")
+        print(f"🚀 Starting {role} ({args.frame_source}), log: {log_path}")
+        processes[role] = subprocess.Popen(
+            [sys.executable, script], cwd=os.path.dirname(script), env=env,
+            stdout=open(log_path, 'w'), stderr=subprocess.STDOUT)
+
+    urls = {'app': args.app_url, 'bridge': args.bridge_url}
+    deadline = time.monotonic() + args.startup_timeout
+    for role, process in processes.items():
+        while True:
+            if process.poll() is not None:
+                stop_servers(processes)
+                raise RuntimeError(f"{role} exited during startup (code {process.returncode})")
+            try:
+                if requests.get(urls[role] + READY_PATHS[role], timeout=2).ok:
+                    break
+            except requests.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                stop_servers(processes)
+                raise RuntimeError(f"{role} not ready after {args.startup_timeout}s")
+            time.sleep(1)
+        print(f"✅ {role} ready at {urls[role]}")
+    return processes
+
+
+def stop_servers(processes):
+    for process in processes.values():
+        # debug=True menjalankan reloader: hentikan seluruh process tree
+        for pid in reversed(process_tree(process.pid)):
+            try:
+                os.kill(pid, 15)
+            except OSError:
+                pass
+    for process in processes.values():
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def process_tree(pid):
+    """pid beserta semua turunannya (root lebih dulu)"""
+    try:
+        import psutil
+        root = psutil.Process(pid)
+        return [pid] + [child.pid for child in root.children(recursive=True)]
+    except ImportError:
+        pass
+    except Exception:
+        return [pid]
+
+    parents = defaultdict(list)
+    for entry in os.listdir('/proc') if os.path.isdir('/proc') else ():
+        if entry.isdigit():
+            stat = read_proc_stat(int(entry))
+            if stat:
+                parents[int(stat[1])].append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop(0)
+        tree.append(current)
+        pending.extend(parents.get(current, ()))
+    return tree
+
+
+def read_proc_stat(pid):
+    """Field /proc/<pid>/stat setelah nama proses (index 0 = state)"""
+    try:
+        with open(f"/proc/{pid}/stat") as handle:
+            stat = handle.read()
+    except OSError:
+        return None
+    return stat[stat.rfind(')') + 2:].split()
+
+
+def cpu_seconds(pid):
+    """Total user+system CPU detik process tree; None jika tidak bisa diukur"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            total = 0.0
+            for process in [root] + root.children(recursive=True):
+                try:
+                    times = process.cpu_times()
+                    total += times.user + times.system
+                except psutil.Error:
+                    continue
+            return total
+        except psutil.Error:
+            return None
+
+    ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+    total, found = 0, False
+    for member in process_tree(pid):
+        stat = read_proc_stat(member)
+        if stat:
+            total += int(stat[11]) + int(stat[12])
+            found = True
+    return total / ticks if found else None
+
+
+class CpuSampler(threading.Thread):
+    """Sample CPU process tree server per detik; hasil dalam core yang terpakai"""
+
+    def __init__(self, pids, stop):
+        super().__init__(daemon=True)
+        self.pids = pids            # role -> pid
+        self.stop = stop
+        self.samples = defaultdict(list)
+
+    def run(self):
+        previous = {role: cpu_seconds(pid) for role, pid in self.pids.items()}
+        previous_time = time.monotonic()
+        while not self.stop.wait(CPU_SAMPLE_INTERVAL):
+            now = time.monotonic()
+            for role, pid in self.pids.items():
+                current = cpu_seconds(pid)
+                if current is not None and previous[role] is not None:
+                    # Child yang keluar membuat total turun: jangan hitung negatif
+                    self.samples[role].append(max(0.0, current - previous[role]) / (now - previous_time))
+                previous[role] = current
+            previous_time = now
+
+    def summary(self):
+        cores = os.cpu_count() or 1
+        result = {}
+        for role in self.pids:
+            samples = self.samples.get(role) or []
+            average = sum(samples) / len(samples) if samples else None
+            result[role] = {
+                'pid': self.pids[role],
+                'cores_avg': round(average, 3) if average is not None else None,
+                'cores_peak': round(max(samples), 3) if samples else None,
+                'utilization_avg': round(average / cores, 3) if average is not None else None
+            }
+        return result
+
+
+def parse_server_pids(values):
+    """['app=123', '456'] -> {'app': 123, 'server': 456}"""
+    pids = {}
+    for value in values or ():
+        role, _, pid = value.rpartition('=')
+        pids[role or 'server'] = int(pid)
+    return pids
+
+
+def fetch_json(url):
+    try:
+        response = requests.get(url, timeout=5)
+        return response.json() if response.ok else None
+    except (requests.RequestException, ValueError):
+        return None
+
+
+# === Report ===
+
+def client_summary(recorder, prefix, target_fps, counter):
+    clients = {}
+    for name, counters in sorted(recorder.clients.items()):
+        if not name.startswith(prefix):
+            continue
+        seconds = counters.get('stream_seconds', 0.0)
+        fps = counters.get(counter, 0.0) / seconds if seconds else 0.0
+        clients[name] = {
+            **{key: round(value, 3) for key, value in counters.items()},
+            'fps': round(fps, 2),
+            'effective': round(min(1.0, fps / target_fps), 3) if target_fps else None
+        }
+    return clients
+
+
+def capacity_per_core(clients, cpu, role):
+    """Client efektif per core CPU yang dipakai server (role, atau total semua server)"""
+    if not clients:
+        return None
+    if role in cpu:
+        cores = cpu[role]['cores_avg']
+    else:
+        values = [entry['cores_avg'] for entry in cpu.values() if entry['cores_avg'] is not None]
+        cores = sum(values) if values else None
+    effective = sum(client['effective'] or 0.0 for client in clients.values())
+    return {
+        'effective_clients': round(effective, 2),
+        'server_cores_used': cores,
+        'clients_per_core': round(effective / cores, 2) if cores else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test kiosk (/video_feed, /capture) dan participant Jitsi')
+    parser.add_argument('--kiosks', type=int, default=2, help='Jumlah kiosk (viewer /video_feed + poller)')
+    parser.add_argument('--participants', type=int, default=4, help='Jumlah participant Jitsi remote')
+    parser.add_argument('--duration', type=float, default=60, help='Detik load dijalankan')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Detik untuk menyalakan semua client')
+    parser.add_argument('--app-url', default='http://localhost:8080')
+    parser.add_argument('--bridge-url', default='http://localhost:5001')
+    parser.add_argument('--status-interval', type=float, default=0.5)
+    parser.add_argument('--capture-interval', type=float, default=20, help='0 = kiosk tidak capture')
+    parser.add_argument('--kiosk-target-fps', type=float, default=15, help='FPS /video_feed yang dianggap penuh')
+    parser.add_argument('--participant-mode', choices=PARTICIPANT_MODES, default='http')
+    parser.add_argument('--participant-fps', type=float, default=2)
+    parser.add_argument('--response-mode', choices=('inline', 'urls'), default='urls')
+    parser.add_argument('--reduce', type=int, default=1, help='Decode 1/N di bridge (mode socketio)')
+    parser.add_argument('--frames', help='Folder JPEG untuk participant (default: scene sintetis)')
+    parser.add_argument('--scene-count', type=int, default=DEFAULT_SCENE_COUNT)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--launch', default='', help="Jalankan server sendiri: 'app', 'bridge' atau 'app,bridge'")
+    parser.add_argument('--frame-source', default='synthetic:42', help='FRAME_SOURCE untuk server --launch')
+    parser.add_argument('--startup-timeout', type=float, default=STARTUP_TIMEOUT)
+    parser.add_argument('--server-pid', action='append', help='role=pid server yang sudah berjalan (CPU)')
+    parser.add_argument('--output', help='Path report JSON (default: load_test_<timestamp>.json)')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output or f"load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    roles = [role.strip() for role in args.launch.split(',') if role.strip()]
+    for role in roles:
+        if role not in SERVER_SCRIPTS:
+            parser.error(f"Unknown --launch role: {role}")
+
+    if args.participants and args.participant_mode == 'socketio':
+        try:
+            import socketio  # noqa: F401
+        except ImportError:
+            print("❌ --participant-mode socketio requires python-socketio (pip install \"python-socketio[client]\")")
+            sys.exit(1)
+
+    frames = load_frames(args) if args.participants else []
+    if args.participants and not frames:
+        print("❌ No participant frames available")
+        sys.exit(1)
+
+    processes = launch_servers(roles, args, os.path.dirname(output)) if roles else {}
+    server_pids = {role: process.pid for role, process in processes.items()}
+    server_pids.update(parse_server_pids(args.server_pid))
+
+    recorder = Recorder()
+    stop = threading.Event()
+    sampler = CpuSampler(server_pids, stop)
+    sampler.start()
+
+    participant_target = run_participant_socketio if args.participant_mode == 'socketio' else run_participant_http
+    clients = [(run_kiosk, (index, args, recorder, stop)) for index in range(args.kiosks)]
+    clients += [(participant_target, (index, args, frames, recorder, stop)) for index in range(args.participants)]
+
+    print(f"🏁 Load test: {args.kiosks} kiosk(s) -> {args.app_url}, {args.participants} participant(s) "
+          f"({args.participant_mode}) -> {args.bridge_url}, {args.duration:.0f}s")
+    threads = []
+    started = time.monotonic()
+    try:
+        for position, (target, target_args) in enumerate(clients):
+            thread = threading.Thread(target=target, args=target_args, daemon=True)
+            thread.start()
+            threads.append(thread)
+            sleep_until(started + args.ramp_up * (position + 1) / len(clients), stop)
+        sleep_until(started + args.duration, stop)
+    except KeyboardInterrupt:
+        print("⏹️ Interrupted, writing partial results")
+    finally:
+        # Snapshot state server sebelum client berhenti (profil governor saat beban)
+        server_stats = {
+            'app_governor': fetch_json(f"{args.app_url}/governor/stats") if args.kiosks else None,
+            'bridge_health': fetch_json(f"{args.bridge_url}/api/health") if args.participants else None
+        }
+        stop.set()
+        for thread in threads:
+            thread.join(timeout=REQUEST_TIMEOUT + 5)
+        sampler.join(timeout=5)
+        elapsed = time.monotonic() - started
+        if processes:
+            stop_servers(processes)
+
+    cpu = sampler.summary()
+    kiosks = client_summary(recorder, 'kiosk-', args.kiosk_target_fps, 'frames')
+    participants = client_summary(recorder, 'participant-', args.participant_fps, 'results')
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'duration_s': round(elapsed, 1),
+            'config': {key: value for key, value in vars(args).items() if key != 'output'}
+        },
+        'endpoints': recorder.endpoint_summary(),
+        'kiosks': kiosks,
+        'participants': participants,
+        'server_cpu': cpu,
+        'capacity_per_core': {
+            'kiosks': capacity_per_core(kiosks, cpu, 'app'),
+            'participants': capacity_per_core(participants, cpu, 'bridge')
+        },
+        'server_stats': server_stats
+    }
+
+    print(f"📊 Results after {elapsed:.0f}s:")
+    for endpoint, summary in report['endpoints'].items():
+        print(f"   {endpoint:<26} {summary['requests']:6d} req  err {summary['error_rate'] * 100:5.1f}%  "
+              f"p50 {summary['latency_ms']['p50']:8.1f}ms  p95 {summary['latency_ms']['p95']:8.1f}ms  "
+              f"p99 {summary['latency_ms']['p99']:8.1f}ms")
+    for name, client in {**kiosks, **participants}.items():
+        print(f"   {name:<26} {client['fps']:6.2f} fps")
+    for role, usage in cpu.items():
+        print(f"   cpu[{role}] avg {usage['cores_avg']} cores, peak {usage['cores_peak']} cores")
+    for kind, capacity in report['capacity_per_core'].items():
+        if capacity and capacity['clients_per_core'] is not None:
+            print(f"   capacity: {capacity['clients_per_core']} {kind}/core")
+
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"💾 Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,7 @@ import cv2
 import threading
 import time
 import os
+import sys
 from datetime import datetime
 import numpy as np
 
@@ -36,6 +37,17 @@ class CaptureOverlay:
     def init_camera(self):
         """Initialize camera dengan error handling"""
         try:
+            # FRAME_SOURCE (video:, images:, synthetic:, stream:) menggantikan probing kamera
+            if os.environ.get('FRAME_SOURCE'):
+                sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                             'modules', 'main_detection'))
+                from core.frame_source import open_frame_source
+                self.cap = open_frame_source(os.environ['FRAME_SOURCE'],
+                                             os.environ.get('FRAME_SOURCE_PACE', 'realtime'))
+                self.camera_available = True
+                print(f"✅ Frame source {os.environ['FRAME_SOURCE']} berhasil diinisialisasi")
+                return
+            
             # Coba berbagai camera index
             for camera_id in [0, 1, 2]:
                 print(f"Mencoba camera {camera_id}...")